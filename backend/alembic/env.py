@@ -14,9 +14,17 @@ if str(APP_DIR) not in sys.path:
     sys.path.insert(0, str(APP_DIR))
 
 from app.db import Base
-from app.models.user import User
+from app.models.user import EmailVerificationToken, User
 from app.models.assessment import Assessment
 from app.models.candidate import Candidate
+from app.models.submission import CodeReviewSubmission
+from app.models.stats import AssessmentStats, CandidateStats
+from app.models.draft import AssessmentDraft
+from app.models.similarity import SimilarityMatch, SubmissionSignature
+from app.models.invitation import AssessmentInvitation, InvitationCampaign
+from app.models.webhook import WebhookDelivery, WebhookEndpoint
+from app.models.archive import CandidateArchive, SubmissionArchive
+from app.models.job import Job
 from app.core.config import settings
 
 
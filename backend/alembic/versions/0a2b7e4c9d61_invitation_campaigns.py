@@ -0,0 +1,69 @@
+"""invitation campaigns
+
+Revision ID: 0a2b7e4c9d61
+Revises: f1a6b3d9c548
+Create Date: 2026-10-19 01:26:58.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0a2b7e4c9d61'
+down_revision: Union[str, None] = 'f1a6b3d9c548'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    tables = sa.inspect(op.get_bind()).get_table_names()
+    if "invitation_campaigns" not in tables:
+        op.create_table('invitation_campaigns',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('assessment_id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=True),
+        sa.Column('candidate_filter', sa.JSON(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('total', sa.Integer(), nullable=False),
+        sa.Column('created', sa.Integer(), nullable=False),
+        sa.Column('skipped', sa.Integer(), nullable=False),
+        sa.Column('sent', sa.Integer(), nullable=False),
+        sa.Column('failed', sa.Integer(), nullable=False),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['assessment_id'], ['assessments.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_invitation_campaigns_assessment_id'), 'invitation_campaigns', ['assessment_id'], unique=False)
+        op.create_index(op.f('ix_invitation_campaigns_id'), 'invitation_campaigns', ['id'], unique=False)
+    if "assessment_invitations" not in tables:
+        op.create_table('assessment_invitations',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('campaign_id', sa.Integer(), nullable=False),
+        sa.Column('assessment_id', sa.Integer(), nullable=False),
+        sa.Column('candidate_id', sa.Integer(), nullable=False),
+        sa.Column('salt', sa.String(length=32), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('sent_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('accepted_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['assessment_id'], ['assessments.id'], ),
+        sa.ForeignKeyConstraint(['campaign_id'], ['invitation_campaigns.id'], ),
+        sa.ForeignKeyConstraint(['candidate_id'], ['candidates.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('assessment_id', 'candidate_id', name='uq_invitation_assessment_candidate')
+        )
+        op.create_index(op.f('ix_assessment_invitations_campaign_id'), 'assessment_invitations', ['campaign_id'], unique=False)
+        op.create_index(op.f('ix_assessment_invitations_candidate_id'), 'assessment_invitations', ['candidate_id'], unique=False)
+        op.create_index(op.f('ix_assessment_invitations_id'), 'assessment_invitations', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_table('assessment_invitations')
+    op.drop_table('invitation_campaigns')
@@ -0,0 +1,57 @@
+"""webhook endpoints and outbox
+
+Revision ID: 1b8f4c2e6a70
+Revises: 0a2b7e4c9d61
+Create Date: 2026-10-19 01:38:48.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1b8f4c2e6a70'
+down_revision: Union[str, None] = '0a2b7e4c9d61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    tables = sa.inspect(op.get_bind()).get_table_names()
+    if "webhook_endpoints" not in tables:
+        op.create_table('webhook_endpoints',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('url', sa.String(length=1000), nullable=False),
+        sa.Column('secret', sa.String(length=128), nullable=False),
+        sa.Column('event_types', sa.JSON(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_webhook_endpoints_id'), 'webhook_endpoints', ['id'], unique=False)
+    if "webhook_outbox" not in tables:
+        op.create_table('webhook_outbox',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('endpoint_id', sa.Integer(), nullable=False),
+        sa.Column('event_id', sa.String(length=36), nullable=False),
+        sa.Column('event_type', sa.String(length=100), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('next_attempt_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('delivered_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['endpoint_id'], ['webhook_endpoints.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_webhook_outbox_endpoint_id'), 'webhook_outbox', ['endpoint_id'], unique=False)
+        op.create_index(op.f('ix_webhook_outbox_id'), 'webhook_outbox', ['id'], unique=False)
+        op.create_index(op.f('ix_webhook_outbox_next_attempt_at'), 'webhook_outbox', ['next_attempt_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_table('webhook_outbox')
+    op.drop_table('webhook_endpoints')
@@ -0,0 +1,63 @@
+"""archive tables
+
+Revision ID: 2c9a5d3f7b82
+Revises: 1b8f4c2e6a70
+Create Date: 2026-10-19 01:41:32.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2c9a5d3f7b82'
+down_revision: Union[str, None] = '1b8f4c2e6a70'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# On Postgres both tables are range-partitioned; services.archive creates the monthly partitions.
+
+
+def upgrade() -> None:
+    tables = sa.inspect(op.get_bind()).get_table_names()
+    if "code_review_submissions_archive" not in tables:
+        op.create_table('code_review_submissions_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('assessment_id', sa.Integer(), nullable=False),
+        sa.Column('candidate_id', sa.Integer(), nullable=False),
+        sa.Column('comments', sa.JSON(), nullable=False),
+        sa.Column('overall_feedback', sa.Text(), nullable=True),
+        sa.Column('submitted_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('is_evaluated', sa.Boolean(), nullable=False),
+        sa.Column('evaluation_score', sa.Float(), nullable=True),
+        sa.Column('evaluation_details', sa.JSON(), nullable=True),
+        sa.Column('evaluated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('criteria_fingerprint', sa.String(length=64), nullable=True),
+        sa.Column('archived_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('id', 'submitted_at'),
+        postgresql_partition_by='RANGE (submitted_at)'
+        )
+        op.create_index(op.f('ix_code_review_submissions_archive_assessment_id'), 'code_review_submissions_archive', ['assessment_id'], unique=False)
+        op.create_index(op.f('ix_code_review_submissions_archive_candidate_id'), 'code_review_submissions_archive', ['candidate_id'], unique=False)
+        op.create_index('ix_code_review_submissions_archive_id', 'code_review_submissions_archive', ['id'], unique=False)
+    if "candidates_archive" not in tables:
+        op.create_table('candidates_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('first_name', sa.String(length=100), nullable=False),
+        sa.Column('last_name', sa.String(length=100), nullable=False),
+        sa.Column('email', sa.String(length=255), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('archived_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('id', 'created_at'),
+        postgresql_partition_by='RANGE (created_at)'
+        )
+        op.create_index(op.f('ix_candidates_archive_email'), 'candidates_archive', ['email'], unique=False)
+        op.create_index('ix_candidates_archive_id', 'candidates_archive', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_table('candidates_archive')
+    op.drop_table('code_review_submissions_archive')
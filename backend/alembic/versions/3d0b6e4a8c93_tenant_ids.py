@@ -0,0 +1,36 @@
+"""tenant ids
+
+Revision ID: 3d0b6e4a8c93
+Revises: 2c9a5d3f7b82
+Create Date: 2026-10-19 01:43:45.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3d0b6e4a8c93'
+down_revision: Union[str, None] = '2c9a5d3f7b82'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    for table in ('assessments', 'candidates', 'candidates_archive'):
+        if 'tenant_id' not in {c["name"] for c in inspector.get_columns(table)}:
+            op.add_column(table, sa.Column('tenant_id', sa.String(length=64), nullable=True))
+    for table in ('assessments', 'candidates'):
+        if f'ix_{table}_tenant_id' not in {i["name"] for i in inspector.get_indexes(table)}:
+            op.create_index(op.f(f'ix_{table}_tenant_id'), table, ['tenant_id'], unique=False)
+
+
+def downgrade() -> None:
+    for table in ('assessments', 'candidates'):
+        op.drop_index(op.f(f'ix_{table}_tenant_id'), table_name=table)
+    for table in ('candidates_archive', 'candidates', 'assessments'):
+        with op.batch_alter_table(table) as batch:
+            batch.drop_column('tenant_id')
@@ -0,0 +1,35 @@
+"""email verification tokens
+
+Revision ID: 5f2d8a0b1e37
+Revises: 4e1c7f5b9da4
+Create Date: 2026-10-19 03:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f2d8a0b1e37'
+down_revision: Union[str, None] = '4e1c7f5b9da4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if "email_verification_tokens" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table('email_verification_tokens',
+    sa.Column('token_hash', sa.String(length=64), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('token_hash')
+    )
+    op.create_index(op.f('ix_email_verification_tokens_user_id'), 'email_verification_tokens', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_table('email_verification_tokens')
@@ -0,0 +1,34 @@
+"""submission idempotency key
+
+Revision ID: 6a3e9b1c2f48
+Revises: 5f2d8a0b1e37
+Create Date: 2026-10-19 04:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6a3e9b1c2f48'
+down_revision: Union[str, None] = '5f2d8a0b1e37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    columns = {c["name"] for c in inspector.get_columns("code_review_submissions")}
+    if "idempotency_key" not in columns:
+        op.add_column('code_review_submissions', sa.Column('idempotency_key', sa.String(length=100), nullable=True))
+    indexes = {i["name"] for i in inspector.get_indexes("code_review_submissions")}
+    if "ix_code_review_submissions_idempotency" not in indexes:
+        op.create_index('ix_code_review_submissions_idempotency', 'code_review_submissions', ['candidate_id', 'idempotency_key'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_code_review_submissions_idempotency', table_name='code_review_submissions')
+    with op.batch_alter_table('code_review_submissions') as batch:
+        batch.drop_column('idempotency_key')
@@ -0,0 +1,64 @@
+"""code review submissions
+
+Revision ID: b61f0e2a9c11
+Revises: c274b86d61c6
+Create Date: 2026-10-19 01:04:24.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b61f0e2a9c11'
+down_revision: Union[str, None] = 'c274b86d61c6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Databases started before this revision may already have some of these tables:
+# the app creates missing tables (never missing columns) on startup.
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    columns = {c["name"] for c in sa.inspect(bind).get_columns("assessments")}
+    if "assessment_type" not in columns:
+        op.add_column('assessments', sa.Column('assessment_type', sa.String(length=50), nullable=False, server_default='coding'))
+    if "github_repo_url" not in columns:
+        op.add_column('assessments', sa.Column('github_repo_url', sa.String(length=500), nullable=True))
+    if "pr_number" not in columns:
+        op.add_column('assessments', sa.Column('pr_number', sa.Integer(), nullable=True))
+    if "review_guidelines" not in columns:
+        op.add_column('assessments', sa.Column('review_guidelines', sa.JSON(), nullable=True))
+    if "evaluation_criteria" not in columns:
+        op.add_column('assessments', sa.Column('evaluation_criteria', sa.JSON(), nullable=True))
+
+    if "code_review_submissions" not in sa.inspect(bind).get_table_names():
+        op.create_table('code_review_submissions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('assessment_id', sa.Integer(), nullable=False),
+        sa.Column('candidate_id', sa.Integer(), nullable=False),
+        sa.Column('comments', sa.JSON(), nullable=False),
+        sa.Column('overall_feedback', sa.Text(), nullable=True),
+        sa.Column('submitted_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('is_evaluated', sa.Boolean(), nullable=False),
+        sa.Column('evaluation_score', sa.Float(), nullable=True),
+        sa.Column('evaluation_details', sa.JSON(), nullable=True),
+        sa.Column('evaluated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['assessment_id'], ['assessments.id'], ),
+        sa.ForeignKeyConstraint(['candidate_id'], ['candidates.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_code_review_submissions_assessment_id'), 'code_review_submissions', ['assessment_id'], unique=False)
+        op.create_index(op.f('ix_code_review_submissions_candidate_id'), 'code_review_submissions', ['candidate_id'], unique=False)
+        op.create_index(op.f('ix_code_review_submissions_id'), 'code_review_submissions', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_table('code_review_submissions')
+    with op.batch_alter_table('assessments') as batch:
+        for column in ('evaluation_criteria', 'review_guidelines', 'pr_number', 'github_repo_url', 'assessment_type'):
+            batch.drop_column(column)
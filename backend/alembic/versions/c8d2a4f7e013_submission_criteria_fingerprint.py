@@ -0,0 +1,29 @@
+"""submission criteria fingerprint
+
+Revision ID: c8d2a4f7e013
+Revises: b61f0e2a9c11
+Create Date: 2026-10-19 01:05:50.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8d2a4f7e013'
+down_revision: Union[str, None] = 'b61f0e2a9c11'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    columns = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("code_review_submissions")}
+    if "criteria_fingerprint" not in columns:
+        op.add_column('code_review_submissions', sa.Column('criteria_fingerprint', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('code_review_submissions') as batch:
+        batch.drop_column('criteria_fingerprint')
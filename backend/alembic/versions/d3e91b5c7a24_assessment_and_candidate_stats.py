@@ -0,0 +1,45 @@
+"""assessment and candidate stats
+
+Revision ID: d3e91b5c7a24
+Revises: c8d2a4f7e013
+Create Date: 2026-10-19 01:13:42.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3e91b5c7a24'
+down_revision: Union[str, None] = 'c8d2a4f7e013'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    tables = sa.inspect(op.get_bind()).get_table_names()
+    for name, key, parent in (
+        ('assessment_stats', 'assessment_id', 'assessments.id'),
+        ('candidate_stats', 'candidate_id', 'candidates.id'),
+    ):
+        if name in tables:
+            continue
+        op.create_table(name,
+        sa.Column(key, sa.Integer(), nullable=False),
+        sa.Column('assigned', sa.Integer(), nullable=False),
+        sa.Column('in_progress', sa.Integer(), nullable=False),
+        sa.Column('submitted', sa.Integer(), nullable=False),
+        sa.Column('evaluated', sa.Integer(), nullable=False),
+        sa.Column('score_sum', sa.Float(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint([key], [parent], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint(key)
+        )
+    # Counters start at zero; the stats reconciler fills them from existing rows on startup
+
+
+def downgrade() -> None:
+    op.drop_table('candidate_stats')
+    op.drop_table('assessment_stats')
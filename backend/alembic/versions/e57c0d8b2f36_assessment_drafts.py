@@ -0,0 +1,42 @@
+"""assessment drafts
+
+Revision ID: e57c0d8b2f36
+Revises: d3e91b5c7a24
+Create Date: 2026-10-19 01:17:04.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e57c0d8b2f36'
+down_revision: Union[str, None] = 'd3e91b5c7a24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if "assessment_drafts" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table('assessment_drafts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('candidate_id', sa.Integer(), nullable=False),
+    sa.Column('assessment_id', sa.Integer(), nullable=False),
+    sa.Column('content', sa.JSON(), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['assessment_id'], ['assessments.id'], ),
+    sa.ForeignKeyConstraint(['candidate_id'], ['candidates.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('candidate_id', 'assessment_id', name='uq_draft_candidate_assessment')
+    )
+    op.create_index(op.f('ix_assessment_drafts_assessment_id'), 'assessment_drafts', ['assessment_id'], unique=False)
+    op.create_index(op.f('ix_assessment_drafts_id'), 'assessment_drafts', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_table('assessment_drafts')
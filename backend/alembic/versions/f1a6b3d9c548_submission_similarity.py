@@ -0,0 +1,63 @@
+"""submission similarity
+
+Revision ID: f1a6b3d9c548
+Revises: e57c0d8b2f36
+Create Date: 2026-10-19 01:24:05.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1a6b3d9c548'
+down_revision: Union[str, None] = 'e57c0d8b2f36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    tables = sa.inspect(op.get_bind()).get_table_names()
+    if "submission_signatures" not in tables:
+        op.create_table('submission_signatures',
+        sa.Column('submission_id', sa.Integer(), nullable=False),
+        sa.Column('assessment_id', sa.Integer(), nullable=False),
+        sa.Column('candidate_id', sa.Integer(), nullable=False),
+        sa.Column('signature', sa.LargeBinary(), nullable=False),
+        sa.Column('shingle_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['assessment_id'], ['assessments.id'], ),
+        sa.ForeignKeyConstraint(['candidate_id'], ['candidates.id'], ),
+        sa.ForeignKeyConstraint(['submission_id'], ['code_review_submissions.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('submission_id')
+        )
+        op.create_index(op.f('ix_submission_signatures_assessment_id'), 'submission_signatures', ['assessment_id'], unique=False)
+    if "similarity_matches" not in tables:
+        op.create_table('similarity_matches',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('assessment_id', sa.Integer(), nullable=False),
+        sa.Column('submission_id', sa.Integer(), nullable=False),
+        sa.Column('other_submission_id', sa.Integer(), nullable=False),
+        sa.Column('candidate_id', sa.Integer(), nullable=False),
+        sa.Column('other_candidate_id', sa.Integer(), nullable=False),
+        sa.Column('similarity', sa.Float(), nullable=False),
+        sa.Column('detected_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['assessment_id'], ['assessments.id'], ),
+        sa.ForeignKeyConstraint(['candidate_id'], ['candidates.id'], ),
+        sa.ForeignKeyConstraint(['other_candidate_id'], ['candidates.id'], ),
+        sa.ForeignKeyConstraint(['other_submission_id'], ['code_review_submissions.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['submission_id'], ['code_review_submissions.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('submission_id', 'other_submission_id', name='uq_similarity_pair')
+        )
+        op.create_index(op.f('ix_similarity_matches_assessment_id'), 'similarity_matches', ['assessment_id'], unique=False)
+        op.create_index(op.f('ix_similarity_matches_id'), 'similarity_matches', ['id'], unique=False)
+        op.create_index(op.f('ix_similarity_matches_other_submission_id'), 'similarity_matches', ['other_submission_id'], unique=False)
+        op.create_index(op.f('ix_similarity_matches_submission_id'), 'similarity_matches', ['submission_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_table('similarity_matches')
+    op.drop_table('submission_signatures')
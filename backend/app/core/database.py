@@ -1,7 +1,13 @@
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
-from typing import Generator
+from sqlalchemy.orm import Session, sessionmaker, DeclarativeBase
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import Depends, Header, HTTPException, status
+from typing import Callable, Dict, Generator, List, Optional, Tuple, TypeVar
+import hashlib
 import os
+import re
+
+from ..db import enable_sqlite_wal
 
 # Base class for application database models
 class Base(DeclarativeBase):
@@ -21,6 +27,46 @@ DATABASE_CONFIGS = {
     }
 }
 
+
+def _parse_pairs(value: str) -> Dict[str, str]:
+    """Parse ``"a=x,b=y"`` into ``{"a": "x", "b": "y"}``."""
+    pairs = {}
+    for item in value.split(","):
+        name, sep, target = item.strip().partition("=")
+        if sep and name.strip() and target.strip():
+            pairs[name.strip()] = target.strip()
+    return pairs
+
+
+# Tenant shards, e.g. SHARD_DATABASE_URLS="shard0=sqlite:///./shard0.db,shard1=postgresql://..."
+# Each shard holds the full application schema for the tenants mapped to it.
+SHARD_TABLES = ["assessments", "candidates", "code_review_submissions", "candidate_stats", "assessment_stats"]
+for shard_name, shard_url in _parse_pairs(os.getenv("SHARD_DATABASE_URLS", "")).items():
+    DATABASE_CONFIGS[shard_name] = {
+        "url": shard_url,
+        "description": f"Tenant shard {shard_name}",
+        "tables": SHARD_TABLES,
+        "shard": True,
+    }
+SHARD_NAMES = sorted(name for name, config in DATABASE_CONFIGS.items() if config.get("shard"))
+
+# Tenants pinned to a shard, e.g. TENANT_SHARD_MAP="acme=shard1,globex=shard0".
+# Everything else is placed by rendezvous hashing over SHARD_NAMES.
+TENANT_SHARD_MAP = _parse_pairs(os.getenv("TENANT_SHARD_MAP", ""))
+for _tenant, _shard in TENANT_SHARD_MAP.items():
+    if _shard not in SHARD_NAMES:
+        raise ValueError(f"TENANT_SHARD_MAP maps {_tenant!r} to unknown shard {_shard!r}")
+
+# Routing tenant requests to their shard stays off until submissions, drafts,
+# evaluation, stats, rankings, reports and invitations run per shard: until
+# then a tenant on a shard could create assessments but never take them. The
+# registry, schema creation and admin fan-out work regardless, so shards can
+# be provisioned and backfilled ahead of the switch.
+SHARD_ROUTING = bool(SHARD_NAMES) and os.getenv("TENANT_SHARD_ROUTING", "0") == "1"
+
+TENANT_HEADER = "X-Tenant-ID"
+TENANT_ID_PATTERN = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+
 # Create engines
 engines = {}
 for db_name, config in DATABASE_CONFIGS.items():
@@ -28,11 +74,14 @@ for db_name, config in DATABASE_CONFIGS.items():
         config["url"],
         connect_args={"check_same_thread": False} if "sqlite" in config["url"] else {}
     )
+    if config.get("shard"):
+        # Shards serve the same workload as the primary database
+        enable_sqlite_wal(engines[db_name])
 
 # Create session makers
 SessionLocal = {
-    "app": sessionmaker(autocommit=False, autoflush=False, bind=engines["app"]),
-    "content": sessionmaker(autocommit=False, autoflush=False, bind=engines["content"])
+    db_name: sessionmaker(autocommit=False, autoflush=False, bind=db_engine)
+    for db_name, db_engine in engines.items()
 }
 
 def get_db(db_name: str = "app") -> Generator:
@@ -67,3 +116,129 @@ def get_content_db():
 def get_content_session():
     """Get content database session directly (for testing)"""
     return SessionLocal["content"]()
+
+
+def shard_for_tenant(tenant_id: str) -> str:
+    """
+    Shard holding ``tenant_id``. Unpinned tenants go to the shard with the
+    highest hash of ``shard:tenant`` (rendezvous hashing), so adding a shard
+    only moves the tenants that now hash highest onto it.
+    """
+    if not SHARD_NAMES:
+        raise LookupError("No tenant shards are configured")
+    pinned = TENANT_SHARD_MAP.get(tenant_id)
+    if pinned:
+        return pinned
+    return max(
+        SHARD_NAMES,
+        key=lambda name: hashlib.blake2b(f"{name}:{tenant_id}".encode(), digest_size=8).digest(),
+    )
+
+
+def init_shards() -> None:
+    """Create the application schema on every shard; called by ``app.db.init_database`` once models are imported."""
+    if not SHARD_NAMES:
+        return
+    from ..db import Base as AppBase
+    from ..services.candidate_search import ensure_search_indexes
+
+    for name in SHARD_NAMES:
+        AppBase.metadata.create_all(bind=engines[name])
+        ensure_search_indexes(engines[name])
+    if SHARD_ROUTING:
+        print("[SHARDS] Tenant routing is on: sharded tenants cannot submit, draft or receive reports yet")
+
+
+def get_tenant_db(x_tenant_id: Optional[str] = Header(None, alias=TENANT_HEADER)) -> Generator:
+    """
+    FastAPI dependency: session on the shard of the requesting tenant.
+    Requests without a tenant header (or deployments without shard routing)
+    use the primary application database.
+    """
+    if x_tenant_id is None or not SHARD_ROUTING:
+        from ..db import SessionLocal as PrimarySession
+        db = PrimarySession()
+    else:
+        if not TENANT_ID_PATTERN.match(x_tenant_id):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid {TENANT_HEADER} header")
+        shard = shard_for_tenant(x_tenant_id)
+        db = SessionLocal[shard]()
+        db.info.update(shard=shard, tenant_id=x_tenant_id)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def require_primary(x_tenant_id: Optional[str] = Header(None, alias=TENANT_HEADER)) -> None:
+    """
+    FastAPI dependency for routes whose data only lives on the primary database
+    (submissions, scores, drafts, campaigns, reports). With shard routing on
+    (``TENANT_SHARD_ROUTING=1``), tenant requests are refused: the primary holds no rows of theirs and
+    answering from it would expose other tenants' data.
+    """
+    if x_tenant_id is not None and SHARD_ROUTING:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=f"This endpoint does not serve sharded tenants; retry without the {TENANT_HEADER} header",
+        )
+
+
+def get_primary_db(_: None = Depends(require_primary)) -> Generator:
+    """FastAPI dependency: primary database session for a request that passed ``require_primary``."""
+    from ..db import SessionLocal as PrimarySession
+    db = PrimarySession()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def tenant_of(db: Session) -> Optional[str]:
+    """Tenant a ``get_tenant_db`` session was opened for, or None on the primary database."""
+    return db.info.get("tenant_id")
+
+
+def owned_by_tenant(db: Session, row) -> bool:
+    """Several tenants share a shard, so rows are also scoped by their ``tenant_id`` column."""
+    tenant_id = tenant_of(db)
+    return row is not None and (tenant_id is None or row.tenant_id == tenant_id)
+
+
+def is_primary(db: Session) -> bool:
+    """Whether ``db`` is a primary-database session (background pipelines only run there)."""
+    return "shard" not in db.info
+
+
+T = TypeVar("T")
+# Threads are only started on first use
+_fan_out_pool = ThreadPoolExecutor(max_workers=max(len(SHARD_NAMES), 1), thread_name_prefix="shard-fan-out")
+
+
+def fan_out(
+    query: Callable[[Session], List[T]],
+    shards: Optional[List[str]] = None,
+) -> Tuple[Dict[str, List[T]], Dict[str, str]]:
+    """
+    Run ``query`` against every shard in parallel, each on its own session.
+    Returns ``({shard: results}, {shard: error})``; a failing shard does not
+    fail the others.
+    """
+    shards = SHARD_NAMES if shards is None else shards
+    def run(name: str) -> List[T]:
+        db = SessionLocal[name]()
+        db.info["shard"] = name
+        try:
+            return query(db)
+        finally:
+            db.close()
+
+    futures = {name: _fan_out_pool.submit(run, name) for name in shards}
+    results: Dict[str, List[T]] = {}
+    errors: Dict[str, str] = {}
+    for name, future in futures.items():
+        try:
+            results[name] = future.result()
+        except Exception as e:
+            errors[name] = f"{type(e).__name__}: {e}"
+    return results, errors
@@ -1,5 +1,5 @@
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 from .core.config import settings
 
@@ -8,12 +8,33 @@ class Base(DeclarativeBase):
     pass
 
 
+def enable_sqlite_wal(engine) -> None:
+    """
+    Put SQLite databases in WAL mode. With the default rollback journal, any
+    open read transaction (a streaming export, a long page of results) blocks
+    every writer until it ends; in WAL mode readers and the writer proceed
+    concurrently.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_wal(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        finally:
+            cursor.close()
+
+
 def _make_engine():
     database_url = settings.database_url
     connect_args = {}
     if database_url.startswith("sqlite"):
         connect_args = {"check_same_thread": False}
-    return create_engine(database_url, echo=False, future=True, connect_args=connect_args)
+    engine = create_engine(database_url, echo=False, future=True, connect_args=connect_args)
+    enable_sqlite_wal(engine)
+    return engine
 
 
 engine = _make_engine()
@@ -22,12 +43,26 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, futu
 
 def init_database() -> None:
     # Import models so metadata is populated
-    from .models.user import User
+    from .models.user import EmailVerificationToken, User
     from .models.assessment import Assessment
     from .models.candidate import Candidate
+    from .models.submission import CodeReviewSubmission
+    from .models.stats import AssessmentStats, CandidateStats
+    from .models.draft import AssessmentDraft
+    from .models.similarity import SimilarityMatch, SubmissionSignature
+    from .models.invitation import AssessmentInvitation, InvitationCampaign
+    from .models.webhook import WebhookDelivery, WebhookEndpoint
+    from .models.archive import CandidateArchive, SubmissionArchive
+    from .models.job import Job
 
     Base.metadata.create_all(bind=engine)
 
+    from .services.candidate_search import ensure_search_indexes
+    ensure_search_indexes(engine)
+
+    from .core.database import init_shards
+    init_shards()
+
 
 # Dependency for FastAPI routes
 def get_db():
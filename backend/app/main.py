@@ -1,8 +1,21 @@
-from fastapi import FastAPI
+import anyio.to_thread
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
-from .routers import auth, assessments, candidates, content
-from .db import init_database
+from .routers import admin, auth, assessments, candidates, content, invitations, reports, submissions, webhooks
+from .core import database as databases
+from .db import engine, init_database
+from .core.config import settings
+from .services import jobs, metrics, profiling, stats
+from .services import webhooks as webhook_events
+from .services.archive import archiver
+from .services.response_cache import ResponseCacheMiddleware
+from .services.drafts import draft_store
+from .services.evaluation import evaluation_engine
+from .services.invitations import campaign_sender
+from .services.sandbox import sandbox_pool
+from .services.similarity import similarity_index
+from .services.submission_buffer import submission_buffer
 
 
 def create_app() -> FastAPI:
@@ -17,16 +30,72 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    app.add_middleware(ResponseCacheMiddleware)
+    if settings.profile_secret:
+        app.add_middleware(profiling.ProfilingMiddleware)
+    app.add_middleware(metrics.MetricsMiddleware)
+    metrics.track_engines({"primary": engine, **databases.engines})
+
     # Routers
     app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
     app.include_router(assessments.router, prefix="/api/assessments", tags=["assessments"])
     app.include_router(candidates.router, prefix="/api/candidates", tags=["candidates"])
     app.include_router(content.router, prefix="/api/content", tags=["content"])
+    app.include_router(submissions.router, prefix="/api/submissions", tags=["submissions"])
+    app.include_router(invitations.router, prefix="/api/invitations", tags=["invitations"])
+    app.include_router(reports.router, prefix="/api/reports", tags=["reports"])
+    app.include_router(webhooks.router, prefix="/api/webhooks", tags=["webhooks"])
+    app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
+
+    @app.on_event("startup")
+    async def start_metrics():
+        # The default limiter is per event loop, so it can only be looked up from inside it
+        metrics.track_thread_limiter("anyio", anyio.to_thread.current_default_thread_limiter())
+        metrics.sampler.start()
+
+    @app.on_event("startup")
+    def start_background_writers():
+        if stats.record_submissions not in submission_buffer.on_flush:
+            submission_buffer.on_flush.append(stats.record_submissions)
+            submission_buffer.on_flush.append(draft_store.discard_submitted)
+            submission_buffer.on_flush.append(webhook_events.record_submissions)
+        if evaluation_engine.schedule_new_submissions not in submission_buffer.after_commit:
+            submission_buffer.after_commit.append(evaluation_engine.schedule_new_submissions)
+            submission_buffer.after_commit.append(similarity_index.schedule_new_submissions)
+            submission_buffer.after_commit.append(webhook_events.webhook_dispatcher.notify)
+        submission_buffer.start()
+        draft_store.start()
+        stats.stats_reconciler.start()
+        sandbox_pool.start()
+        webhook_events.webhook_dispatcher.start()
+        archiver.start()
+        if settings.job_embedded_threads:
+            # Normally jobs run in their own processes (run_jobs.py)
+            jobs.load_handlers()
+            jobs.embedded_worker.start()
+
+    @app.on_event("shutdown")
+    def stop_background_writers():
+        # Drain pending submissions so nothing acknowledged-in-flight is lost
+        submission_buffer.stop()
+        draft_store.stop()
+        campaign_sender.shutdown()
+        jobs.embedded_worker.stop()
+        evaluation_engine.shutdown()
+        stats.stats_reconciler.stop()
+        sandbox_pool.shutdown()
+        webhook_events.webhook_dispatcher.stop()
+        archiver.stop()
+        metrics.sampler.stop()
 
     @app.get("/api/health")
     def health_check():
         return {"status": "ok"}
 
+    @app.get("/metrics", include_in_schema=False)
+    def prometheus_metrics():
+        return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
     return app
 
 
@@ -0,0 +1,50 @@
+from sqlalchemy import Boolean, DateTime, Float, Index, Integer, JSON, PrimaryKeyConstraint, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+from typing import Optional, Dict, Any
+from datetime import datetime
+
+from ..db import Base
+
+
+# Archive tables mirror their hot table without foreign keys. On Postgres they are
+# range-partitioned by month (partitions are created on demand by services.archive),
+# which is why the partition column is part of the primary key.
+
+
+class SubmissionArchive(Base):
+    __tablename__ = "code_review_submissions_archive"
+    __table_args__ = (
+        PrimaryKeyConstraint("id", "submitted_at"),
+        Index("ix_code_review_submissions_archive_id", "id"),
+        {"postgresql_partition_by": "RANGE (submitted_at)"},
+    )
+
+    id: Mapped[int] = mapped_column(Integer, autoincrement=False)
+    assessment_id: Mapped[int] = mapped_column(Integer, index=True, nullable=False)
+    candidate_id: Mapped[int] = mapped_column(Integer, index=True, nullable=False)
+    comments: Mapped[Dict[str, str]] = mapped_column(JSON, nullable=False)
+    overall_feedback: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    submitted_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    is_evaluated: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    evaluation_score: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    evaluation_details: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON, nullable=True)
+    evaluated_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    criteria_fingerprint: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    archived_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+
+
+class CandidateArchive(Base):
+    __tablename__ = "candidates_archive"
+    __table_args__ = (
+        PrimaryKeyConstraint("id", "created_at"),
+        Index("ix_candidates_archive_id", "id"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+    id: Mapped[int] = mapped_column(Integer, autoincrement=False)
+    first_name: Mapped[str] = mapped_column(String(100), nullable=False)
+    last_name: Mapped[str] = mapped_column(String(100), nullable=False)
+    email: Mapped[str] = mapped_column(String(255), index=True, nullable=False)
+    tenant_id: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    archived_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
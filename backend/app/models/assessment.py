@@ -1,5 +1,6 @@
-from sqlalchemy import String, Text, DateTime, Integer
+from sqlalchemy import String, Text, DateTime, Integer, JSON
 from sqlalchemy.orm import Mapped, mapped_column
+from typing import Optional, Dict, Any
 from datetime import datetime
 
 from ..db import Base
@@ -13,6 +14,11 @@ class Assessment(Base):
     description: Mapped[str] = mapped_column(Text, nullable=True)
     difficulty: Mapped[str] = mapped_column(String(50), default="medium")
     duration_minutes: Mapped[int] = mapped_column(Integer, default=30)
+    assessment_type: Mapped[str] = mapped_column(String(50), default="coding")
+    github_repo_url: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
+    pr_number: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    review_guidelines: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON, nullable=True)
+    evaluation_criteria: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON, nullable=True)
+    # Owning organization when tenants are sharded (see core.database); NULL on the primary database
+    tenant_id: Mapped[Optional[str]] = mapped_column(String(64), index=True, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
-
-
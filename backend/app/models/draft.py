@@ -0,0 +1,19 @@
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Integer, JSON, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+from typing import Dict, Any
+from datetime import datetime
+
+from ..db import Base
+
+
+class AssessmentDraft(Base):
+    __tablename__ = "assessment_drafts"
+    __table_args__ = (UniqueConstraint("candidate_id", "assessment_id", name="uq_draft_candidate_assessment"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    candidate_id: Mapped[int] = mapped_column(Integer, ForeignKey("candidates.id"), nullable=False)
+    assessment_id: Mapped[int] = mapped_column(Integer, ForeignKey("assessments.id"), index=True, nullable=False)
+    content: Mapped[Dict[str, Any]] = mapped_column(JSON, nullable=False)
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False)  # last-write-wins ordering
+    started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
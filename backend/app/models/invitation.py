@@ -0,0 +1,44 @@
+from sqlalchemy import DateTime, ForeignKey, Integer, JSON, String, Text, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+from typing import Optional, Dict, Any
+from datetime import datetime
+
+from ..db import Base
+
+
+class InvitationCampaign(Base):
+    __tablename__ = "invitation_campaigns"
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    assessment_id: Mapped[int] = mapped_column(Integer, ForeignKey("assessments.id"), index=True, nullable=False)
+    name: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    candidate_filter: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON, nullable=True)
+    status: Mapped[str] = mapped_column(String(20), default="sending", nullable=False)  # sending, completed, failed
+    total: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    created: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    skipped: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    sent: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    failed: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class AssessmentInvitation(Base):
+    """An assessment assigned to a candidate; at most one per pair."""
+
+    __tablename__ = "assessment_invitations"
+    __table_args__ = (UniqueConstraint("assessment_id", "candidate_id", name="uq_invitation_assessment_candidate"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    campaign_id: Mapped[int] = mapped_column(Integer, ForeignKey("invitation_campaigns.id"), index=True, nullable=False)
+    assessment_id: Mapped[int] = mapped_column(Integer, ForeignKey("assessments.id"), nullable=False)
+    candidate_id: Mapped[int] = mapped_column(Integer, ForeignKey("candidates.id"), index=True, nullable=False)
+    # Per-invitation salt; the invite token is an HMAC of id and salt, so tokens are never stored
+    salt: Mapped[str] = mapped_column(String(32), nullable=False)
+    status: Mapped[str] = mapped_column(String(20), default="pending", nullable=False)  # pending, sent, failed, accepted
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    accepted_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
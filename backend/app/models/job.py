@@ -0,0 +1,34 @@
+from sqlalchemy import DateTime, Index, Integer, JSON, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+from typing import Optional, Dict, Any
+from datetime import datetime
+
+from ..db import Base
+
+
+class Job(Base):
+    """A unit of background work; see ``services.jobs`` for the lifecycle."""
+
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Claim order within a type: due, highest priority first, oldest first
+        Index("ix_jobs_claim", "status", "type", "priority", "run_at"),
+        Index("ix_jobs_unique_key", "unique_key", "status"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    type: Mapped[str] = mapped_column(String(100), nullable=False)
+    payload: Mapped[Dict[str, Any]] = mapped_column(JSON, nullable=False)
+    priority: Mapped[int] = mapped_column(Integer, default=0, nullable=False)  # higher runs first
+    status: Mapped[str] = mapped_column(String(20), default="queued", nullable=False)  # queued, running, succeeded, dead
+    unique_key: Mapped[Optional[str]] = mapped_column(String(200), nullable=True)  # at most one queued job per key
+    run_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    max_attempts: Mapped[int] = mapped_column(Integer, default=5, nullable=False)
+    locked_by: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    locked_until: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    result: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
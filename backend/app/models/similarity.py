@@ -0,0 +1,31 @@
+from sqlalchemy import DateTime, Float, ForeignKey, Integer, LargeBinary, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+
+from ..db import Base
+
+
+class SubmissionSignature(Base):
+    __tablename__ = "submission_signatures"
+
+    submission_id: Mapped[int] = mapped_column(Integer, ForeignKey("code_review_submissions.id", ondelete="CASCADE"), primary_key=True)
+    assessment_id: Mapped[int] = mapped_column(Integer, ForeignKey("assessments.id"), index=True, nullable=False)
+    candidate_id: Mapped[int] = mapped_column(Integer, ForeignKey("candidates.id"), nullable=False)
+    signature: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)  # MinHash values, uint32 little-endian
+    shingle_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+
+
+class SimilarityMatch(Base):
+    __tablename__ = "similarity_matches"
+    __table_args__ = (UniqueConstraint("submission_id", "other_submission_id", name="uq_similarity_pair"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    assessment_id: Mapped[int] = mapped_column(Integer, ForeignKey("assessments.id"), index=True, nullable=False)
+    # The later submission of the pair, flagged against an earlier one
+    submission_id: Mapped[int] = mapped_column(Integer, ForeignKey("code_review_submissions.id", ondelete="CASCADE"), index=True, nullable=False)
+    other_submission_id: Mapped[int] = mapped_column(Integer, ForeignKey("code_review_submissions.id", ondelete="CASCADE"), index=True, nullable=False)
+    candidate_id: Mapped[int] = mapped_column(Integer, ForeignKey("candidates.id"), nullable=False)
+    other_candidate_id: Mapped[int] = mapped_column(Integer, ForeignKey("candidates.id"), nullable=False)
+    similarity: Mapped[float] = mapped_column(Float, nullable=False)  # estimated Jaccard similarity
+    detected_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
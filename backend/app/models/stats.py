@@ -0,0 +1,29 @@
+from sqlalchemy import Integer, Float, DateTime, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+
+from ..db import Base
+
+
+class AssessmentStats(Base):
+    __tablename__ = "assessment_stats"
+
+    assessment_id: Mapped[int] = mapped_column(Integer, ForeignKey("assessments.id", ondelete="CASCADE"), primary_key=True)
+    assigned: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    in_progress: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    submitted: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    evaluated: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    score_sum: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+
+
+class CandidateStats(Base):
+    __tablename__ = "candidate_stats"
+
+    candidate_id: Mapped[int] = mapped_column(Integer, ForeignKey("candidates.id", ondelete="CASCADE"), primary_key=True)
+    assigned: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    in_progress: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    submitted: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    evaluated: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    score_sum: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
@@ -0,0 +1,27 @@
+from sqlalchemy import String, Text, DateTime, Integer, Float, Boolean, JSON, ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from typing import Optional, Dict, Any
+from datetime import datetime
+
+from ..db import Base
+
+
+class CodeReviewSubmission(Base):
+    __tablename__ = "code_review_submissions"
+    __table_args__ = (
+        # A retried POST with the same Idempotency-Key resolves to the stored row
+        Index("ix_code_review_submissions_idempotency", "candidate_id", "idempotency_key", unique=True),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    assessment_id: Mapped[int] = mapped_column(Integer, ForeignKey("assessments.id"), index=True, nullable=False)
+    candidate_id: Mapped[int] = mapped_column(Integer, ForeignKey("candidates.id"), index=True, nullable=False)
+    comments: Mapped[Dict[str, str]] = mapped_column(JSON, nullable=False)  # {line_number: comment_text}
+    overall_feedback: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    submitted_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    is_evaluated: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    evaluation_score: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    evaluation_details: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON, nullable=True)
+    evaluated_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    criteria_fingerprint: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    idempotency_key: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
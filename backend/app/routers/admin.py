@@ -0,0 +1,196 @@
+import heapq
+import json
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import FileResponse
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..core.database import SHARD_NAMES, TENANT_SHARD_MAP, fan_out, shard_for_tenant
+from ..db import get_db
+from ..models.assessment import Assessment
+from ..models.candidate import Candidate
+from ..models.job import Job
+from ..schemas import (
+    AssessmentRead, CandidateRead, JobRead, ProfileDetail, ProfileSummary, ProfilingRule, ProfilingRuleCreate,
+    ShardedAssessmentPage, ShardedCandidatePage, ShardInfo,
+)
+from ..services import jobs, profiling
+
+
+router = APIRouter()
+
+
+def _require_shards() -> None:
+    if not SHARD_NAMES:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No tenant shards are configured")
+
+
+def _newest_first(model, read_schema, limit: int, offset: int):
+    """Fan out a newest-first page and merge the per-shard pages into one."""
+    # Every shard must return enough rows to cover the requested window on its own
+    window = offset + limit
+
+    def page(db):
+        shard = db.info["shard"]
+        rows = db.scalars(select(model).order_by(model.created_at.desc(), model.id.desc()).limit(window))
+        return [
+            {**read_schema.model_validate(row).model_dump(), "shard": shard, "tenant_id": row.tenant_id}
+            for row in rows
+        ]
+
+    results, errors = fan_out(page)
+    merged = heapq.merge(
+        *results.values(),
+        key=lambda item: (item["created_at"].replace(tzinfo=None) if item["created_at"] else datetime.min, item["id"]),
+        reverse=True,
+    )
+    items = [item for _, item in zip(range(window), merged)][offset:]
+    return {"items": items, "limit": limit, "offset": offset, "errors": errors}
+
+
+@router.get("/shards", response_model=list[ShardInfo])
+def list_shards():
+    """Configured shards with their pinned tenants and row counts."""
+    _require_shards()
+    counts, errors = fan_out(lambda db: [
+        db.scalar(select(func.count()).select_from(Candidate)),
+        db.scalar(select(func.count()).select_from(Assessment)),
+    ])
+    shards = []
+    for name in SHARD_NAMES:
+        candidates, assessments = counts.get(name, (None, None))
+        shards.append({
+            "name": name,
+            "tenants": sorted(t for t, shard in TENANT_SHARD_MAP.items() if shard == name),
+            "candidates": candidates,
+            "assessments": assessments,
+            "error": errors.get(name),
+        })
+    return shards
+
+
+@router.get("/shards/lookup")
+def lookup_tenant(tenant_id: str = Query(..., min_length=1, max_length=64)):
+    _require_shards()
+    return {"tenant_id": tenant_id, "shard": shard_for_tenant(tenant_id), "pinned": tenant_id in TENANT_SHARD_MAP}
+
+
+@router.get("/candidates", response_model=ShardedCandidatePage)
+def list_all_candidates(limit: int = Query(50, ge=1, le=500), offset: int = Query(0, ge=0, le=10000)):
+    """Newest candidates across every shard, each tagged with its shard."""
+    _require_shards()
+    return _newest_first(Candidate, CandidateRead, limit, offset)
+
+
+@router.get("/assessments", response_model=ShardedAssessmentPage)
+def list_all_assessments(limit: int = Query(50, ge=1, le=500), offset: int = Query(0, ge=0, le=10000)):
+    """Newest assessments across every shard, each tagged with its shard."""
+    _require_shards()
+    return _newest_first(Assessment, AssessmentRead, limit, offset)
+
+
+def _require_profiler(x_profile: Optional[str] = Header(None)) -> None:
+    """Profiling controls take the same signed token as the ``X-Profile`` header."""
+    if not settings.profile_secret:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profiling is not enabled")
+    if not profiling.verify_token(x_profile):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Missing or invalid X-Profile token")
+
+
+def _rule_out(rule: dict) -> dict:
+    return {**rule, "expires_at": datetime.fromtimestamp(rule["expires_at"], tz=timezone.utc)}
+
+
+@router.get("/profiling/rules", response_model=list[ProfilingRule], dependencies=[Depends(_require_profiler)])
+def list_profiling_rules():
+    return [_rule_out(rule) for rule in profiling.rules.active()]
+
+
+@router.post("/profiling/rules", response_model=list[ProfilingRule], dependencies=[Depends(_require_profiler)])
+def add_profiling_rule(payload: ProfilingRuleCreate):
+    """Profile ``rate`` of the requests to one route, in every worker, for ``duration_seconds``."""
+    rules = profiling.rules.upsert(payload.method.upper(), payload.route, payload.rate, payload.duration_seconds)
+    return [_rule_out(rule) for rule in rules]
+
+
+@router.delete("/profiling/rules", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(_require_profiler)])
+def clear_profiling_rules():
+    profiling.rules.replace([])
+
+
+@router.get("/profiling/profiles", response_model=list[ProfileSummary], dependencies=[Depends(_require_profiler)])
+def list_profiles(limit: int = Query(50, ge=1, le=500)):
+    return profiling.list_profiles(limit)
+
+
+@router.get("/profiling/profiles/{profile_id}", response_model=ProfileDetail, dependencies=[Depends(_require_profiler)])
+def get_profile(profile_id: str):
+    """Request summary with the SQL statements it issued."""
+    path = profiling.profile_path(profile_id, ".json")
+    if not path:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+@router.get("/profiling/profiles/{profile_id}/{fmt}", dependencies=[Depends(_require_profiler)])
+def download_profile(profile_id: str, fmt: str):
+    """``speedscope`` (JSON for speedscope.app) or ``folded`` (collapsed stacks for flamegraph.pl)."""
+    suffixes = {"speedscope": (".speedscope.json", "application/json"), "folded": (".folded", "text/plain")}
+    if fmt not in suffixes:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Format must be speedscope or folded")
+    suffix, media_type = suffixes[fmt]
+    path = profiling.profile_path(profile_id, suffix)
+    if not path:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return FileResponse(path, media_type=media_type, filename=profile_id + suffix)
+
+
+@router.get("/jobs", response_model=list[JobRead])
+def list_jobs(
+    status_filter: Optional[str] = Query(None, alias="status", pattern="^(queued|running|succeeded|dead)$"),
+    job_type: Optional[str] = Query(None, alias="type"),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+):
+    query = select(Job)
+    if status_filter:
+        query = query.where(Job.status == status_filter)
+    if job_type:
+        query = query.where(Job.type == job_type)
+    return db.scalars(query.order_by(Job.id.desc()).limit(limit)).all()
+
+
+@router.get("/jobs/summary")
+def job_summary(db: Session = Depends(get_db)):
+    """Job counts per type and status, with the oldest due queued job per type."""
+    summary: dict = {}
+    for job_type, job_status, count in db.execute(
+        select(Job.type, Job.status, func.count()).group_by(Job.type, Job.status)
+    ):
+        summary.setdefault(job_type, {})[job_status] = count
+    now = datetime.utcnow()
+    for job_type, oldest in db.execute(
+        select(Job.type, func.min(Job.run_at)).where(Job.status == "queued", Job.run_at <= now).group_by(Job.type)
+    ):
+        oldest = oldest.replace(tzinfo=None) if oldest else None
+        summary[job_type]["oldest_due_seconds"] = round((now - oldest).total_seconds(), 1) if oldest else None
+    return summary
+
+
+@router.post("/jobs/{job_id}/retry", response_model=JobRead)
+def retry_job(job_id: int, db: Session = Depends(get_db)):
+    """Re-queue a job that exhausted its attempts."""
+    job = db.get(Job, job_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    if job.status != "dead":
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Only dead jobs can be retried; this one is {job.status}")
+    jobs.retry(job)
+    db.commit()
+    db.refresh(job)
+    return job
@@ -1,55 +1,336 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from sqlalchemy.orm import Session
 
-from ..db import get_db
+from ..core.database import get_primary_db, get_tenant_db, is_primary, owned_by_tenant, tenant_of
 from ..models.assessment import Assessment
-from ..schemas import AssessmentCreate, AssessmentRead
+from ..models.candidate import Candidate
+from ..models.job import Job
+from ..models.similarity import SimilarityMatch
+from ..models.stats import AssessmentStats
+from ..schemas import (
+    AssessmentCreate,
+    AssessmentRead,
+    AssessmentStatsRead,
+    CandidatePercentile,
+    CodeRunRequest,
+    CodeRunResult,
+    DraftRead,
+    DraftSave,
+    JobRead,
+    LeaderboardEntry,
+    PRData,
+    PRImportRequest,
+    ScoreHistogram,
+    SimilarityMatchRead,
+)
+from ..services import jobs, stats
+from ..services.evaluation import criteria_fingerprint, evaluation_engine
+from ..services.drafts import DraftTooLarge, draft_store
+from ..services.pr_cache import PRSnapshotError, pr_snapshot_store
+from ..services.ranking import ranking_engine
+from ..services.response_cache import cached, coalesced, response_cache
+from ..services.sandbox import SUPPORTED_LANGUAGES, SandboxBusy, SandboxError, judge_stream, run_test_cases
+from ..services.similarity import similarity_index
 
 
 router = APIRouter()
 
+# Assessment rows are read by every candidate; writes below invalidate them. Lists differ per tenant.
+ASSESSMENT_CACHE_TTL = 60
+
 
 @router.post("/", response_model=AssessmentRead, status_code=status.HTTP_201_CREATED)
-def create_assessment(payload: AssessmentCreate, db: Session = Depends(get_db)):
-    assessment = Assessment(**payload.model_dump())
+def create_assessment(payload: AssessmentCreate, db: Session = Depends(get_tenant_db)):
+    assessment = Assessment(**payload.model_dump(), tenant_id=tenant_of(db))
     db.add(assessment)
     db.commit()
     db.refresh(assessment)
+    response_cache.invalidate("assessments")
     return assessment
 
 
 @router.get("/", response_model=list[AssessmentRead])
-def list_assessments(db: Session = Depends(get_db)):
-    return db.query(Assessment).order_by(Assessment.id.desc()).all()
+@cached(ttl=ASSESSMENT_CACHE_TTL, tags=("assessments",), vary_headers=("x-tenant-id",))
+def list_assessments(db: Session = Depends(get_tenant_db)):
+    query = db.query(Assessment)
+    if tenant_of(db) is not None:
+        query = query.filter(Assessment.tenant_id == tenant_of(db))
+    return query.order_by(Assessment.id.desc()).all()
+
+
+@router.get("/stats", response_model=list[AssessmentStatsRead])
+def list_assessment_stats(db: Session = Depends(get_primary_db)):
+    return [stats.serialize(row, "assessment_id", row.assessment_id) for row in db.query(AssessmentStats).all()]
+
+
+@router.post("/stats/reconcile", response_model=JobRead, status_code=status.HTTP_202_ACCEPTED)
+def reconcile_stats(db: Session = Depends(get_primary_db)):
+    """Queue a reconcile run; ``GET /api/admin/jobs?type=stats.reconcile`` shows the corrected counts."""
+    job_id = jobs.enqueue("stats.reconcile", unique_key="stats.reconcile", db=db)
+    db.commit()
+    return db.get(Job, job_id)
 
 
 @router.get("/{assessment_id}", response_model=AssessmentRead)
-def get_assessment(assessment_id: int, db: Session = Depends(get_db)):
+@cached(ttl=ASSESSMENT_CACHE_TTL, tags=("assessment:{assessment_id}",), vary_headers=("x-tenant-id",))
+def get_assessment(assessment_id: int, db: Session = Depends(get_tenant_db)):
     assessment = db.get(Assessment, assessment_id)
-    if not assessment:
+    if not owned_by_tenant(db, assessment):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Assessment not found")
     return assessment
 
 
 @router.put("/{assessment_id}", response_model=AssessmentRead)
-def update_assessment(assessment_id: int, payload: AssessmentCreate, db: Session = Depends(get_db)):
+def update_assessment(assessment_id: int, payload: AssessmentCreate, db: Session = Depends(get_tenant_db)):
     assessment = db.get(Assessment, assessment_id)
-    if not assessment:
+    if not owned_by_tenant(db, assessment):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Assessment not found")
+    previous_criteria = criteria_fingerprint(assessment.evaluation_criteria)
     for key, value in payload.model_dump().items():
         setattr(assessment, key, value)
     db.commit()
     db.refresh(assessment)
+    response_cache.invalidate("assessments", f"assessment:{assessment.id}")
+    # The evaluation pipeline runs against the primary database only
+    if is_primary(db) and criteria_fingerprint(assessment.evaluation_criteria) != previous_criteria:
+        evaluation_engine.schedule_rescore(assessment.id)
     return assessment
 
 
-@router.delete("/{assessment_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_assessment(assessment_id: int, db: Session = Depends(get_db)):
+@router.post("/{assessment_id}/rescore", status_code=status.HTTP_202_ACCEPTED)
+def rescore_assessment(
+    assessment_id: int,
+    force: bool = Query(False, description="Re-score submissions already scored with the current criteria"),
+    db: Session = Depends(get_primary_db),
+):
     assessment = db.get(Assessment, assessment_id)
     if not assessment:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Assessment not found")
+    evaluation_engine.schedule_rescore(assessment.id, force=force)
+    return {"detail": "Re-scoring scheduled", "criteria_fingerprint": criteria_fingerprint(assessment.evaluation_criteria)}
+
+
+@router.delete("/{assessment_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_assessment(assessment_id: int, db: Session = Depends(get_tenant_db)):
+    assessment = db.get(Assessment, assessment_id)
+    if not owned_by_tenant(db, assessment):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Assessment not found")
     db.delete(assessment)
     db.commit()
+    response_cache.invalidate("assessments", f"assessment:{assessment_id}")
     return None
 
 
+def _get_coding_assessment(assessment_id: int, payload: CodeRunRequest, db: Session) -> Assessment:
+    assessment = db.get(Assessment, assessment_id)
+    if not owned_by_tenant(db, assessment):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Assessment not found")
+    if assessment.assessment_type != "coding":
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Assessment is not a coding assessment")
+    if payload.language not in SUPPORTED_LANGUAGES:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unsupported language: {payload.language}")
+    return assessment
+
+
+@router.post("/{assessment_id}/run", response_model=CodeRunResult)
+def run_code(assessment_id: int, payload: CodeRunRequest, db: Session = Depends(get_tenant_db)):
+    """Run candidate code in the sandbox against the assessment's test cases."""
+    criteria = _get_coding_assessment(assessment_id, payload, db).evaluation_criteria
+    if payload.stdin is None and not (criteria or {}).get("test_cases"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Assessment has no test cases")
+    try:
+        result = run_test_cases(payload.code, criteria, stdin=payload.stdin)
+    except SandboxBusy as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    except (SandboxError, TimeoutError) as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Code runner failed: {e}")
+    return {"assessment_id": assessment_id, **result}
+
+
+@router.post("/{assessment_id}/judge")
+def judge_code(assessment_id: int, payload: CodeRunRequest, db: Session = Depends(get_tenant_db)):
+    """
+    Judge candidate code against every test case in one sandbox run.
+
+    Streams NDJSON: one ``case`` event per test case as it finishes, then a
+    ``summary`` event. Stops after the first failing case when the assessment's
+    evaluation criteria set ``stop_on_first_failure``.
+    """
+    criteria = _get_coding_assessment(assessment_id, payload, db).evaluation_criteria
+    if not (criteria or {}).get("test_cases"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Assessment has no test cases")
+    try:
+        events = judge_stream(payload.code, criteria)
+    except SandboxBusy as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+
+    def ndjson():
+        try:
+            for event in events:
+                yield json.dumps(event) + "\n"
+        except (SandboxError, TimeoutError) as e:
+            yield json.dumps({"type": "error", "detail": f"Code runner failed: {e}"}) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+def _get_pr_assessment(assessment_id: int, db: Session) -> Assessment:
+    assessment = db.get(Assessment, assessment_id)
+    if not owned_by_tenant(db, assessment):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Assessment not found")
+    if not assessment.github_repo_url or assessment.pr_number is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Assessment has no pull request")
+    return assessment
+
+
+@router.get("/{assessment_id}/pr", response_model=PRData)
+def get_assessment_pr(
+    assessment_id: int,
+    refresh: bool = Query(False, description="Re-resolve the PR head on GitHub"),
+    db: Session = Depends(get_tenant_db),
+):
+    assessment = _get_pr_assessment(assessment_id, db)
+    try:
+        return pr_snapshot_store.get_or_fetch(assessment.github_repo_url, assessment.pr_number, refresh=refresh)
+    except PRSnapshotError as e:
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(e))
+
+
+@router.get("/{assessment_id}/pr/diff", response_class=PlainTextResponse)
+def get_assessment_pr_diff(assessment_id: int, db: Session = Depends(get_tenant_db)):
+    assessment = _get_pr_assessment(assessment_id, db)
+    diff = pr_snapshot_store.load_diff(assessment.github_repo_url, assessment.pr_number)
+    if diff is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="PR snapshot not found")
+    # Stream straight from the mapped blob instead of copying it into one body
+    chunks = (bytes(diff[i:i + 65536]) for i in range(0, len(diff), 65536))
+    return StreamingResponse(chunks, media_type="text/x-diff")
+
+
+@router.post("/{assessment_id}/pr/import", response_model=PRData)
+def import_assessment_pr(assessment_id: int, payload: PRImportRequest, db: Session = Depends(get_tenant_db)):
+    assessment = _get_pr_assessment(assessment_id, db)
+    repo_url, pr_number = assessment.github_repo_url, assessment.pr_number
+    try:
+        if payload.source == "github":
+            pr_snapshot_store.fetch_github(repo_url, pr_number)
+        elif payload.source == "git":
+            if not (payload.path and payload.base and payload.head):
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="path, base and head are required")
+            pr_snapshot_store.import_git(repo_url, pr_number, payload.path, payload.base, payload.head, title=assessment.title)
+        elif payload.source == "fixture":
+            if not payload.path:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="path is required")
+            pr_snapshot_store.import_fixture(repo_url, pr_number, payload.path)
+        else:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unknown source")
+    except PRSnapshotError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return pr_snapshot_store.load_pr(repo_url, pr_number)
+
+
+@router.get("/{assessment_id}/stats", response_model=AssessmentStatsRead)
+def get_assessment_stats(assessment_id: int, db: Session = Depends(get_primary_db)):
+    if not db.get(Assessment, assessment_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Assessment not found")
+    return stats.serialize(db.get(AssessmentStats, assessment_id), "assessment_id", assessment_id)
+
+
+def _require_assessment(assessment_id: int, db: Session) -> None:
+    if not db.get(Assessment, assessment_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Assessment not found")
+
+
+@router.get("/{assessment_id}/leaderboard", response_model=list[LeaderboardEntry])
+@coalesced(timeout=30)
+def get_leaderboard(assessment_id: int, top: int = Query(10, ge=1, le=1000), db: Session = Depends(get_primary_db)):
+    _require_assessment(assessment_id, db)
+    return ranking_engine.get(assessment_id).top(top)
+
+
+@router.get("/{assessment_id}/percentiles/{candidate_id}", response_model=CandidatePercentile)
+def get_candidate_percentile(assessment_id: int, candidate_id: int, db: Session = Depends(get_primary_db)):
+    _require_assessment(assessment_id, db)
+    scores = ranking_engine.get(assessment_id)
+    score = scores.score_of(candidate_id)
+    return {
+        "assessment_id": assessment_id,
+        "candidate_id": candidate_id,
+        "score": score,
+        "percentile": round(scores.percentile(score), 2) if score is not None else None,
+        "rank": scores.rank(score) if score is not None else None,
+        "total": len(scores),
+    }
+
+
+@router.get("/{assessment_id}/histogram", response_model=ScoreHistogram)
+@coalesced(timeout=30)
+def get_score_histogram(assessment_id: int, bins: int = Query(10, ge=1, le=100), db: Session = Depends(get_primary_db)):
+    _require_assessment(assessment_id, db)
+    scores = ranking_engine.get(assessment_id)
+    return {"assessment_id": assessment_id, **scores.histogram(bins), **scores.summary()}
+
+
+@router.get("/{assessment_id}/similarity", response_model=list[SimilarityMatchRead])
+def list_similar_submissions(
+    assessment_id: int,
+    min_similarity: float = Query(0.0, ge=0.0, le=1.0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_primary_db),
+):
+    """Flagged near-duplicate submission pairs, most similar first."""
+    _require_assessment(assessment_id, db)
+    return (
+        db.query(SimilarityMatch)
+        .filter(SimilarityMatch.assessment_id == assessment_id, SimilarityMatch.similarity >= min_similarity)
+        .order_by(SimilarityMatch.similarity.desc(), SimilarityMatch.id)
+        .limit(limit)
+        .all()
+    )
+
+
+@router.post("/{assessment_id}/similarity/reindex", status_code=status.HTTP_202_ACCEPTED)
+def reindex_similarity(assessment_id: int, db: Session = Depends(get_primary_db)):
+    """Rebuild signatures and near-duplicate flags for every submission of this assessment."""
+    _require_assessment(assessment_id, db)
+    similarity_index.schedule_reindex(assessment_id)
+    return {"assessment_id": assessment_id, "status": "scheduled"}
+
+
+@router.put("/{assessment_id}/draft", response_model=DraftRead)
+def save_draft(
+    assessment_id: int,
+    payload: DraftSave,
+    candidate_id: int = Query(...),
+    db: Session = Depends(get_primary_db),
+):
+    """Autosave: kept in memory and written to the database in batches (last write wins)."""
+    if not draft_store.has(candidate_id, assessment_id):
+        _require_assessment(assessment_id, db)
+        if not db.get(Candidate, candidate_id):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Candidate not found")
+    try:
+        return draft_store.save(candidate_id, assessment_id, payload.content, payload.version).as_dict()
+    except DraftTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+
+
+@router.get("/{assessment_id}/draft", response_model=DraftRead)
+def get_draft(assessment_id: int, candidate_id: int = Query(...), db: Session = Depends(get_primary_db)):
+    draft = draft_store.get(candidate_id, assessment_id, db)
+    if draft is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Draft not found")
+    return draft
+
+
+@router.post("/{assessment_id}/draft/flush", response_model=DraftRead)
+def flush_draft(assessment_id: int, candidate_id: int = Query(...), db: Session = Depends(get_primary_db)):
+    """Persist this draft immediately, e.g. right before the candidate submits."""
+    draft_store.flush([(candidate_id, assessment_id)])
+    draft = draft_store.get(candidate_id, assessment_id, db)
+    if draft is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Draft not found")
+    return draft
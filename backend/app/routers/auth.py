@@ -3,7 +3,7 @@ from sqlalchemy.orm import Session
 from jose import JWTError
 
 from ..db import get_db
-from ..models.user import User
+from ..models.user import User, EmailVerificationToken
 from ..schemas import UserCreate, UserRead, LoginRequest, Token
 from ..core.security import (
     get_password_hash,
@@ -12,23 +12,48 @@ from ..core.security import (
     decode_access_token,
     is_password_pwned,
 )
-from fastapi import BackgroundTasks
+import hashlib
 import secrets
 from datetime import datetime, timedelta
 from sqlalchemy import String
 from sqlalchemy.orm import mapped_column
-import os
-from ..services.email import send_verification_email
+from ..core.config import settings
+from ..services import jobs
+from ..services.email import send_verification_email  # registers the "email.verification" job type
 
 
 router = APIRouter()
 
-# Simple in-memory verification token store for demo (use DB/Redis in prod)
-verification_tokens: dict[str, dict] = {}
+VERIFICATION_TOKEN_HOURS = 12
+
+
+def _token_hash(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _create_verify_link(db: Session, user: User) -> str:
+    # Kept in the database so any worker process can redeem it; only the hash is stored
+    token = secrets.token_urlsafe(32)
+    db.add(EmailVerificationToken(
+        token_hash=_token_hash(token),
+        user_id=user.id,
+        expires_at=datetime.utcnow() + timedelta(hours=VERIFICATION_TOKEN_HOURS),
+    ))
+    return f"{settings.app_base_url}/api/auth/verify?token={token}"
+
+
+def _queue_verification_email(db: Session, to_email: str, verify_link: str) -> None:
+    # Sent by the job workers, off the request path and retried on failure
+    jobs.enqueue(
+        "email.verification",
+        {"to_email": to_email, "verify_link": verify_link},
+        unique_key=f"email.verification:{to_email}",
+        db=db,
+    )
 
 
 @router.post("/signup", response_model=UserRead)
-def signup(payload: UserCreate, background: BackgroundTasks, db: Session = Depends(get_db)):
+def signup(payload: UserCreate, db: Session = Depends(get_db)):
     existing = db.query(User).filter(User.email == payload.email).first()
     if existing:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
@@ -42,15 +67,13 @@ def signup(payload: UserCreate, background: BackgroundTasks, db: Session = Depen
         hashed_password=get_password_hash(payload.password),
     )
     db.add(user)
+    db.flush()
+
+    # create verify token; the token and the email job are committed together with the user
+    verify_link = _create_verify_link(db, user)
+    _queue_verification_email(db, user.email, verify_link)
     db.commit()
     db.refresh(user)
-
-    # create verify token and send email
-    token = secrets.token_urlsafe(32)
-    verification_tokens[token] = {"user_id": user.id, "exp": datetime.utcnow() + timedelta(hours=12)}
-    app_base = os.getenv('APP_BASE_URL', 'http://localhost:8001')
-    verify_link = f"{app_base}/api/auth/verify?token={token}"
-    background.add_task(send_verification_email, user.email, verify_link)
     print(f"[VERIFY_LINK] {verify_link}")
 
     return user
@@ -84,33 +107,36 @@ def me(authorization: str | None = None, db: Session = Depends(get_db)):
 
 @router.get("/verify")
 def verify_account(token: str, db: Session = Depends(get_db)):
-    data = verification_tokens.get(token)
-    if not data:
+    record = db.get(EmailVerificationToken, _token_hash(token))
+    if not record:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid token")
-    if data["exp"] < datetime.utcnow():
-        verification_tokens.pop(token, None)
+    if record.expires_at.replace(tzinfo=None) < datetime.utcnow():
+        db.delete(record)
+        db.commit()
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Token expired")
-    user = db.get(User, data["user_id"])
+    user = db.get(User, record.user_id)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     user.is_verified = True
+    db.query(EmailVerificationToken).filter(EmailVerificationToken.user_id == user.id).delete()
     db.commit()
-    verification_tokens.pop(token, None)
     return {"detail": "Account verified successfully"}
 
 
 @router.post("/resend-verification")
-def resend_verification(email: str, background: BackgroundTasks, db: Session = Depends(get_db)):
+def resend_verification(email: str, db: Session = Depends(get_db)):
     user = db.query(User).filter(User.email == email).first()
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     if user.is_verified:
         return {"detail": "Account already verified"}
-    token = secrets.token_urlsafe(32)
-    verification_tokens[token] = {"user_id": user.id, "exp": datetime.utcnow() + timedelta(hours=12)}
-    app_base = os.getenv('APP_BASE_URL', 'http://localhost:8001')
-    verify_link = f"{app_base}/api/auth/verify?token={token}"
-    background.add_task(send_verification_email, user.email, verify_link)
+    db.query(EmailVerificationToken).filter(
+        EmailVerificationToken.user_id == user.id,
+        EmailVerificationToken.expires_at < datetime.utcnow(),
+    ).delete()
+    verify_link = _create_verify_link(db, user)
+    _queue_verification_email(db, user.email, verify_link)
+    db.commit()
     return {"detail": "Verification email sent"}
 
 
@@ -1,43 +1,74 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
 from sqlalchemy.orm import Session
 
-from ..db import get_db
+from ..core.database import get_primary_db, get_tenant_db, owned_by_tenant, tenant_of
 from ..models.candidate import Candidate
-from ..schemas import CandidateCreate, CandidateRead
+from ..models.stats import CandidateStats
+from ..schemas import CandidateCreate, CandidateImportReport, CandidateRead, CandidateSearchPage, CandidateStatsRead
+from ..services import stats
+from ..services.archive import archived_emails, find_candidate
+from ..services.candidate_import import CandidateImporter, detect_format
+from ..services.candidate_search import search_candidates
 
 
 router = APIRouter()
 
 
 @router.post("/", response_model=CandidateRead, status_code=status.HTTP_201_CREATED)
-def create_candidate(payload: CandidateCreate, db: Session = Depends(get_db)):
+def create_candidate(payload: CandidateCreate, db: Session = Depends(get_tenant_db)):
     existing = db.query(Candidate).filter(Candidate.email == payload.email).first()
-    if existing:
+    if existing or archived_emails(db, [payload.email]):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already exists")
-    candidate = Candidate(**payload.model_dump())
+    candidate = Candidate(**payload.model_dump(), tenant_id=tenant_of(db))
     db.add(candidate)
     db.commit()
     db.refresh(candidate)
     return candidate
 
 
+@router.post("/import", response_model=CandidateImportReport)
+def import_candidates(
+    file: UploadFile = File(..., description="CSV with first_name,last_name,email columns or NDJSON"),
+    format: str | None = Query(None, pattern="^(csv|ndjson)$", description="Defaults to the file extension"),
+    db: Session = Depends(get_tenant_db),
+):
+    """Bulk-create candidates, skipping emails that already exist."""
+    fmt = detect_format(file.filename, format)
+    return CandidateImporter(db.get_bind(), tenant_id=tenant_of(db)).run(file.file, fmt).as_dict()
+
+
 @router.get("/", response_model=list[CandidateRead])
-def list_candidates(db: Session = Depends(get_db)):
-    return db.query(Candidate).order_by(Candidate.id.desc()).all()
+def list_candidates(db: Session = Depends(get_tenant_db)):
+    query = db.query(Candidate)
+    if tenant_of(db) is not None:
+        query = query.filter(Candidate.tenant_id == tenant_of(db))
+    return query.order_by(Candidate.id.desc()).all()
+
+
+@router.get("/search", response_model=CandidateSearchPage)
+def search(
+    q: str = Query(..., min_length=1, max_length=200, description="Partial name or email"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_tenant_db),
+):
+    """Ranked, paginated candidate search backed by trigram/FTS indexes."""
+    rows = search_candidates(db, q, limit=limit + 1, offset=offset, tenant_id=tenant_of(db))
+    return {"items": rows[:limit], "limit": limit, "offset": offset, "has_more": len(rows) > limit}
 
 
 @router.get("/{candidate_id}", response_model=CandidateRead)
-def get_candidate(candidate_id: int, db: Session = Depends(get_db)):
-    candidate = db.get(Candidate, candidate_id)
-    if not candidate:
+def get_candidate(candidate_id: int, db: Session = Depends(get_tenant_db)):
+    candidate = find_candidate(db, candidate_id)
+    if not owned_by_tenant(db, candidate):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Candidate not found")
     return candidate
 
 
 @router.put("/{candidate_id}", response_model=CandidateRead)
-def update_candidate(candidate_id: int, payload: CandidateCreate, db: Session = Depends(get_db)):
+def update_candidate(candidate_id: int, payload: CandidateCreate, db: Session = Depends(get_tenant_db)):
     candidate = db.get(Candidate, candidate_id)
-    if not candidate:
+    if not owned_by_tenant(db, candidate):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Candidate not found")
     for key, value in payload.model_dump().items():
         setattr(candidate, key, value)
@@ -47,12 +78,17 @@ def update_candidate(candidate_id: int, payload: CandidateCreate, db: Session =
 
 
 @router.delete("/{candidate_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_candidate(candidate_id: int, db: Session = Depends(get_db)):
+def delete_candidate(candidate_id: int, db: Session = Depends(get_tenant_db)):
     candidate = db.get(Candidate, candidate_id)
-    if not candidate:
+    if not owned_by_tenant(db, candidate):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Candidate not found")
     db.delete(candidate)
     db.commit()
     return None
 
 
+@router.get("/{candidate_id}/stats", response_model=CandidateStatsRead)
+def get_candidate_stats(candidate_id: int, db: Session = Depends(get_primary_db)):
+    if not db.get(Candidate, candidate_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Candidate not found")
+    return stats.serialize(db.get(CandidateStats, candidate_id), "candidate_id", candidate_id)
@@ -6,11 +6,16 @@ from datetime import datetime
 from ..core.database import get_content_db
 from ..models.content import Content, Page, Section
 from ..schemas import ContentCreate, ContentRead, ContentUpdate
+from ..services.response_cache import cached, response_cache
 
 router = APIRouter()
 
+# Content only changes through the write endpoints below (which invalidate it) and the migration script
+CONTENT_CACHE_TTL = 300
+
 
 @router.get("/", response_model=List[ContentRead])
+@cached(ttl=CONTENT_CACHE_TTL, tags=("content",))
 def get_content(
     category: Optional[str] = Query(None, description="Filter by category"),
     language: str = Query("en", description="Language code"),
@@ -31,6 +36,7 @@ def get_content(
 
 # Page endpoints (must come before /{key} to avoid conflicts)
 @router.get("/pages", response_model=List[dict])
+@cached(ttl=CONTENT_CACHE_TTL, tags=("pages",))
 def get_pages(
     language: str = Query("en"),
     is_published: bool = Query(True),
@@ -91,6 +97,7 @@ def get_pages(
 
 
 @router.get("/pages/{slug}", response_model=dict)
+@cached(ttl=CONTENT_CACHE_TTL, tags=("pages",))
 def get_page_by_slug(
     slug: str,
     language: str = Query("en"),
@@ -148,6 +155,7 @@ def get_page_by_slug(
 
 
 @router.get("/pages/{page_id}/sections", response_model=List[dict])
+@cached(ttl=CONTENT_CACHE_TTL, tags=("pages",))
 def get_page_sections(
     page_id: int,
     db: Session = Depends(get_content_db)
@@ -178,6 +186,7 @@ def get_page_sections(
 
 
 @router.get("/pages/{page_id}/sections/{section_key}", response_model=dict)
+@cached(ttl=CONTENT_CACHE_TTL, tags=("pages",))
 def get_page_section(
     page_id: int,
     section_key: str,
@@ -208,6 +217,7 @@ def get_page_section(
 
 
 @router.get("/{key}", response_model=ContentRead)
+@cached(ttl=CONTENT_CACHE_TTL, tags=("content",))
 def get_content_by_key(key: str, language: str = Query("en"), db: Session = Depends(get_content_db)):
     """Get content by key"""
     content = db.query(Content).filter(
@@ -238,6 +248,7 @@ def create_content(content: ContentCreate, db: Session = Depends(get_content_db)
     db.add(db_content)
     db.commit()
     db.refresh(db_content)
+    response_cache.invalidate("content")
     
     return db_content
 
@@ -265,6 +276,7 @@ def update_content(
     content.updated_at = datetime.utcnow()
     db.commit()
     db.refresh(content)
+    response_cache.invalidate("content")
     
     return content
 
@@ -282,11 +294,13 @@ def delete_content(key: str, language: str = Query("en"), db: Session = Depends(
     
     db.delete(content)
     db.commit()
+    response_cache.invalidate("content")
     
     return {"message": "Content deleted successfully"}
 
 
 @router.get("/category/{category}", response_model=List[ContentRead])
+@cached(ttl=CONTENT_CACHE_TTL, tags=("content",))
 def get_content_by_category(
     category: str,
     language: str = Query("en"),
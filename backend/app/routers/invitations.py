@@ -0,0 +1,74 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from ..core.database import require_primary
+from ..db import get_db
+from ..models.assessment import Assessment
+from ..models.invitation import AssessmentInvitation, InvitationCampaign
+from ..schemas import InvitationCampaignCreate, InvitationCampaignRead, InvitationRead
+from ..services.invitations import InvitationError, accept_invitation, create_campaign
+
+
+# Campaigns target primary-database assessments and candidates only
+router = APIRouter(dependencies=[Depends(require_primary)])
+
+
+@router.post("/campaigns", response_model=InvitationCampaignRead, status_code=status.HTTP_201_CREATED)
+def create_invitation_campaign(payload: InvitationCampaignCreate, db: Session = Depends(get_db)):
+    """Assign an assessment to a list or filter of candidates; emails are sent in the background."""
+    if not db.get(Assessment, payload.assessment_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Assessment not found")
+    if payload.candidate_ids is None and payload.candidate_filter is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="candidate_ids or candidate_filter is required")
+    campaign = create_campaign(
+        db,
+        payload.assessment_id,
+        name=payload.name,
+        candidate_ids=payload.candidate_ids,
+        candidate_filter=payload.candidate_filter.model_dump(mode="json", exclude_none=True) if payload.candidate_filter else None,
+        expires_in_hours=payload.expires_in_hours,
+    )
+    return campaign
+
+
+@router.get("/campaigns", response_model=list[InvitationCampaignRead])
+def list_invitation_campaigns(assessment_id: int | None = None, db: Session = Depends(get_db)):
+    query = db.query(InvitationCampaign)
+    if assessment_id is not None:
+        query = query.filter(InvitationCampaign.assessment_id == assessment_id)
+    return query.order_by(InvitationCampaign.id.desc()).all()
+
+
+@router.get("/campaigns/{campaign_id}", response_model=InvitationCampaignRead)
+def get_invitation_campaign(campaign_id: int, db: Session = Depends(get_db)):
+    """Campaign progress: ``sent`` and ``failed`` advance as batches are delivered."""
+    campaign = db.get(InvitationCampaign, campaign_id)
+    if not campaign:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Campaign not found")
+    return campaign
+
+
+@router.get("/campaigns/{campaign_id}/invitations", response_model=list[InvitationRead])
+def list_campaign_invitations(
+    campaign_id: int,
+    status_filter: str | None = Query(None, alias="status"),
+    after_id: int = Query(0, ge=0, description="Keyset cursor: last invitation id of the previous page"),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+):
+    if not db.get(InvitationCampaign, campaign_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Campaign not found")
+    query = db.query(AssessmentInvitation).filter(
+        AssessmentInvitation.campaign_id == campaign_id, AssessmentInvitation.id > after_id
+    )
+    if status_filter:
+        query = query.filter(AssessmentInvitation.status == status_filter)
+    return query.order_by(AssessmentInvitation.id).limit(limit).all()
+
+
+@router.get("/accept", response_model=InvitationRead)
+def accept(token: str, db: Session = Depends(get_db)):
+    try:
+        return accept_invitation(db, token)
+    except InvitationError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
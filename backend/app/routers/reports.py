@@ -0,0 +1,83 @@
+import os
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..core.database import require_primary
+from ..db import get_db
+from ..models.assessment import Assessment
+from ..models.job import Job
+from ..schemas import JobRead
+from ..services import jobs
+from ..services.reports import FORMATS, stream_results_report
+
+
+# Submissions and everything derived from them live on the primary database only
+router = APIRouter(dependencies=[Depends(require_primary)])
+
+
+@router.get("/results")
+def export_results(
+    format: str = Query("csv", pattern="^(csv|ndjson|xlsx)$"),
+    assessment_id: int | None = None,
+    evaluated_only: bool = False,
+    submitted_after: datetime | None = None,
+    db: Session = Depends(get_db),
+):
+    """Stream submission results joined with candidates and assessments."""
+    if assessment_id is not None and not db.get(Assessment, assessment_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Assessment not found")
+    media_type, extension = FORMATS[format]
+    filename = f"results-{assessment_id or 'all'}-{datetime.utcnow():%Y%m%d%H%M%S}.{extension}"
+    # The stream opens its own connection; the request session is closed before the body is sent
+    body = stream_results_report(
+        format, assessment_id=assessment_id, evaluated_only=evaluated_only, submitted_after=submitted_after
+    )
+    return StreamingResponse(body, media_type=media_type, headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+
+@router.post("/results/jobs", response_model=JobRead, status_code=status.HTTP_202_ACCEPTED)
+def queue_results_export(
+    format: str = Query("csv", pattern="^(csv|ndjson|xlsx)$"),
+    assessment_id: int | None = None,
+    evaluated_only: bool = False,
+    submitted_after: datetime | None = None,
+    db: Session = Depends(get_db),
+):
+    """Write the export in the job workers; poll the job and download the file when it has succeeded."""
+    if assessment_id is not None and not db.get(Assessment, assessment_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Assessment not found")
+    job_id = jobs.enqueue("reports.results", {
+        "format": format,
+        "assessment_id": assessment_id,
+        "evaluated_only": evaluated_only,
+        "submitted_after": submitted_after.isoformat() if submitted_after else None,
+    }, db=db)
+    db.commit()
+    return db.get(Job, job_id)
+
+
+def _report_job(db: Session, job_id: int) -> Job:
+    job = db.get(Job, job_id)
+    if not job or job.type != "reports.results":
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Report job not found")
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=JobRead)
+def get_report_job(job_id: int, db: Session = Depends(get_db)):
+    return _report_job(db, job_id)
+
+
+@router.get("/jobs/{job_id}/download")
+def download_report(job_id: int, db: Session = Depends(get_db)):
+    job = _report_job(db, job_id)
+    if job.status != "succeeded":
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Report is {job.status}")
+    path = os.path.join(settings.report_dir, job.result["file"])
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail="Report file has expired")
+    return FileResponse(path, media_type=job.result["media_type"], filename=job.result["filename"])
@@ -0,0 +1,140 @@
+import asyncio
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..core.database import require_primary
+from ..db import get_db
+from ..models.archive import SubmissionArchive
+from ..models.assessment import Assessment
+from ..models.similarity import SimilarityMatch
+from ..models.submission import CodeReviewSubmission
+from ..schemas import CodeReviewSubmissionCreate, CodeReviewSubmissionRead, CommentAnchor, SimilarityMatchRead
+from ..services.archive import find_submission
+from ..services.evaluation import evaluation_engine
+from ..services.pr_cache import pr_snapshot_store
+from ..services.submission_buffer import BufferFullError, IdempotencyConflict, SubmissionRejected, submission_buffer
+
+
+# Submissions and everything derived from them live on the primary database only
+router = APIRouter(dependencies=[Depends(require_primary)])
+
+
+@router.post("/", response_model=CodeReviewSubmissionRead, status_code=status.HTTP_201_CREATED)
+async def create_submission(
+    payload: CodeReviewSubmissionCreate,
+    candidate_id: int = Query(..., description="Submitting candidate"),
+    idempotency_key: str | None = Header(
+        None, max_length=100, description="Client-chosen id; retries with the same key return the stored submission"
+    ),
+):
+    # Submissions are written by the write-behind buffer; the response is only
+    # sent once the batch containing this submission has been committed.
+    try:
+        future = submission_buffer.enqueue(
+            assessment_id=payload.assessment_id,
+            candidate_id=candidate_id,
+            comments=payload.comments,
+            overall_feedback=payload.overall_feedback,
+            idempotency_key=idempotency_key,
+        )
+    except BufferFullError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many submissions in flight, please retry",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        return await asyncio.wait_for(
+            asyncio.shield(asyncio.wrap_future(future)),
+            timeout=settings.submission_ack_timeout_seconds,
+        )
+    except SubmissionRejected as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="Submission was not acknowledged in time")
+
+
+@router.get("/", response_model=list[CodeReviewSubmissionRead])
+def list_submissions(
+    assessment_id: int | None = Query(None),
+    candidate_id: int | None = Query(None),
+    include_archived: bool = Query(False, description="Also return submissions moved to the archive"),
+    db: Session = Depends(get_db),
+):
+    models = (CodeReviewSubmission, SubmissionArchive) if include_archived else (CodeReviewSubmission,)
+    results = []
+    for model in models:
+        query = db.query(model)
+        if assessment_id is not None:
+            query = query.filter(model.assessment_id == assessment_id)
+        if candidate_id is not None:
+            query = query.filter(model.candidate_id == candidate_id)
+        results.extend(query.order_by(model.id.desc()).all())
+    if include_archived:
+        results.sort(key=lambda s: s.id, reverse=True)
+    return results
+
+
+@router.get("/{submission_id}", response_model=CodeReviewSubmissionRead)
+def get_submission(submission_id: int, db: Session = Depends(get_db)):
+    submission = find_submission(db, submission_id)
+    if not submission:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Submission not found")
+    return submission
+
+
+@router.post("/{submission_id}/evaluate", response_model=CodeReviewSubmissionRead)
+def evaluate_submission(submission_id: int, db: Session = Depends(get_db)):
+    submission = db.get(CodeReviewSubmission, submission_id)
+    if not submission:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Submission not found")
+    return evaluation_engine.evaluate_submission(db, submission)
+
+
+@router.get("/{submission_id}/similar", response_model=list[SimilarityMatchRead])
+def get_similar_submissions(submission_id: int, db: Session = Depends(get_db)):
+    """Near-duplicates of this submission flagged by the similarity index."""
+    if not db.get(CodeReviewSubmission, submission_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Submission not found")
+    return (
+        db.query(SimilarityMatch)
+        .filter(or_(SimilarityMatch.submission_id == submission_id, SimilarityMatch.other_submission_id == submission_id))
+        .order_by(SimilarityMatch.similarity.desc())
+        .all()
+    )
+
+
+@router.get("/{submission_id}/anchors", response_model=list[CommentAnchor])
+def get_submission_anchors(submission_id: int, db: Session = Depends(get_db)):
+    """Map each review comment to its hunk and diff position in the assessment's PR."""
+    submission = db.get(CodeReviewSubmission, submission_id)
+    if not submission:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Submission not found")
+    assessment = db.get(Assessment, submission.assessment_id)
+    index = None
+    if assessment and assessment.github_repo_url and assessment.pr_number is not None:
+        index = pr_snapshot_store.diff_index(assessment.github_repo_url, assessment.pr_number)
+    if index is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="PR snapshot not found")
+    anchors = []
+    for key in submission.comments:
+        anchor = index.anchor_comment_key(key)
+        if anchor is None:
+            anchors.append(CommentAnchor(key=key, anchored=False))
+        else:
+            anchors.append(CommentAnchor(
+                key=key,
+                filename=anchor.filename,
+                line=anchor.line,
+                side=anchor.side,
+                hunk=anchor.hunk,
+                position=anchor.position,
+                kind=anchor.kind,
+                anchored=True,
+            ))
+    return anchors
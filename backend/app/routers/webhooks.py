@@ -0,0 +1,102 @@
+import secrets
+import uuid
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from ..db import get_db
+from ..models.webhook import WebhookDelivery, WebhookEndpoint
+from ..schemas import WebhookDeliveryRead, WebhookEndpointCreate, WebhookEndpointCreated, WebhookEndpointRead
+from ..services.webhooks import EVENT_TYPES, WebhookTargetError, check_target, webhook_dispatcher
+
+
+router = APIRouter()
+
+
+def _get_endpoint(endpoint_id: int, db: Session) -> WebhookEndpoint:
+    endpoint = db.get(WebhookEndpoint, endpoint_id)
+    if not endpoint:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Webhook endpoint not found")
+    return endpoint
+
+
+@router.post("/", response_model=WebhookEndpointCreated, status_code=status.HTTP_201_CREATED)
+def create_endpoint(payload: WebhookEndpointCreate, db: Session = Depends(get_db)):
+    """Register an endpoint. The signing secret is only returned here."""
+    try:
+        check_target(payload.url)
+    except WebhookTargetError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    unknown = set(payload.event_types or ()) - set(EVENT_TYPES)
+    if unknown:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown event types: {sorted(unknown)}")
+    endpoint = WebhookEndpoint(
+        url=payload.url,
+        event_types=payload.event_types,
+        secret=payload.secret or secrets.token_urlsafe(32),
+        is_active=True,
+    )
+    db.add(endpoint)
+    db.commit()
+    db.refresh(endpoint)
+    return endpoint
+
+
+@router.get("/", response_model=list[WebhookEndpointRead])
+def list_endpoints(db: Session = Depends(get_db)):
+    return db.query(WebhookEndpoint).order_by(WebhookEndpoint.id).all()
+
+
+@router.delete("/{endpoint_id}", status_code=status.HTTP_204_NO_CONTENT)
+def disable_endpoint(endpoint_id: int, db: Session = Depends(get_db)):
+    """Stop delivering to this endpoint; its delivery history is kept."""
+    _get_endpoint(endpoint_id, db).is_active = False
+    db.commit()
+    return None
+
+
+@router.post("/{endpoint_id}/test", status_code=status.HTTP_202_ACCEPTED)
+def send_test_event(endpoint_id: int, db: Session = Depends(get_db)):
+    endpoint = _get_endpoint(endpoint_id, db)
+    if not endpoint.is_active:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Webhook endpoint is disabled")
+    db.add(WebhookDelivery(
+        endpoint_id=endpoint.id,
+        event_id=str(uuid.uuid4()),
+        event_type="webhook.test",
+        payload={"message": "Webhook test from Laksham"},
+        status="pending",
+        attempts=0,
+        next_attempt_at=datetime.utcnow(),
+    ))
+    db.commit()
+    webhook_dispatcher.notify()
+    return {"detail": "Test event queued"}
+
+
+@router.get("/{endpoint_id}/deliveries", response_model=list[WebhookDeliveryRead])
+def list_deliveries(
+    endpoint_id: int,
+    status_filter: str | None = Query(None, alias="status"),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+):
+    _get_endpoint(endpoint_id, db)
+    query = db.query(WebhookDelivery).filter(WebhookDelivery.endpoint_id == endpoint_id)
+    if status_filter:
+        query = query.filter(WebhookDelivery.status == status_filter)
+    return query.order_by(WebhookDelivery.id.desc()).limit(limit).all()
+
+
+@router.post("/deliveries/{delivery_id}/retry", response_model=WebhookDeliveryRead)
+def retry_delivery(delivery_id: int, db: Session = Depends(get_db)):
+    """Re-queue a delivery that exhausted its attempts."""
+    delivery = db.get(WebhookDelivery, delivery_id)
+    if not delivery:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Delivery not found")
+    delivery.status, delivery.attempts, delivery.next_attempt_at = "pending", 0, datetime.utcnow()
+    db.commit()
+    db.refresh(delivery)
+    webhook_dispatcher.notify()
+    return delivery
@@ -92,6 +92,63 @@ class CodeReviewSubmissionRead(CodeReviewSubmissionBase):
         from_attributes = True
 
 
+# Draft autosave schemas
+class DraftSave(BaseModel):
+    content: Dict[str, Any] = Field(..., description="Editor state, e.g. {\"code\": ..., \"language\": ...}")
+    version: int = Field(..., ge=0, le=2**63 - 1, description="Client-side counter, increased with every save; the highest version wins")
+
+
+class DraftRead(BaseModel):
+    candidate_id: int
+    assessment_id: int
+    content: Dict[str, Any]
+    version: int
+    updated_at: datetime
+
+
+# Stats schemas
+class StatsBase(BaseModel):
+    assigned: int
+    in_progress: int
+    submitted: int
+    evaluated: int
+    average_score: Optional[float] = None
+    updated_at: Optional[datetime] = None
+
+
+class AssessmentStatsRead(StatsBase):
+    assessment_id: int
+
+
+class CandidateStatsRead(StatsBase):
+    candidate_id: int
+
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    candidate_id: int
+    score: float
+
+
+class CandidatePercentile(BaseModel):
+    assessment_id: int
+    candidate_id: int
+    score: Optional[float] = None
+    percentile: Optional[float] = None
+    rank: Optional[int] = None
+    total: int
+
+
+class ScoreHistogram(BaseModel):
+    assessment_id: int
+    edges: List[float]
+    counts: List[int]
+    count: int
+    mean: Optional[float] = None
+    median: Optional[float] = None
+    p90: Optional[float] = None
+
+
 # PR Data schemas
 class PRFile(BaseModel):
     filename: str
@@ -112,6 +169,154 @@ class PRData(BaseModel):
     diff_url: str
 
 
+class SimilarityMatchRead(BaseModel):
+    id: int
+    assessment_id: int
+    submission_id: int
+    other_submission_id: int
+    candidate_id: int
+    other_candidate_id: int
+    similarity: float
+    detected_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class CommentAnchor(BaseModel):
+    key: str
+    filename: Optional[str] = None
+    line: Optional[int] = None
+    side: Optional[str] = None
+    hunk: Optional[int] = None
+    position: Optional[int] = None
+    kind: Optional[str] = None
+    anchored: bool
+
+
+# Invitation schemas
+class CandidateFilter(BaseModel):
+    email_domain: Optional[str] = Field(None, description="Only candidates whose email is at this domain")
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+
+
+class InvitationCampaignCreate(BaseModel):
+    assessment_id: int
+    name: Optional[str] = None
+    candidate_ids: Optional[List[int]] = Field(None, description="Explicit candidates to invite")
+    candidate_filter: Optional[CandidateFilter] = Field(None, description="Invite every candidate matching this filter")
+    expires_in_hours: int = Field(default=168, ge=1, le=24 * 90)
+
+
+class InvitationCampaignRead(BaseModel):
+    id: int
+    assessment_id: int
+    name: Optional[str] = None
+    status: str
+    total: int
+    created: int
+    skipped: int
+    sent: int
+    failed: int
+    error: Optional[str] = None
+    expires_at: datetime
+    created_at: datetime
+    completed_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class InvitationRead(BaseModel):
+    id: int
+    campaign_id: int
+    assessment_id: int
+    candidate_id: int
+    status: str
+    created_at: datetime
+    expires_at: datetime
+    sent_at: Optional[datetime] = None
+    accepted_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+# Webhook schemas
+class WebhookEndpointCreate(BaseModel):
+    url: str = Field(..., max_length=1000)
+    event_types: Optional[List[str]] = Field(None, description="Event types to receive; omit for all")
+    secret: Optional[str] = Field(None, min_length=16, max_length=128, description="Generated when omitted")
+
+
+class WebhookEndpointRead(BaseModel):
+    id: int
+    url: str
+    event_types: Optional[List[str]] = None
+    is_active: bool
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class WebhookEndpointCreated(WebhookEndpointRead):
+    secret: str
+
+
+class WebhookDeliveryRead(BaseModel):
+    id: int
+    endpoint_id: int
+    event_id: str
+    event_type: str
+    payload: Dict[str, Any]
+    status: str
+    attempts: int
+    next_attempt_at: datetime
+    last_error: Optional[str] = None
+    created_at: datetime
+    delivered_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+# Code execution schemas
+class CodeRunRequest(BaseModel):
+    code: str = Field(..., max_length=100_000)
+    language: str = Field(default="python", description="Only 'python' is supported")
+    stdin: Optional[str] = Field(None, description="Run once against this input instead of the test cases")
+
+
+class CodeTestCaseResult(BaseModel):
+    index: int
+    hidden: bool = False
+    status: str
+    time_ms: float
+    cpu_ms: float
+    memory_kb: int
+    exit_code: Optional[int] = None
+    stdout: Optional[str] = None
+    stderr: Optional[str] = None
+    expected_output: Optional[str] = None
+
+
+class CodeRunResult(BaseModel):
+    assessment_id: int
+    status: str
+    passed: int
+    total: int
+    cases: List[CodeTestCaseResult]
+
+
+class PRImportRequest(BaseModel):
+    source: str = Field(..., description="Where to import from: 'github', 'git' or 'fixture'")
+    path: Optional[str] = Field(None, description="Git checkout or fixture directory, relative to PR_IMPORT_ROOT")
+    base: Optional[str] = Field(None, description="Base revision (git imports)")
+    head: Optional[str] = Field(None, description="Head revision (git imports)")
+
+
 # Candidate schemas
 class CandidateBase(BaseModel):
     first_name: str
@@ -131,6 +336,113 @@ class CandidateRead(CandidateBase):
         from_attributes = True
 
 
+class CandidateSearchHit(CandidateRead):
+    score: float
+
+
+class CandidateSearchPage(BaseModel):
+    items: List[CandidateSearchHit]
+    limit: int
+    offset: int
+    has_more: bool
+
+
+class ShardedCandidateRead(CandidateRead):
+    shard: str
+    tenant_id: Optional[str] = None
+
+
+class ShardedCandidatePage(BaseModel):
+    items: List[ShardedCandidateRead]
+    limit: int
+    offset: int
+    errors: Dict[str, str] = {}
+
+
+class ShardedAssessmentRead(AssessmentRead):
+    shard: str
+    tenant_id: Optional[str] = None
+
+
+class ShardedAssessmentPage(BaseModel):
+    items: List[ShardedAssessmentRead]
+    limit: int
+    offset: int
+    errors: Dict[str, str] = {}
+
+
+class ShardInfo(BaseModel):
+    name: str
+    tenants: List[str]
+    candidates: Optional[int] = None
+    assessments: Optional[int] = None
+    error: Optional[str] = None
+
+
+class ProfilingRuleCreate(BaseModel):
+    method: str = "GET"
+    route: str = Field(min_length=1, description="Route template, e.g. /api/candidates/{candidate_id}")
+    rate: float = Field(gt=0, le=1, description="Fraction of matching requests to profile")
+    duration_seconds: int = Field(600, ge=1, le=86400)
+
+
+class ProfilingRule(BaseModel):
+    method: str
+    route: str
+    rate: float
+    expires_at: datetime
+
+
+class ProfileSummary(BaseModel):
+    id: str
+    method: str
+    path: str
+    route: Optional[str] = None
+    status_code: Optional[int] = None
+    trigger: str
+    started_at: datetime
+    duration_ms: float
+    samples: int
+    sql_count: int
+    sql_ms: float
+
+
+class ProfileDetail(ProfileSummary):
+    sql: List[Dict[str, Any]] = []
+
+
+class JobRead(BaseModel):
+    id: int
+    type: str
+    status: str
+    priority: int
+    attempts: int
+    max_attempts: int
+    run_at: datetime
+    last_error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class CandidateImportError(BaseModel):
+    row: int
+    email: Optional[str] = None
+    error: str
+
+
+class CandidateImportReport(BaseModel):
+    total: int
+    created: int
+    duplicates: int
+    invalid: int
+    errors: List[CandidateImportError]
+
+
 # Content schemas
 class ContentBase(BaseModel):
     key: str = Field(..., description="Unique identifier for the content")
@@ -0,0 +1,223 @@
+"""
+Archival of old submissions and candidates.
+
+Rows older than the archive window are moved out of ``code_review_submissions``
+and ``candidates`` into ``*_archive`` tables in batches of ``batch_size``: each
+batch is copied with ``INSERT ... SELECT`` and deleted from the hot table in
+the same transaction, so a row is always in exactly one of the two. On
+Postgres the archive tables are range-partitioned by month and the monthly
+partitions are created on demand; on SQLite they are plain tables.
+
+Derived data follows the hot tables: counters are decremented for archived
+submissions, their similarity signatures and matches are dropped, and
+leaderboards only rank hot submissions. A candidate is only archived once
+nothing in the hot tables refers to it.
+
+Batches are claimed ``FOR UPDATE SKIP LOCKED`` on Postgres and counters are
+adjusted from the rows the ``DELETE`` returned, so overlapping runs (the CLI
+next to the job) never move or count a row twice. The periodic run is the
+``archive.run`` job, queued by every web worker but run by one job worker at
+a time.
+
+Reads by primary key or email fall through to the archive (``find_submission``,
+``find_candidate``, ``archived_emails``) for the rare historical lookup.
+"""
+
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import delete, exists, func, insert, literal, or_, select, text
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..db import SessionLocal
+from ..models.archive import CandidateArchive, SubmissionArchive
+from ..models.candidate import Candidate
+from ..models.draft import AssessmentDraft
+from ..models.invitation import AssessmentInvitation
+from ..models.similarity import SimilarityMatch, SubmissionSignature
+from ..models.stats import CandidateStats
+from ..models.submission import CodeReviewSubmission
+from . import stats
+from .jobs import PeriodicJob, job_handler
+from .ranking import ranking_engine
+from .response_cache import response_cache
+from .similarity import similarity_index
+
+
+SUBMISSION_COLUMNS = (
+    "id", "assessment_id", "candidate_id", "comments", "overall_feedback", "submitted_at", "is_evaluated",
+    "evaluation_score", "evaluation_details", "evaluated_at", "criteria_fingerprint",
+)
+CANDIDATE_COLUMNS = ("id", "first_name", "last_name", "email", "tenant_id", "created_at")
+
+
+def _month_start(value: datetime) -> datetime:
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+
+
+def _ensure_partitions(db: Session, table: str, values: Iterable[datetime]) -> None:
+    """Create the monthly partitions of ``table`` covering ``values`` (Postgres only)."""
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    for start in sorted({_month_start(v) for v in values}):
+        end = (start + timedelta(days=32)).replace(day=1)
+        db.execute(text(
+            f'CREATE TABLE IF NOT EXISTS "{table}_p{start:%Y%m}" PARTITION OF "{table}" '
+            f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+        ))
+
+
+def archive_submissions(db: Session, cutoff: datetime, batch_size: int = settings.archive_batch_size) -> int:
+    """Move one batch of submissions older than ``cutoff``; returns how many were moved."""
+    rows = db.execute(
+        select(
+            CodeReviewSubmission.id,
+            CodeReviewSubmission.assessment_id,
+            CodeReviewSubmission.candidate_id,
+            CodeReviewSubmission.submitted_at,
+            CodeReviewSubmission.is_evaluated,
+            CodeReviewSubmission.evaluation_score,
+        )
+        .where(CodeReviewSubmission.submitted_at < cutoff)
+        .order_by(CodeReviewSubmission.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not rows:
+        return 0
+    ids = [r.id for r in rows]
+    _ensure_partitions(db, SubmissionArchive.__tablename__, (r.submitted_at for r in rows))
+    source = select(
+        *(getattr(CodeReviewSubmission, name) for name in SUBMISSION_COLUMNS),
+        literal(datetime.utcnow(), type_=SubmissionArchive.archived_at.type),
+    ).where(CodeReviewSubmission.id.in_(ids))
+    db.execute(insert(SubmissionArchive).from_select([*SUBMISSION_COLUMNS, "archived_at"], source))
+    db.execute(delete(SimilarityMatch).where(
+        or_(SimilarityMatch.submission_id.in_(ids), SimilarityMatch.other_submission_id.in_(ids))))
+    db.execute(delete(SubmissionSignature).where(SubmissionSignature.submission_id.in_(ids)))
+    # Counters only follow the rows this transaction actually removed
+    deleted = db.execute(
+        delete(CodeReviewSubmission)
+        .where(CodeReviewSubmission.id.in_(ids))
+        .returning(
+            CodeReviewSubmission.assessment_id,
+            CodeReviewSubmission.candidate_id,
+            CodeReviewSubmission.is_evaluated,
+            CodeReviewSubmission.evaluation_score,
+        )
+        .execution_options(synchronize_session=False)
+    ).all()
+    stats.adjust(db, (
+        (r.assessment_id, r.candidate_id, {
+            "submitted": -1,
+            "evaluated": -1 if r.is_evaluated else 0,
+            "score_sum": -(r.evaluation_score or 0.0) if r.is_evaluated else 0.0,
+        })
+        for r in deleted
+    ))
+    db.commit()
+    assessment_ids = {r.assessment_id for r in deleted}
+    for assessment_id in assessment_ids:
+        ranking_engine.invalidate(assessment_id)
+        similarity_index.invalidate(assessment_id)
+    # Other workers and the job processes drop their ranking entries on these tags
+    response_cache.invalidate(*{f"ranking:{assessment_id}" for assessment_id in assessment_ids})
+    return len(deleted)
+
+
+def archive_candidates(db: Session, cutoff: datetime, batch_size: int = settings.archive_batch_size) -> int:
+    """Move one batch of unreferenced candidates created before ``cutoff``."""
+    referenced = or_(
+        exists().where(CodeReviewSubmission.candidate_id == Candidate.id),
+        exists().where(AssessmentInvitation.candidate_id == Candidate.id),
+        exists().where(AssessmentDraft.candidate_id == Candidate.id),
+        exists().where(SubmissionSignature.candidate_id == Candidate.id),
+        exists().where(or_(SimilarityMatch.candidate_id == Candidate.id,
+                           SimilarityMatch.other_candidate_id == Candidate.id)),
+    )
+    rows = db.execute(
+        select(Candidate.id, Candidate.created_at)
+        .where(Candidate.created_at < cutoff, ~referenced)
+        .order_by(Candidate.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not rows:
+        return 0
+    ids = [r.id for r in rows]
+    _ensure_partitions(db, CandidateArchive.__tablename__, (r.created_at for r in rows))
+    source = select(
+        *(getattr(Candidate, name) for name in CANDIDATE_COLUMNS),
+        literal(datetime.utcnow(), type_=CandidateArchive.archived_at.type),
+    ).where(Candidate.id.in_(ids))
+    db.execute(insert(CandidateArchive).from_select([*CANDIDATE_COLUMNS, "archived_at"], source))
+    db.execute(delete(CandidateStats).where(CandidateStats.candidate_id.in_(ids)))
+    db.execute(delete(Candidate).where(Candidate.id.in_(ids)))
+    db.commit()
+    return len(rows)
+
+
+def count_archivable(db: Session, cutoff: datetime) -> Dict[str, int]:
+    """Rows past ``cutoff`` (candidates still referenced by newer rows are kept when archiving)."""
+    return {
+        "submissions": db.scalar(select(func.count()).select_from(CodeReviewSubmission)
+                                 .where(CodeReviewSubmission.submitted_at < cutoff)),
+        "candidates": db.scalar(select(func.count()).select_from(Candidate).where(Candidate.created_at < cutoff)),
+    }
+
+
+def run_archival(
+    older_than_days: int = settings.archive_after_days,
+    batch_size: int = settings.archive_batch_size,
+    stop: Optional[threading.Event] = None,
+) -> Dict[str, int]:
+    """Archive everything past the window, one short transaction per batch."""
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    moved = {"submissions": 0, "candidates": 0}
+    # Submissions first, so that their candidates can become unreferenced
+    for key, step in (("submissions", archive_submissions), ("candidates", archive_candidates)):
+        while not (stop and stop.is_set()):
+            db = SessionLocal()
+            try:
+                count = step(db, cutoff, batch_size)
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                db.close()
+            moved[key] += count
+            if count < batch_size:
+                break
+    return moved
+
+
+def find_submission(db: Session, submission_id: int):
+    """Hot row, or the archived copy; archived rows are read-only."""
+    return db.get(CodeReviewSubmission, submission_id) or db.scalars(
+        select(SubmissionArchive).where(SubmissionArchive.id == submission_id)).first()
+
+
+def find_candidate(db: Session, candidate_id: int):
+    return db.get(Candidate, candidate_id) or db.scalars(
+        select(CandidateArchive).where(CandidateArchive.id == candidate_id)).first()
+
+
+def archived_emails(conn, emails: List[str]) -> Set[str]:
+    """Emails among ``emails`` that belong to archived candidates (``conn`` may be a session or connection)."""
+    if not emails:
+        return set()
+    return set(conn.scalars(select(CandidateArchive.email).where(CandidateArchive.email.in_(emails))))
+
+
+@job_handler("archive.run", max_attempts=3, concurrency=1)
+def archive_job(older_than_days: int = settings.archive_after_days) -> Dict[str, int]:
+    moved = run_archival(older_than_days)
+    if any(moved.values()):
+        print(f"[ARCHIVE] moved {moved}")
+    return moved
+
+
+# Every web worker queues the run; the unique key and concurrency 1 make it a single run
+archiver = PeriodicJob("archive.run", settings.archive_interval_seconds if settings.archive_after_days > 0 else 0)
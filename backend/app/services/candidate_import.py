@@ -0,0 +1,209 @@
+"""
+Streaming bulk import of candidates from CSV or NDJSON.
+
+The upload is read in chunks of ``chunk_size`` rows. Each chunk is validated
+with ``CandidateCreate``, de-duplicated against the rest of the file and
+against ``candidates.email`` with one set-based query, and loaded with
+``COPY`` on Postgres or ``executemany`` on SQLite. Inserts use the unique
+email index as the final arbiter, so concurrent imports cannot create
+duplicates either.
+
+Imports for a tenant run against the tenant's shard engine and stamp every
+row with its ``tenant_id``.
+"""
+
+import csv
+import io
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+
+from ..db import engine as default_engine
+from ..models.archive import CandidateArchive
+from ..models.candidate import Candidate
+from ..schemas import CandidateCreate
+
+
+FIELDS = ("first_name", "last_name", "email")
+
+
+@dataclass
+class ImportReport:
+    total: int = 0
+    created: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+
+    def error(self, row: int, message: str, email: Optional[str] = None) -> None:
+        self.errors.append({"row": row, "email": email, "error": message})
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "total": self.total,
+            "created": self.created,
+            "duplicates": self.duplicates,
+            "invalid": self.invalid,
+            "errors": self.errors,
+        }
+
+
+def detect_format(filename: Optional[str], explicit: Optional[str] = None) -> str:
+    if explicit:
+        return explicit.lower()
+    if filename and filename.lower().endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    return "csv"
+
+
+def iter_rows(stream: BinaryIO, fmt: str) -> Iterator[Tuple[int, Any]]:
+    """Yield ``(row_number, row)`` pairs; rows that cannot be decoded are yielded as exceptions."""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        for number, row in enumerate(reader, start=2):  # row 1 is the header
+            yield number, row
+    elif fmt == "ndjson":
+        for number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield number, json.loads(line)
+            except ValueError as e:
+                yield number, e
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(p) for p in e['loc'])}: {e['msg']}" for e in error.errors())
+
+
+class CandidateImporter:
+    def __init__(self, engine: Engine = default_engine, chunk_size: int = 5000, tenant_id: Optional[str] = None):
+        self.engine = engine
+        self.chunk_size = chunk_size
+        self.tenant_id = tenant_id
+
+    def run(self, stream: BinaryIO, fmt: str = "csv") -> ImportReport:
+        report = ImportReport()
+        seen: set = set()
+        chunk: List[Tuple[int, CandidateCreate]] = []
+        for number, row in iter_rows(stream, fmt):
+            report.total += 1
+            if isinstance(row, Exception):
+                report.invalid += 1
+                report.error(number, f"Malformed row: {row}")
+                continue
+            if not isinstance(row, dict):
+                report.invalid += 1
+                report.error(number, "Row must be an object")
+                continue
+            email = row.get("email") if isinstance(row.get("email"), str) else None
+            # NDJSON values can be any JSON type; CSV values are always strings
+            not_strings = [k for k in FIELDS if row.get(k) is not None and not isinstance(row.get(k), str)]
+            if not_strings:
+                report.invalid += 1
+                report.error(number, "; ".join(f"{k}: must be a string" for k in not_strings), email)
+                continue
+            try:
+                candidate = CandidateCreate(**{k: (row.get(k) or "").strip() for k in FIELDS})
+            except ValidationError as e:
+                report.invalid += 1
+                report.error(number, _format_validation_error(e), email)
+                continue
+            key = candidate.email
+            if key in seen:
+                report.duplicates += 1
+                report.error(number, "Duplicate email within file", candidate.email)
+                continue
+            seen.add(key)
+            chunk.append((number, candidate))
+            if len(chunk) >= self.chunk_size:
+                self._load_chunk(chunk, report)
+                chunk = []
+        if chunk:
+            self._load_chunk(chunk, report)
+        return report
+
+    def _load_chunk(self, chunk: List[Tuple[int, CandidateCreate]], report: ImportReport) -> None:
+        with self.engine.begin() as conn:
+            emails = [candidate.email for _, candidate in chunk]
+            existing = set(conn.scalars(select(Candidate.email).where(Candidate.email.in_(emails))))
+            # Archived candidates keep their email reserved
+            existing.update(conn.scalars(select(CandidateArchive.email).where(CandidateArchive.email.in_(emails))))
+            fresh = []
+            for number, candidate in chunk:
+                if candidate.email in existing:
+                    report.duplicates += 1
+                    report.error(number, "Email already exists", candidate.email)
+                else:
+                    fresh.append((number, candidate))
+            if not fresh:
+                return
+            now = datetime.utcnow()
+            rows = [(c.first_name, c.last_name, c.email, self.tenant_id, now) for _, c in fresh]
+            if conn.dialect.name == "postgresql":
+                inserted = self._copy_postgres(conn, rows)
+            else:
+                inserted = self._executemany(conn, rows)
+        # Rows lost to a concurrent insert of the same email are reported as duplicates
+        for number, candidate in fresh:
+            if candidate.email in inserted:
+                report.created += 1
+            else:
+                report.duplicates += 1
+                report.error(number, "Email already exists", candidate.email)
+
+    def _copy_postgres(self, conn, rows: List[tuple]) -> set:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for first_name, last_name, email, tenant_id, created_at in rows:
+            writer.writerow((first_name, last_name, email, tenant_id, created_at.isoformat()))
+        buffer.seek(0)
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS candidate_import "
+                "(first_name varchar(100), last_name varchar(100), email varchar(255), tenant_id varchar(64), "
+                "created_at timestamptz) "
+                "ON COMMIT DELETE ROWS"
+            )
+            cursor.copy_expert(
+                "COPY candidate_import (first_name, last_name, email, tenant_id, created_at) FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+            cursor.execute(
+                "INSERT INTO candidates (first_name, last_name, email, tenant_id, created_at) "
+                "SELECT first_name, last_name, email, tenant_id, created_at FROM candidate_import "
+                "ON CONFLICT (email) DO NOTHING RETURNING email"
+            )
+            return {row[0] for row in cursor.fetchall()}
+        finally:
+            cursor.close()
+
+    def _executemany(self, conn, rows: List[tuple]) -> set:
+        # Match the text format SQLAlchemy uses for DateTime columns on SQLite
+        rows = [(*row[:4], row[4].strftime("%Y-%m-%d %H:%M:%S.%f")) for row in rows]
+        cursor = conn.connection.cursor()
+        try:
+            cursor.executemany(
+                "INSERT OR IGNORE INTO candidates (first_name, last_name, email, tenant_id, created_at) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            if cursor.rowcount == len(rows):
+                return {row[2] for row in rows}
+            # Some rows were ignored by the unique index; find out which ones made it
+            placeholders = ",".join("?" * len(rows))
+            cursor.execute(
+                f"SELECT email FROM candidates WHERE created_at = ? AND email IN ({placeholders})",
+                [rows[0][4], *[row[2] for row in rows]],
+            )
+            return {row[0] for row in cursor.fetchall()}
+        finally:
+            cursor.close()
@@ -0,0 +1,200 @@
+"""
+Indexed candidate search by partial name or email.
+
+Postgres uses a ``pg_trgm`` GIN index over the lower-cased
+"first last email" text, which serves substring ``LIKE`` filters and
+``similarity()`` ranking. SQLite uses an external-content FTS5 table with the
+trigram tokenizer, kept in sync with ``candidates`` by triggers. The newest
+``RANK_WINDOW`` matches are ranked by bm25 (name columns weighted above the
+email) and the requested page is cut from them. On SQLite builds without the
+trigram tokenizer the FTS5 table falls back to word-prefix matching. Queries
+shorter than three characters cannot use trigrams and fall back to a prefix
+scan bounded by the page size.
+
+With a ``tenant_id`` only that tenant's candidates are matched; tenants
+share shards, so the filter is applied before ranking and paging.
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+
+# Upper bound on how many matches are ranked for one query
+RANK_WINDOW = 200
+# bm25 column weights and parameters (FTS5's defaults for k1 and b)
+BM25_WEIGHTS = {"first_name": 10.0, "last_name": 10.0, "email": 1.0}
+BM25_K1 = 1.2
+BM25_B = 0.75
+SEARCH_TEXT_PG = "lower(first_name || ' ' || last_name || ' ' || email)"
+_TOKEN_RE = re.compile(r"[^\s\"]+")
+
+_SQLITE_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS candidates_fts_ai AFTER INSERT ON candidates BEGIN
+        INSERT INTO candidates_fts(rowid, first_name, last_name, email)
+        VALUES (new.id, new.first_name, new.last_name, new.email);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS candidates_fts_ad AFTER DELETE ON candidates BEGIN
+        INSERT INTO candidates_fts(candidates_fts, rowid, first_name, last_name, email)
+        VALUES ('delete', old.id, old.first_name, old.last_name, old.email);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS candidates_fts_au AFTER UPDATE ON candidates BEGIN
+        INSERT INTO candidates_fts(candidates_fts, rowid, first_name, last_name, email)
+        VALUES ('delete', old.id, old.first_name, old.last_name, old.email);
+        INSERT INTO candidates_fts(rowid, first_name, last_name, email)
+        VALUES (new.id, new.first_name, new.last_name, new.email);
+    END
+    """,
+]
+
+
+_trigram_support: Dict[str, bool] = {}
+
+
+def _sqlite_uses_trigram(conn, bind) -> bool:
+    key = str(bind.url)
+    if key not in _trigram_support:
+        row = conn.execute(text("SELECT sql FROM sqlite_master WHERE name = 'candidates_fts'")).first()
+        _trigram_support[key] = bool(row and "trigram" in row[0])
+    return _trigram_support[key]
+
+
+def ensure_search_indexes(engine: Engine) -> None:
+    """Create the search index for the engine's dialect. Idempotent."""
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS ix_candidates_search_trgm "
+                f"ON candidates USING gin (({SEARCH_TEXT_PG}) gin_trgm_ops)"
+            ))
+        elif conn.dialect.name == "sqlite":
+            exists = conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'candidates_fts'")).first()
+            if not exists:
+                try:
+                    conn.execute(text(
+                        "CREATE VIRTUAL TABLE candidates_fts USING fts5("
+                        "first_name, last_name, email, content='candidates', content_rowid='id', "
+                        "tokenize='trigram')"
+                    ))
+                except Exception:
+                    conn.execute(text(
+                        "CREATE VIRTUAL TABLE candidates_fts USING fts5("
+                        "first_name, last_name, email, content='candidates', content_rowid='id', "
+                        "prefix='2 3')"
+                    ))
+                conn.execute(text("INSERT INTO candidates_fts(candidates_fts) VALUES ('rebuild')"))
+            for trigger in _SQLITE_TRIGGERS:
+                conn.execute(text(trigger))
+
+
+def _rows(result) -> List[Dict[str, Any]]:
+    return [dict(row._mapping) for row in result]
+
+
+def _bm25_sql(tokens: List[str], params: Dict[str, Any]):
+    """
+    SQL for FTS5's bm25 formula over the rows of a window, using the window as
+    the collection for document lengths. Every row contains every token (the
+    match is an AND), so the IDF factor is the same for all of them and is
+    left out. FTS5's own ``bm25()`` counts each token's hits across the whole
+    table first, which costs more than the match for common tokens.
+
+    Returns ``(columns, score)``: per-row weighted hit counts ``h0, h1, ...``
+    and the length norm, to select over the window rows ``w``, and the score
+    expression over those.
+    """
+    columns = [f"{BM25_K1} * (1 - {BM25_B} + {BM25_B} * w.length / avg(w.length) OVER ()) AS norm"]
+    terms = []
+    for i, token in enumerate(tokens):
+        params[f"tok{i}"] = token
+        hits = " + ".join(
+            f"{weight} * (length(w.{column}) - length(replace(lower(w.{column}), :tok{i}, ''))) / {len(token)}"
+            for column, weight in BM25_WEIGHTS.items()
+        )
+        columns.append(f"{hits} AS h{i}")
+        terms.append(f"h{i} * {BM25_K1 + 1} / (h{i} + norm)")
+    return ", ".join(columns), " + ".join(terms)
+
+
+def _tenant_filter(tenant_id: Optional[str]) -> str:
+    return " AND tenant_id = :tenant" if tenant_id is not None else ""
+
+
+def _prefix_scan(conn, query: str, limit: int, offset: int, tenant_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    pattern = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    return _rows(conn.execute(text(
+        "SELECT id, first_name, last_name, email, created_at, 1.0 AS score FROM candidates "
+        "WHERE (lower(first_name) LIKE :p ESCAPE '\\' OR lower(last_name) LIKE :p ESCAPE '\\' "
+        "OR lower(email) LIKE :p ESCAPE '\\')" + _tenant_filter(tenant_id) + " "
+        "ORDER BY id DESC LIMIT :limit OFFSET :offset"
+    ), {"p": pattern, "limit": limit, "offset": offset, "tenant": tenant_id}))
+
+
+def search_candidates(
+    conn, query: str, limit: int = 20, offset: int = 0, tenant_id: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Return up to ``limit`` ranked candidates matching ``query``; ``score`` is higher for better matches."""
+    query = query.strip().lower()
+    tokens = _TOKEN_RE.findall(query)
+    if not tokens:
+        return []
+    bind = conn.get_bind() if hasattr(conn, "get_bind") else conn.engine
+    dialect = bind.dialect.name
+
+    if dialect == "postgresql":
+        long_tokens = [t for t in tokens if len(t) >= 3]
+        if not long_tokens:
+            return _prefix_scan(conn, query, limit, offset, tenant_id)
+        params: Dict[str, Any] = {
+            "q": query, "limit": limit, "offset": offset, "prefix": tokens[0] + "%", "tenant": tenant_id,
+        }
+        filters = []
+        for i, token in enumerate(long_tokens):
+            params[f"t{i}"] = "%" + token.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            filters.append(f"{SEARCH_TEXT_PG} LIKE :t{i}")
+        return _rows(conn.execute(text(
+            f"SELECT id, first_name, last_name, email, created_at, "
+            f"similarity({SEARCH_TEXT_PG}, :q) + "
+            f"CASE WHEN lower(email) LIKE :prefix OR lower(first_name) LIKE :prefix "
+            f"OR lower(last_name) LIKE :prefix THEN 1 ELSE 0 END AS score "
+            f"FROM candidates WHERE {' AND '.join(filters)}{_tenant_filter(tenant_id)} "
+            f"ORDER BY score DESC, id DESC LIMIT :limit OFFSET :offset"
+        ), params))
+
+    if dialect == "sqlite":
+        trigram = _sqlite_uses_trigram(conn, bind)
+        if trigram:
+            usable = [t for t in tokens if len(t) >= 3]
+            match = " AND ".join('"' + t + '"' for t in usable)
+        else:
+            usable = tokens
+            match = " AND ".join('"' + t + '"*' for t in usable)
+        if not usable:
+            return _prefix_scan(conn, query, limit, offset, tenant_id)
+        tenant_rows = "AND rowid IN (SELECT id FROM candidates WHERE tenant_id = :tenant) " if tenant_id is not None else ""
+        params = {"match": match, "tenant": tenant_id, "limit": limit, "offset": offset,
+                  "window": max(RANK_WINDOW, offset + limit)}
+        hits, score = _bm25_sql(usable, params)
+        # FTS5 walks matches newest first, so the window stops the scan early; only the window is
+        # joined and ranked, and only the requested page leaves the database
+        return _rows(conn.execute(text(
+            f"SELECT id, first_name, last_name, email, created_at, round({score}, 4) AS score "
+            f"FROM (SELECT w.*, {hits} "
+            "      FROM (SELECT c.id, c.first_name, c.last_name, c.email, c.created_at, "
+            "                   length(c.first_name) + length(c.last_name) + length(c.email) AS length "
+            "            FROM (SELECT rowid FROM candidates_fts "
+            f"                  WHERE candidates_fts MATCH :match {tenant_rows}"
+            "                  ORDER BY rowid DESC LIMIT :window) m "
+            "            JOIN candidates c ON c.id = m.rowid) w) "
+            "ORDER BY score DESC, id DESC LIMIT :limit OFFSET :offset"
+        ), params))
+
+    return _prefix_scan(conn, query, limit, offset, tenant_id)
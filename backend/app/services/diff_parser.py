@@ -0,0 +1,267 @@
+"""
+Streaming unified-diff parser with a line-anchor index.
+
+The parser consumes a diff line by line and yields one ``ParsedFile`` per file
+as soon as that file ends, so memory is bounded by the index of the current
+file rather than the size of the diff. Hunk bodies are never buffered unless
+``keep_patch`` is requested.
+
+Each file carries a ``LineIndex``: compact ``array`` columns mapping new and
+old line numbers to diff positions (GitHub's "position": the number of lines
+since the file's first ``@@`` header) and to hunks. Anchoring a review comment
+is a binary search, O(log n) in the number of diff lines of the file.
+"""
+
+import re
+from array import array
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, Optional
+
+from ..schemas import PRFile
+
+
+_HUNK_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+@dataclass(frozen=True)
+class Anchor:
+    filename: str
+    line: int
+    side: str  # "new" or "old"
+    hunk: int
+    position: int
+    kind: str  # "context", "addition" or "deletion"
+
+
+class LineIndex:
+    """Sorted parallel arrays; four bytes per indexed diff line."""
+
+    __slots__ = ("hunk_new_start", "hunk_new_end", "hunk_old_start", "hunk_old_end", "hunk_position",
+                 "new_lines", "new_positions", "new_added", "old_lines", "old_positions", "old_removed")
+
+    def __init__(self):
+        self.hunk_new_start = array("i")
+        self.hunk_new_end = array("i")
+        self.hunk_old_start = array("i")
+        self.hunk_old_end = array("i")
+        self.hunk_position = array("i")
+        self.new_lines = array("i")
+        self.new_positions = array("i")
+        self.new_added = array("b")
+        self.old_lines = array("i")
+        self.old_positions = array("i")
+        self.old_removed = array("b")
+
+    def hunk_for(self, line: int, side: str = "new") -> Optional[int]:
+        starts, ends = (
+            (self.hunk_new_start, self.hunk_new_end) if side == "new" else (self.hunk_old_start, self.hunk_old_end)
+        )
+        i = bisect_right(starts, line) - 1
+        if i >= 0 and line <= ends[i]:
+            return i
+        return None
+
+    def position_for(self, line: int, side: str = "new") -> Optional[int]:
+        lines, positions = (self.new_lines, self.new_positions) if side == "new" else (self.old_lines, self.old_positions)
+        i = bisect_right(lines, line) - 1
+        if i >= 0 and lines[i] == line:
+            return positions[i]
+        return None
+
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).itemsize * len(getattr(self, name)) for name in self.__slots__)
+
+
+@dataclass
+class ParsedFile:
+    filename: str
+    old_filename: Optional[str] = None
+    additions: int = 0
+    deletions: int = 0
+    is_binary: bool = False
+    index: LineIndex = field(default_factory=LineIndex)
+    patch: Optional[List[str]] = None
+
+    @property
+    def changes(self) -> int:
+        return self.additions + self.deletions
+
+    def anchor(self, line: int, side: str = "new") -> Optional[Anchor]:
+        position = self.index.position_for(line, side)
+        if position is None:
+            return None
+        hunk = self.index.hunk_for(line, side)
+        if side == "new":
+            i = bisect_right(self.index.new_lines, line) - 1
+            kind = "addition" if self.index.new_added[i] else "context"
+        else:
+            i = bisect_right(self.index.old_lines, line) - 1
+            kind = "deletion" if self.index.old_removed[i] else "context"
+        return Anchor(self.filename, line, side, hunk if hunk is not None else -1, position, kind)
+
+    def to_pr_file(self, content: Optional[str] = None) -> PRFile:
+        if content is None:
+            content = "".join(self.patch) if self.patch is not None else ""
+        return PRFile(
+            filename=self.filename,
+            content=content,
+            additions=self.additions,
+            deletions=self.deletions,
+            changes=self.changes,
+        )
+
+
+def _strip_path(path: str) -> Optional[str]:
+    path = path.rstrip("\n").split("\t", 1)[0].strip()
+    if path == "/dev/null":
+        return None
+    if path[:2] in ("a/", "b/"):
+        return path[2:]
+    return path
+
+
+def parse_unified_diff(lines: Iterable[str], keep_patch: bool = False) -> Iterator[ParsedFile]:
+    """Parse a unified diff, yielding each file once its last hunk has been read."""
+    current: Optional[ParsedFile] = None
+    old_line = new_line = 0
+    old_left = new_left = 0
+    position = -1
+    pending_old: Optional[str] = None
+
+    def finish(parsed: Optional[ParsedFile]):
+        if parsed is not None and (parsed.filename or parsed.old_filename):
+            if not parsed.filename:
+                parsed.filename = parsed.old_filename
+            return parsed
+        return None
+
+    for raw in lines:
+        line = raw if raw.endswith("\n") else raw + "\n"
+        in_hunk = old_left > 0 or new_left > 0
+
+        if in_hunk:
+            tag = line[0]
+            if tag == "\\":
+                pass
+            elif tag == "+":
+                position += 1
+                current.additions += 1
+                idx = current.index
+                idx.new_lines.append(new_line)
+                idx.new_positions.append(position)
+                idx.new_added.append(1)
+                new_line += 1
+                new_left -= 1
+            elif tag == "-":
+                position += 1
+                current.deletions += 1
+                idx = current.index
+                idx.old_lines.append(old_line)
+                idx.old_positions.append(position)
+                idx.old_removed.append(1)
+                old_line += 1
+                old_left -= 1
+            else:
+                position += 1
+                idx = current.index
+                idx.new_lines.append(new_line)
+                idx.new_positions.append(position)
+                idx.new_added.append(0)
+                idx.old_lines.append(old_line)
+                idx.old_positions.append(position)
+                idx.old_removed.append(0)
+                new_line += 1
+                old_line += 1
+                new_left -= 1
+                old_left -= 1
+            if current.patch is not None:
+                current.patch.append(line)
+            continue
+
+        if line.startswith("diff --git "):
+            done = finish(current)
+            if done is not None:
+                yield done
+            current = ParsedFile(filename="", patch=[] if keep_patch else None)
+            parts = line.rstrip("\n").split(" b/", 1)
+            if len(parts) == 2:
+                current.filename = parts[1]
+                current.old_filename = _strip_path(parts[0][len("diff --git "):])
+            position = -1
+            pending_old = None
+        elif line.startswith("--- "):
+            if current is None or current.index.hunk_position:
+                # Plain (non-git) diff: a new file starts at its "---" header
+                done = finish(current)
+                if done is not None:
+                    yield done
+                current = ParsedFile(filename="", patch=[] if keep_patch else None)
+                position = -1
+            pending_old = _strip_path(line[4:])
+            if pending_old:
+                current.old_filename = pending_old
+        elif line.startswith("+++ ") and current is not None:
+            new_name = _strip_path(line[4:])
+            current.filename = new_name or pending_old or current.filename
+        elif line.startswith("@@") and current is not None:
+            match = _HUNK_RE.match(line)
+            if not match:
+                continue
+            old_start, old_count, new_start, new_count = match.groups()
+            old_line, new_line = int(old_start), int(new_start)
+            old_left = int(old_count) if old_count is not None else 1
+            new_left = int(new_count) if new_count is not None else 1
+            position += 1
+            idx = current.index
+            idx.hunk_old_start.append(old_line)
+            idx.hunk_old_end.append(old_line + max(old_left, 1) - 1)
+            idx.hunk_new_start.append(new_line)
+            idx.hunk_new_end.append(new_line + max(new_left, 1) - 1)
+            idx.hunk_position.append(position)
+        elif current is not None:
+            if line.startswith("Binary files ") or line.startswith("GIT binary patch"):
+                current.is_binary = True
+            elif line.startswith("rename from "):
+                current.old_filename = line[len("rename from "):].rstrip("\n")
+            elif line.startswith("rename to "):
+                current.filename = line[len("rename to "):].rstrip("\n")
+        if current is not None and current.patch is not None:
+            current.patch.append(line)
+
+    done = finish(current)
+    if done is not None:
+        yield done
+
+
+class DiffIndex:
+    """Per-file line indexes for a whole diff, for anchoring review comments."""
+
+    def __init__(self, files: Iterable[ParsedFile]):
+        self.files = {parsed.filename: parsed for parsed in files}
+
+    @classmethod
+    def from_text(cls, diff_text: str) -> "DiffIndex":
+        return cls(parse_unified_diff(diff_text.splitlines(keepends=True)))
+
+    def anchor(self, line: int, filename: Optional[str] = None, side: str = "new") -> Optional[Anchor]:
+        if filename is not None:
+            parsed = self.files.get(filename)
+            return parsed.anchor(line, side) if parsed else None
+        # Comments without a file are anchored to the first file containing the line
+        for parsed in self.files.values():
+            found = parsed.anchor(line, side)
+            if found is not None:
+                return found
+        return None
+
+    def anchor_comment_key(self, key: str) -> Optional[Anchor]:
+        """Anchor a comment key such as ``"42"``, ``"src/app.py:42"`` or ``"src/app.py:L-17"`` (old side)."""
+        filename, _, line = str(key).rpartition(":")
+        side = "new"
+        line = line.strip().lstrip("Ll")
+        if line.startswith("-"):
+            side, line = "old", line[1:]
+        if not line.isdigit():
+            return None
+        return self.anchor(int(line), filename or None, side)
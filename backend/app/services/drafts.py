@@ -0,0 +1,358 @@
+"""
+Write-coalescing autosave for in-progress assessments.
+
+Autosaves land in an in-memory map holding only the latest draft per
+(candidate, assessment); a background flusher writes every dirty draft to the
+database in one batched upsert per interval. However fast candidates type,
+each session costs at most one row write per flush interval.
+
+Ordering is last-write-wins on ``version``, a counter the client increases
+with every save, enforced both in memory and in the upsert, so concurrent
+workers cannot overwrite a newer draft with an older one. Drafts larger than
+``max_bytes`` (as compact JSON) are refused.
+
+Only writes are buffered. Reads go to the database, which other workers flush
+to as well; a newer save this process has not flushed yet takes precedence.
+Once a (candidate, assessment) pair has a submission its drafts are deleted,
+and drafts still buffered for it in any worker are dropped at their flush
+instead of being written back.
+
+Every accepted save is also appended to a per-process journal file. The
+journal is rotated on each flush and deleted once the flush commits; on
+startup, journals left behind by crashed processes are replayed and flushed.
+"""
+
+import fcntl
+import json
+import os
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..db import SessionLocal
+from ..models.assessment import Assessment
+from ..models.candidate import Candidate
+from ..models.draft import AssessmentDraft
+from ..models.submission import CodeReviewSubmission
+from . import stats
+
+
+Key = Tuple[int, int]  # (candidate_id, assessment_id)
+
+
+class DraftTooLarge(ValueError):
+    """Raised for a draft whose content exceeds the size limit."""
+
+
+@dataclass
+class Draft:
+    candidate_id: int
+    assessment_id: int
+    content: Dict[str, Any]
+    version: int
+    updated_at: datetime
+    dirty: bool = True
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "candidate_id": self.candidate_id,
+            "assessment_id": self.assessment_id,
+            "content": self.content,
+            "version": self.version,
+            "updated_at": self.updated_at,
+        }
+
+
+class DraftJournal:
+    """Append-only JSON-lines log of accepted saves, one locked file per process."""
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self._file = None
+        self._path: Optional[Path] = None
+        self._generation = 0
+
+    def _open(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._generation += 1
+        self._path = self.directory / f"drafts-{os.getpid()}-{self._generation}.log"
+        self._file = open(self._path, "a", encoding="utf-8")
+        fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def append(self, draft: Draft) -> None:
+        if self._file is None:
+            self._open()
+        record = {**draft.as_dict(), "updated_at": draft.updated_at.isoformat()}
+        self._file.write(json.dumps(record) + "\n")
+        # Reaches the OS page cache: survives a process crash without an fsync per keystroke
+        self._file.flush()
+
+    def rotate(self) -> Optional[Path]:
+        """Start a new journal; returns the previous one, to delete once its drafts are durable."""
+        previous, self._path = self._path, None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        return previous
+
+    def recover(self) -> List[Dict[str, Any]]:
+        """Read and remove journals of processes that are gone (their locks are free)."""
+        records = []
+        if not self.directory.exists():
+            return records
+        for path in sorted(self.directory.glob("drafts-*.log")):
+            if path == self._path:
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    try:
+                        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        continue  # journal of a live worker
+                    for line in f:
+                        try:
+                            records.append(json.loads(line))
+                        except ValueError:
+                            break  # torn final write
+                path.unlink()
+            except FileNotFoundError:
+                continue
+        return records
+
+
+class DraftStore:
+    def __init__(
+        self,
+        session_factory: Callable[..., Session] = SessionLocal,
+        flush_interval: float = settings.draft_flush_interval_seconds,
+        idle_ttl: float = settings.draft_idle_ttl_seconds,
+        journal_dir: Optional[str] = settings.draft_journal_dir,
+        max_bytes: int = settings.draft_max_bytes,
+    ):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.idle_ttl = idle_ttl
+        self.max_bytes = max_bytes
+        self.journal = DraftJournal(journal_dir) if journal_dir else None
+        self._drafts: Dict[Key, Draft] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"saves": 0, "stale": 0, "flushes": 0, "rows_written": 0}
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self.recover()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="draft-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(self.flush_interval + 5)
+            self._thread = None
+        self.flush()
+
+    def recover(self) -> int:
+        if not self.journal:
+            return 0
+        records = self.journal.recover()
+        with self._lock:
+            for record in records:
+                self._apply(Draft(
+                    candidate_id=record["candidate_id"],
+                    assessment_id=record["assessment_id"],
+                    content=record["content"],
+                    version=record["version"],
+                    updated_at=datetime.fromisoformat(record["updated_at"]),
+                ), journal=True)
+        if records:
+            self.flush()
+        return len(records)
+
+    def _apply(self, draft: Draft, journal: bool) -> bool:
+        key = (draft.candidate_id, draft.assessment_id)
+        current = self._drafts.get(key)
+        if current is not None and current.version > draft.version:
+            self.stats["stale"] += 1
+            return False
+        self._drafts[key] = draft
+        if journal and self.journal:
+            self.journal.append(draft)
+        return True
+
+    def has(self, candidate_id: int, assessment_id: int) -> bool:
+        """Whether a draft for the key is held in memory (its ids were checked when it was first saved)."""
+        with self._lock:
+            return (candidate_id, assessment_id) in self._drafts
+
+    def save(self, candidate_id: int, assessment_id: int, content: Dict[str, Any], version: int) -> Draft:
+        """Record the latest draft; returns the draft now current for the key."""
+        size = len(json.dumps(content, separators=(",", ":")))
+        if size > self.max_bytes:
+            raise DraftTooLarge(f"Draft is {size} bytes, the limit is {self.max_bytes}")
+        draft = Draft(candidate_id, assessment_id, content, version, datetime.utcnow())
+        with self._lock:
+            self.stats["saves"] += 1
+            self._apply(draft, journal=True)
+            return self._drafts[(candidate_id, assessment_id)]
+
+    def get(self, candidate_id: int, assessment_id: int, db: Optional[Session] = None) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            draft = self._drafts.get((candidate_id, assessment_id))
+            # Flushed drafts may since have been replaced or discarded by another worker
+            pending = draft.as_dict() if draft is not None and draft.dirty else None
+        own = db is None
+        db = db or self.session_factory()
+        try:
+            row = db.scalar(select(AssessmentDraft).where(
+                AssessmentDraft.candidate_id == candidate_id,
+                AssessmentDraft.assessment_id == assessment_id,
+            ))
+            if row is None or (pending is not None and pending["version"] > row.version):
+                return pending
+            return {
+                "candidate_id": row.candidate_id,
+                "assessment_id": row.assessment_id,
+                "content": row.content,
+                "version": row.version,
+                "updated_at": row.updated_at,
+            }
+        finally:
+            if own:
+                db.close()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[DRAFT_FLUSH_ERROR] {e}")
+
+    def flush(self, keys: Optional[List[Key]] = None) -> int:
+        """Write dirty drafts (all, or just ``keys``) in one transaction. Returns rows written."""
+        with self._flush_lock:
+            with self._lock:
+                if keys is None:
+                    batch = [d for d in self._drafts.values() if d.dirty]
+                    rotated = self.journal.rotate() if self.journal else None
+                else:
+                    batch = [self._drafts[k] for k in keys if k in self._drafts and self._drafts[k].dirty]
+                    rotated = None
+                snapshot = {(d.candidate_id, d.assessment_id): d.version for d in batch}
+            if batch:
+                try:
+                    self._write(batch)
+                except Exception:
+                    if rotated is not None:
+                        # Keep the rotated journal: it is replayed on the next start
+                        rotated = None
+                    raise
+            with self._lock:
+                for key, version in snapshot.items():
+                    draft = self._drafts.get(key)
+                    if draft is not None and draft.version == version:
+                        draft.dirty = False
+                self._evict_idle()
+                self.stats["flushes"] += 1
+                self.stats["rows_written"] += len(batch)
+            if rotated is not None and rotated.exists():
+                rotated.unlink()
+            return len(batch)
+
+    def _evict_idle(self) -> None:
+        cutoff = datetime.utcnow().timestamp() - self.idle_ttl
+        for key in [k for k, d in self._drafts.items() if not d.dirty and d.updated_at.timestamp() < cutoff]:
+            del self._drafts[key]
+
+    def _write(self, batch: List[Draft]) -> None:
+        db = self.session_factory()
+        try:
+            # Ids are checked on a key's first save only; drop drafts whose assessment or candidate is gone
+            known_assessments = set(db.scalars(select(Assessment.id).where(
+                Assessment.id.in_({d.assessment_id for d in batch}))))
+            known_candidates = set(db.scalars(select(Candidate.id).where(
+                Candidate.id.in_({d.candidate_id for d in batch}))))
+            batch = [d for d in batch if d.assessment_id in known_assessments and d.candidate_id in known_candidates]
+            if not batch:
+                return
+            keys = [(d.candidate_id, d.assessment_id) for d in batch]
+            # Another worker may have flushed the submission while this copy was buffered
+            submitted = set(db.execute(
+                select(CodeReviewSubmission.candidate_id, CodeReviewSubmission.assessment_id)
+                .where(tuple_(CodeReviewSubmission.candidate_id, CodeReviewSubmission.assessment_id).in_(keys))
+                .distinct()
+            ).all())
+            batch = [d for d in batch if (d.candidate_id, d.assessment_id) not in submitted]
+            if not batch:
+                return
+            keys = [(d.candidate_id, d.assessment_id) for d in batch]
+            existing = set(db.execute(
+                select(AssessmentDraft.candidate_id, AssessmentDraft.assessment_id)
+                .where(tuple_(AssessmentDraft.candidate_id, AssessmentDraft.assessment_id).in_(keys))
+            ).all())
+            insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+            table = AssessmentDraft.__table__
+            stmt = insert(table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["candidate_id", "assessment_id"],
+                set_={
+                    "content": stmt.excluded.content,
+                    "version": stmt.excluded.version,
+                    "updated_at": stmt.excluded.updated_at,
+                },
+                where=stmt.excluded.version >= table.c.version,
+            )
+            db.execute(stmt, [
+                {
+                    "candidate_id": d.candidate_id,
+                    "assessment_id": d.assessment_id,
+                    "content": d.content,
+                    "version": d.version,
+                    "started_at": d.updated_at,
+                    "updated_at": d.updated_at,
+                }
+                for d in batch
+            ])
+            stats.adjust(db, (
+                (d.assessment_id, d.candidate_id, {"in_progress": 1})
+                for d in batch if (d.candidate_id, d.assessment_id) not in existing
+            ))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def discard_submitted(self, db: Session, submissions: List[Any]) -> None:
+        """Submission buffer hook: a submitted assessment is no longer in progress."""
+        keys = list({(s.candidate_id, s.assessment_id) for s in submissions})
+        with self._lock:
+            for key in keys:
+                self._drafts.pop(key, None)
+        existing = db.execute(
+            select(AssessmentDraft.candidate_id, AssessmentDraft.assessment_id)
+            .where(tuple_(AssessmentDraft.candidate_id, AssessmentDraft.assessment_id).in_(keys))
+        ).all()
+        if not existing:
+            return
+        db.execute(
+            delete(AssessmentDraft)
+            .where(tuple_(AssessmentDraft.candidate_id, AssessmentDraft.assessment_id).in_([tuple(k) for k in existing]))
+        )
+        stats.adjust(db, ((assessment_id, candidate_id, {"in_progress": -1}) for candidate_id, assessment_id in existing))
+
+
+draft_store = DraftStore()
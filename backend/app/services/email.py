@@ -1,8 +1,14 @@
+import html
 import os
+from typing import Optional
+
 from sendgrid import SendGridAPIClient
 from sendgrid.helpers.mail import Mail
 
+from .jobs import job_handler
+
 
+@job_handler("email.verification", priority=10, max_attempts=8)
 def send_verification_email(to_email: str, verify_link: str) -> None:
     api_key = os.getenv('SENDGRID_API_KEY')
     email_from = os.getenv('EMAIL_FROM', 'no-reply@example.com')
@@ -17,10 +23,29 @@ def send_verification_email(to_email: str, verify_link: str) -> None:
     <p>If you did not create this account, you can ignore this email.</p>
     """
     message = Mail(from_email=email_from, to_emails=to_email, subject=subject, html_content=html_content)
-    try:
-        sg = SendGridAPIClient(api_key)
-        sg.send(message)
-    except Exception as e:
-        print(f"[EMAIL_ERROR] {e}")
+    # Errors propagate so the job queue retries the send
+    SendGridAPIClient(api_key).send(message)
+
+
+def invitation_client() -> Optional[SendGridAPIClient]:
+    """Shared client for bulk sends, or None when email is disabled."""
+    api_key = os.getenv('SENDGRID_API_KEY')
+    return SendGridAPIClient(api_key) if api_key else None
 
 
+def send_invitation_email(client: SendGridAPIClient, to_email: str, invite_link: str, assessment_title: str) -> bool:
+    email_from = os.getenv('EMAIL_FROM', 'no-reply@example.com')
+    subject = f'You are invited to the "{assessment_title}" assessment'
+    html_content = f"""
+    <p>Hello,</p>
+    <p>You have been invited to complete the <strong>{html.escape(assessment_title)}</strong> assessment on Laksham.</p>
+    <p><a href="{invite_link}">Start Assessment</a></p>
+    <p>If you were not expecting this invitation, you can ignore this email.</p>
+    """
+    message = Mail(from_email=email_from, to_emails=to_email, subject=subject, html_content=html_content)
+    try:
+        client.send(message)
+        return True
+    except Exception as e:
+        print(f"[EMAIL_ERROR] To: {to_email} {e}")
+        return False
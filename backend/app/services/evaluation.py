@@ -0,0 +1,303 @@
+"""
+Automated evaluation of code review submissions.
+
+A submission's per-line ``comments`` are scored against the assessment's
+``evaluation_criteria``::
+
+    {
+        "expected_issues": [
+            {"line": 42, "tolerance": 2, "keywords": ["null", "check"], "weight": 2}
+        ],
+        "keywords": ["race condition", "off-by-one"],
+        "min_comment_length": 20,
+        "weights": {"issues": 0.6, "keywords": 0.2, "completeness": 0.2}
+    }
+
+Scores are in the range 0-100. Each evaluated submission records the
+fingerprint of the criteria it was scored with, so re-scoring after a criteria
+change only touches submissions scored with an older version. Large batches
+are scored in a process pool.
+
+Scoring runs as ``evaluation.rescore`` jobs in the job workers, not in the web
+process. The web processes learn about new scores through the response
+cache's invalidation log (``ranking:<assessment id>`` tags), which drops their
+in-memory leaderboards.
+"""
+
+import hashlib
+import json
+import math
+import multiprocessing
+import re
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..db import SessionLocal
+from ..models.assessment import Assessment
+from ..models.submission import CodeReviewSubmission
+from . import stats, webhooks
+from .jobs import enqueue, job_handler
+from .ranking import ranking_engine
+from .response_cache import response_cache
+
+
+DEFAULT_WEIGHTS = {"issues": 0.6, "keywords": 0.2, "completeness": 0.2}
+_LINE_RE = re.compile(r"\d+")
+
+
+def criteria_fingerprint(criteria: Optional[Dict[str, Any]]) -> str:
+    canonical = json.dumps(criteria or {}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _parse_line(key: str) -> Optional[int]:
+    # Keys are usually "42" but the frontend may send "L42" or "file.py:42"
+    match = _LINE_RE.findall(str(key))
+    return int(match[-1]) if match else None
+
+
+def _number(value: Any, default: Optional[float]) -> Optional[float]:
+    """``value`` as a float, or ``default`` if it is not numeric (criteria are free-form JSON)."""
+    if value is None or isinstance(value, (bool, dict, list)):
+        return default
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return default
+    return number if math.isfinite(number) else default
+
+
+def _keywords(value: Any) -> List[str]:
+    return [k.lower() for k in value if isinstance(k, str)] if isinstance(value, list) else []
+
+
+def _issue_matches(issue: Dict[str, Any], comments: List[Tuple[Optional[int], str]]) -> Tuple[bool, float]:
+    line = _number(issue.get("line"), None)
+    tolerance = _number(issue.get("tolerance"), 0)
+    keywords = _keywords(issue.get("keywords"))
+    best = 0.0
+    found = False
+    for comment_line, text in comments:
+        if line is not None and (comment_line is None or abs(comment_line - line) > tolerance):
+            continue
+        found = True
+        if not keywords:
+            return True, 1.0
+        lowered = text.lower()
+        best = max(best, sum(1 for k in keywords if k in lowered) / len(keywords))
+    # Finding the right spot earns half credit, naming the problem earns the rest
+    return found, (0.5 + 0.5 * best) if found else 0.0
+
+
+def score_submission(
+    comments: Dict[str, str],
+    overall_feedback: Optional[str],
+    criteria: Optional[Dict[str, Any]],
+) -> Tuple[float, Dict[str, Any]]:
+    """
+    Score a single submission. Pure function so it can run in worker processes.
+
+    Malformed parts of ``criteria`` (a non-object ``weights``, issues that are
+    not objects, non-numeric values) are ignored in favour of the defaults.
+    """
+    criteria = criteria if isinstance(criteria, dict) else {}
+    custom_weights = criteria.get("weights")
+    weights = {
+        name: _number(custom_weights.get(name) if isinstance(custom_weights, dict) else None, default)
+        for name, default in DEFAULT_WEIGHTS.items()
+    }
+    parsed = [(_parse_line(key), text or "") for key, text in (comments or {}).items()]
+    all_text = " ".join([text for _, text in parsed] + [overall_feedback or ""]).lower()
+
+    issues = criteria.get("expected_issues")
+    issues = [issue for issue in issues if isinstance(issue, dict)] if isinstance(issues, list) else []
+    issue_results = []
+    issue_points = 0.0
+    issue_total = 0.0
+    for issue in issues:
+        weight = _number(issue.get("weight"), 1)
+        found, credit = _issue_matches(issue, parsed)
+        issue_total += weight
+        issue_points += weight * credit
+        issue_results.append({"line": issue.get("line"), "found": found, "credit": round(credit, 3)})
+    issues_score = issue_points / issue_total if issue_total else None
+
+    keywords = _keywords(criteria.get("keywords"))
+    matched_keywords = [k for k in keywords if k in all_text]
+    keywords_score = len(matched_keywords) / len(keywords) if keywords else None
+
+    min_length = _number(criteria.get("min_comment_length"), 20)
+    substantive = sum(1 for _, text in parsed if len(text.strip()) >= min_length)
+    completeness_parts = []
+    if parsed:
+        completeness_parts.append(substantive / len(parsed))
+    completeness_parts.append(1.0 if (overall_feedback or "").strip() else 0.0)
+    completeness_score = sum(completeness_parts) / len(completeness_parts)
+
+    components = {"issues": issues_score, "keywords": keywords_score, "completeness": completeness_score}
+    applicable = {name: value for name, value in components.items() if value is not None}
+    weight_sum = sum(weights.get(name, 0) for name in applicable)
+    if weight_sum:
+        score = 100.0 * sum(weights.get(name, 0) * value for name, value in applicable.items()) / weight_sum
+    else:
+        score = 0.0
+
+    details = {
+        "components": {name: (round(value, 4) if value is not None else None) for name, value in components.items()},
+        "expected_issues": issue_results,
+        "matched_keywords": matched_keywords,
+        "comment_count": len(parsed),
+        "criteria_fingerprint": criteria_fingerprint(criteria),
+    }
+    return round(score, 2), details
+
+
+def _score_chunk(
+    rows: List[Tuple[int, Dict[str, str], Optional[str]]],
+    criteria: Optional[Dict[str, Any]],
+) -> List[Tuple[int, float, Dict[str, Any]]]:
+    results = []
+    for submission_id, comments, overall_feedback in rows:
+        score, details = score_submission(comments, overall_feedback, criteria)
+        results.append((submission_id, score, details))
+    return results
+
+
+class EvaluationEngine:
+    def __init__(self, workers: int = settings.evaluation_workers, chunk_size: int = settings.evaluation_chunk_size):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self._pool: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def pool(self) -> Executor:
+        with self._lock:
+            if self._pool is None:
+                # spawn avoids forking a process that is running server threads
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers or None,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._pool
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
+
+    def _store(self, db: Session, results: List[Tuple[int, float, Dict[str, Any]]]) -> None:
+        now = datetime.utcnow()
+        evaluations = stats.record_evaluations(db, {submission_id: score for submission_id, score, _ in results})
+        webhooks.record_evaluations(db, evaluations)
+        db.execute(
+            update(CodeReviewSubmission),
+            [
+                {
+                    "id": submission_id,
+                    "is_evaluated": True,
+                    "evaluation_score": score,
+                    "evaluation_details": details,
+                    "criteria_fingerprint": details["criteria_fingerprint"],
+                    "evaluated_at": now,
+                }
+                for submission_id, score, details in results
+            ],
+        )
+        db.commit()
+        ranking_engine.observe(evaluations)
+        response_cache.invalidate(*{f"ranking:{e['assessment_id']}" for e in evaluations})
+        webhooks.webhook_dispatcher.notify()
+
+    def rescore_assessment(self, assessment_id: int, force: bool = False) -> int:
+        """Score every submission of an assessment not yet scored with its current criteria."""
+        db = SessionLocal()
+        try:
+            assessment = db.get(Assessment, assessment_id)
+            if not assessment:
+                return 0
+            criteria = assessment.evaluation_criteria
+            fingerprint = criteria_fingerprint(criteria)
+            query = select(
+                CodeReviewSubmission.id,
+                CodeReviewSubmission.comments,
+                CodeReviewSubmission.overall_feedback,
+            ).where(CodeReviewSubmission.assessment_id == assessment_id)
+            if not force:
+                query = query.where(or_(
+                    CodeReviewSubmission.criteria_fingerprint.is_(None),
+                    CodeReviewSubmission.criteria_fingerprint != fingerprint,
+                ))
+            # Keyset pagination keeps memory bounded; at most a few chunks are in flight
+            max_in_flight = 2 * (self.workers or multiprocessing.cpu_count())
+            in_flight = []
+            total = 0
+            last_id = 0
+            while True:
+                chunk = [tuple(row) for row in db.execute(
+                    query.where(CodeReviewSubmission.id > last_id)
+                    .order_by(CodeReviewSubmission.id)
+                    .limit(self.chunk_size)
+                )]
+                if not chunk:
+                    break
+                last_id = chunk[-1][0]
+                total += len(chunk)
+                if total == len(chunk) and len(chunk) < self.chunk_size:
+                    # A single small batch is not worth the inter-process round trip
+                    self._store(db, _score_chunk(chunk, criteria))
+                    break
+                in_flight.append(self.pool.submit(_score_chunk, chunk, criteria))
+                if len(in_flight) >= max_in_flight:
+                    self._store(db, in_flight.pop(0).result())
+            for future in in_flight:
+                self._store(db, future.result())
+            return total
+        finally:
+            db.close()
+
+    def evaluate_submission(self, db: Session, submission: CodeReviewSubmission) -> CodeReviewSubmission:
+        assessment = db.get(Assessment, submission.assessment_id)
+        criteria = assessment.evaluation_criteria if assessment else None
+        score, details = score_submission(submission.comments, submission.overall_feedback, criteria)
+        evaluations = stats.record_evaluations(db, {submission.id: score})
+        webhooks.record_evaluations(db, evaluations)
+        submission.is_evaluated = True
+        submission.evaluation_score = score
+        submission.evaluation_details = details
+        submission.criteria_fingerprint = details["criteria_fingerprint"]
+        submission.evaluated_at = datetime.utcnow()
+        db.commit()
+        ranking_engine.observe(evaluations)
+        response_cache.invalidate(f"ranking:{submission.assessment_id}")
+        webhooks.webhook_dispatcher.notify()
+        db.refresh(submission)
+        return submission
+
+    def schedule_rescore(self, assessment_id: int, force: bool = False) -> None:
+        # Coalesce: a queued rescore will also pick up anything committed before it starts
+        enqueue(
+            "evaluation.rescore",
+            {"assessment_id": assessment_id, "force": force},
+            unique_key=f"evaluation.rescore:{assessment_id}:{int(force)}",
+        )
+
+    def schedule_new_submissions(self, submissions: List[CodeReviewSubmission]) -> None:
+        """Buffer hook: score freshly committed submissions off the request path."""
+        for assessment_id in {s.assessment_id for s in submissions}:
+            self.schedule_rescore(assessment_id)
+
+
+evaluation_engine = EvaluationEngine()
+
+
+@job_handler("evaluation.rescore", max_attempts=3, concurrency=2)
+def rescore_assessment_job(assessment_id: int, force: bool = False) -> Dict[str, int]:
+    return {"scored": evaluation_engine.rescore_assessment(assessment_id, force)}
@@ -0,0 +1,315 @@
+"""
+Bulk assessment invitations.
+
+Creating a campaign assigns the assessment to every targeted candidate in a
+single transaction: candidate ids are streamed in chunks (an explicit list,
+or a keyset scan over a filter), already-invited candidates are skipped with
+one set-based query per chunk, and the rest are inserted with
+``executemany`` together with the ``assigned`` counter update. Memory stays
+bounded by the chunk size.
+
+Emails are sent afterwards by an ``invitations.send`` job, queued in the same
+transaction as the campaign. ``CampaignSender`` pages through the campaign's
+pending invitations, sends each page through a small thread pool under a
+token-bucket rate limit, and records progress on the campaign after every
+page. The job type runs one campaign at a time across all job workers, so
+the send rate holds for the whole deployment and no invitation is sent by
+two processes at once. A campaign interrupted by a shutdown or crash is
+retried by the job queue and continues with the invitations still pending.
+
+Invite tokens are ``<invitation id>.<HMAC(secret_key, id:salt)>`` and are
+recomputed when needed, so no token is ever stored or held in memory.
+"""
+
+import base64
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..db import SessionLocal
+from ..models.assessment import Assessment
+from ..models.candidate import Candidate
+from ..models.invitation import AssessmentInvitation, InvitationCampaign
+from . import jobs, stats
+from .email import invitation_client, send_invitation_email
+from .jobs import job_handler
+
+
+class InvitationError(Exception):
+    """Raised for an invalid or expired invite token."""
+
+
+class CampaignInterrupted(Exception):
+    """Raised when sending stops for a shutdown; the job is retried and resumes."""
+
+
+def invite_token(invitation_id: int, salt: str) -> str:
+    mac = hmac.new(settings.secret_key.encode(), f"invite:{invitation_id}:{salt}".encode(), hashlib.sha256).digest()
+    return f"{invitation_id}.{base64.urlsafe_b64encode(mac[:24]).decode()}"
+
+
+def invite_link(invitation_id: int, salt: str) -> str:
+    return f"{settings.app_base_url}/api/invitations/accept?token={invite_token(invitation_id, salt)}"
+
+
+def _candidate_id_chunks(
+    db: Session,
+    candidate_ids: Optional[List[int]],
+    candidate_filter: Optional[Dict[str, Any]],
+    chunk_size: int,
+) -> Iterator[List[int]]:
+    if candidate_ids is not None:
+        unique = sorted(set(candidate_ids))
+        for start in range(0, len(unique), chunk_size):
+            chunk = unique[start:start + chunk_size]
+            # Drop ids that do not exist
+            yield list(db.scalars(select(Candidate.id).where(Candidate.id.in_(chunk))))
+        return
+    candidate_filter = candidate_filter or {}
+    conditions = []
+    if candidate_filter.get("email_domain"):
+        conditions.append(Candidate.email.like(f"%@{candidate_filter['email_domain'].lower()}"))
+    if candidate_filter.get("created_after"):
+        conditions.append(Candidate.created_at >= candidate_filter["created_after"])
+    if candidate_filter.get("created_before"):
+        conditions.append(Candidate.created_at < candidate_filter["created_before"])
+    last_id = 0
+    while True:
+        chunk = list(db.scalars(
+            select(Candidate.id).where(Candidate.id > last_id, *conditions).order_by(Candidate.id).limit(chunk_size)
+        ))
+        if not chunk:
+            return
+        yield chunk
+        last_id = chunk[-1]
+
+
+def create_campaign(
+    db: Session,
+    assessment_id: int,
+    name: Optional[str] = None,
+    candidate_ids: Optional[List[int]] = None,
+    candidate_filter: Optional[Dict[str, Any]] = None,
+    expires_in_hours: int = settings.invitation_expiry_hours,
+    chunk_size: int = settings.invitation_chunk_size,
+) -> InvitationCampaign:
+    """Assign the assessment to the targeted candidates in one transaction."""
+    now = datetime.utcnow()
+    campaign = InvitationCampaign(
+        assessment_id=assessment_id,
+        name=name,
+        candidate_filter=candidate_filter,
+        status="sending",
+        expires_at=now + timedelta(hours=expires_in_hours),
+        created_at=now,
+    )
+    db.add(campaign)
+    db.flush()
+
+    insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    stmt = insert(AssessmentInvitation).on_conflict_do_nothing(index_elements=["assessment_id", "candidate_id"])
+    try:
+        for chunk in _candidate_id_chunks(db, candidate_ids, candidate_filter, chunk_size):
+            invited = set(db.scalars(
+                select(AssessmentInvitation.candidate_id).where(
+                    AssessmentInvitation.assessment_id == assessment_id,
+                    AssessmentInvitation.candidate_id.in_(chunk),
+                )
+            ))
+            rows = [
+                {
+                    "campaign_id": campaign.id,
+                    "assessment_id": assessment_id,
+                    "candidate_id": candidate_id,
+                    "salt": secrets.token_hex(16),
+                    "status": "pending",
+                    "created_at": now,
+                    "expires_at": campaign.expires_at,
+                }
+                for candidate_id in chunk if candidate_id not in invited
+            ]
+            campaign.total += len(chunk)
+            campaign.skipped += len(invited)
+            if rows:
+                db.execute(stmt, rows)
+                stats.adjust(db, [(assessment_id, row["candidate_id"], {"assigned": 1}) for row in rows])
+        # A concurrent campaign may have claimed some pairs; count what this one actually owns.
+        # Any resulting drift in ``assigned`` is repaired by stats.reconcile.
+        campaign.created = db.scalar(
+            select(func.count()).select_from(AssessmentInvitation).where(AssessmentInvitation.campaign_id == campaign.id)
+        )
+        campaign.skipped = campaign.total - campaign.created
+        if not campaign.created:
+            campaign.status, campaign.completed_at = "completed", datetime.utcnow()
+        else:
+            jobs.enqueue("invitations.send", {"campaign_id": campaign.id},
+                         unique_key=f"invitations.send:{campaign.id}", db=db)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    db.refresh(campaign)
+    return campaign
+
+
+def accept_invitation(db: Session, token: str) -> AssessmentInvitation:
+    invitation_id, _, _ = token.partition(".")
+    invitation = db.get(AssessmentInvitation, int(invitation_id)) if invitation_id.isdigit() else None
+    if invitation is None or not hmac.compare_digest(invite_token(invitation.id, invitation.salt), token):
+        raise InvitationError("Invalid invitation")
+    if invitation.expires_at.replace(tzinfo=None) < datetime.utcnow():
+        raise InvitationError("Invitation expired")
+    if invitation.accepted_at is None:
+        invitation.status, invitation.accepted_at = "accepted", datetime.utcnow()
+        db.commit()
+    return invitation
+
+
+class RateLimiter:
+    """Token bucket allowing ``rate`` acquisitions per second, with bursts up to one second's worth."""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class CampaignSender:
+    def __init__(
+        self,
+        batch_size: int = settings.invitation_send_batch_size,
+        rate: float = settings.invitation_send_rate,
+        concurrency: int = settings.invitation_send_concurrency,
+    ):
+        self.batch_size = batch_size
+        self.limiter = RateLimiter(rate)
+        self.concurrency = concurrency
+        self._stop = threading.Event()
+
+    def shutdown(self) -> None:
+        """Make a running campaign stop after its current page."""
+        self._stop.set()
+
+    def run(self, campaign_id: int) -> None:
+        """Send a campaign, marking it failed on errors other than an interruption."""
+        try:
+            self.send_campaign(campaign_id)
+        except CampaignInterrupted:
+            raise
+        except Exception as e:
+            print(f"[CAMPAIGN_ERROR] campaign={campaign_id} {e}")
+            db = SessionLocal()
+            try:
+                db.execute(update(InvitationCampaign).where(InvitationCampaign.id == campaign_id)
+                           .values(status="failed", error=str(e), completed_at=datetime.utcnow()))
+                db.commit()
+            finally:
+                db.close()
+
+    def send_campaign(self, campaign_id: int) -> None:
+        db = SessionLocal()
+        try:
+            campaign = db.get(InvitationCampaign, campaign_id)
+            if campaign is None or campaign.status != "sending":
+                return
+            title = db.scalar(select(Assessment.title).where(Assessment.id == campaign.assessment_id)) or "Laksham"
+        finally:
+            db.close()
+
+        client = invitation_client()
+        started = time.perf_counter()
+        last_id = 0
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="campaign-send") as pool:
+            while not self._stop.is_set():
+                db = SessionLocal()
+                try:
+                    batch = db.execute(
+                        select(AssessmentInvitation.id, AssessmentInvitation.salt, Candidate.email)
+                        .join(Candidate, Candidate.id == AssessmentInvitation.candidate_id)
+                        .where(
+                            AssessmentInvitation.campaign_id == campaign_id,
+                            AssessmentInvitation.status == "pending",
+                            AssessmentInvitation.id > last_id,
+                        )
+                        .order_by(AssessmentInvitation.id)
+                        .limit(self.batch_size)
+                    ).all()
+                    if not batch:
+                        break
+                    if client is None:
+                        print(f"[EMAIL_DISABLED] campaign={campaign_id} {len(batch)} invitations, "
+                              f"first link: {invite_link(batch[0].id, batch[0].salt)}")
+                        results = [True] * len(batch)
+                    else:
+                        results = list(pool.map(lambda row: self._send_one(client, row, title), batch))
+                    self._record(db, campaign_id, batch, results)
+                finally:
+                    db.close()
+                last_id = batch[-1].id
+
+        if self._stop.is_set():
+            raise CampaignInterrupted(f"campaign {campaign_id} interrupted by shutdown")
+        db = SessionLocal()
+        try:
+            db.execute(update(InvitationCampaign).where(InvitationCampaign.id == campaign_id)
+                       .values(status="completed", completed_at=datetime.utcnow()))
+            db.commit()
+        finally:
+            db.close()
+        print(f"[CAMPAIGN] campaign={campaign_id} finished sending in {time.perf_counter() - started:.1f}s")
+
+    def _send_one(self, client, row, title: str) -> bool:
+        self.limiter.acquire()
+        return send_invitation_email(client, row.email, invite_link(row.id, row.salt), title)
+
+    def _record(self, db: Session, campaign_id: int, batch, results: List[bool]) -> None:
+        now = datetime.utcnow()
+        sent = [row.id for row, ok in zip(batch, results) if ok]
+        failed = [row.id for row, ok in zip(batch, results) if not ok]
+        if sent:
+            db.execute(update(AssessmentInvitation)
+                       .where(AssessmentInvitation.id.in_(sent), AssessmentInvitation.status == "pending")
+                       .values(status="sent", sent_at=now))
+        if failed:
+            db.execute(update(AssessmentInvitation)
+                       .where(AssessmentInvitation.id.in_(failed), AssessmentInvitation.status == "pending")
+                       .values(status="failed"))
+        db.execute(update(InvitationCampaign).where(InvitationCampaign.id == campaign_id).values(
+            sent=InvitationCampaign.sent + len(sent),
+            failed=InvitationCampaign.failed + len(failed),
+        ))
+        db.commit()
+
+
+campaign_sender = CampaignSender()
+
+
+@job_handler("invitations.send", max_attempts=10, concurrency=1)
+def send_campaign_job(campaign_id: int) -> None:
+    campaign_sender.run(campaign_id)
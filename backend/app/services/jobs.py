@@ -0,0 +1,454 @@
+"""
+Durable background jobs.
+
+Work that should not run on the request path (emails, evaluation, report
+files) is written to the ``jobs`` table with ``enqueue`` and run by
+``JobWorker``s, normally in the process pool started by ``run_jobs.py``, so
+it no longer competes with request handling for the web workers' CPU. Jobs
+survive restarts of both the web and the job processes, are retried with
+exponential backoff and jitter, and end up ``dead`` after ``max_attempts``,
+where they can be inspected and retried by hand.
+
+Handlers are plain functions registered under a type name::
+
+    @job_handler("email.verification", priority=10, max_attempts=8)
+    def send_verification_email(to_email: str, verify_link: str) -> None: ...
+
+The payload is passed as keyword arguments and must be JSON, as must the
+return value, which is stored as the job's ``result``. A job whose worker died
+is run again, so handlers must be idempotent.
+
+Due jobs are claimed highest ``priority`` first, then oldest ``run_at``; a
+``run_at`` in the future schedules a job. A type can be limited to
+``concurrency`` running jobs across all workers (``JOB_CONCURRENCY``
+overrides the handler's default). On Postgres the rows are selected
+``FOR UPDATE SKIP LOCKED``, so concurrent workers take disjoint jobs without
+waiting on each other. The running count of a limited type is read under a
+transaction-scoped advisory lock for that type; a worker that cannot take the
+lock skips the type for this round. SQLite has a single writer: the claim
+transaction starts with ``BEGIN IMMEDIATE`` and claims are serialized, which
+gives the same guarantees.
+
+A claimed job is leased to its worker until ``locked_until``, and the worker
+extends the lease while the handler runs. When a lease expires because the
+process crashed or hung, the job goes back to the queue and the run counts as
+an attempt. Succeeded jobs are deleted after ``JOB_RETENTION_HOURS``; dead
+ones are kept.
+
+``unique_key`` collapses duplicates: while a queued job with the same key
+exists, ``enqueue`` returns its id instead of adding another. A running job
+does not count, since it may have started before the change that asked for
+the new one.
+"""
+
+import hashlib
+import importlib
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..db import SessionLocal
+from ..models.job import Job
+
+
+# Modules whose handlers every worker loads
+HANDLER_MODULES = ("archive", "email", "evaluation", "invitations", "reports", "similarity", "stats")
+STATUSES = ("queued", "running", "succeeded", "dead")
+
+
+@dataclass(frozen=True)
+class JobType:
+    name: str
+    fn: Callable[..., Any]
+    priority: int = 0
+    max_attempts: int = 5
+    concurrency: Optional[int] = None  # None = unlimited
+
+
+HANDLERS: Dict[str, JobType] = {}
+
+
+def _concurrency_overrides(value: str) -> Dict[str, int]:
+    """Parse ``"email.verification=20,evaluation.rescore=4"``."""
+    limits = {}
+    for item in value.split(","):
+        name, sep, limit = item.strip().partition("=")
+        if sep and name.strip() and limit.strip():
+            limits[name.strip()] = int(limit)
+    return limits
+
+
+_CONCURRENCY = _concurrency_overrides(settings.job_concurrency)
+
+
+def job_handler(name: str, priority: int = 0, max_attempts: int = 5, concurrency: Optional[int] = None):
+    def register(fn: Callable[..., Any]) -> Callable[..., Any]:
+        HANDLERS[name] = JobType(name, fn, priority, max_attempts, _CONCURRENCY.get(name, concurrency))
+        return fn
+    return register
+
+
+def load_handlers() -> Dict[str, JobType]:
+    for module in HANDLER_MODULES:
+        importlib.import_module(f"{__package__}.{module}")
+    return HANDLERS
+
+
+def enqueue(
+    job_type: str,
+    payload: Optional[Dict[str, Any]] = None,
+    *,
+    priority: Optional[int] = None,
+    run_at: Optional[datetime] = None,
+    delay: float = 0,
+    unique_key: Optional[str] = None,
+    max_attempts: Optional[int] = None,
+    db: Optional[Session] = None,
+) -> int:
+    """
+    Queue a job and return its id. With ``db`` the job is staged in the
+    caller's transaction and exists only if the caller commits; otherwise it
+    is committed right away.
+    """
+    spec = HANDLERS.get(job_type)
+    if spec is None:
+        raise ValueError(f"Unknown job type: {job_type}")
+    session = db or SessionLocal()
+    try:
+        if unique_key is not None:
+            existing = session.scalar(
+                select(Job.id).where(Job.unique_key == unique_key, Job.status == "queued").limit(1)
+            )
+            if existing is not None:
+                return existing
+        now = datetime.utcnow()
+        job = Job(
+            type=job_type,
+            payload=payload or {},
+            priority=spec.priority if priority is None else priority,
+            status="queued",
+            unique_key=unique_key,
+            run_at=run_at or now + timedelta(seconds=delay),
+            attempts=0,
+            max_attempts=max_attempts or spec.max_attempts,
+            created_at=now,
+        )
+        session.add(job)
+        session.flush()
+        if db is None:
+            session.commit()
+            embedded_worker.notify()
+        return job.id
+    finally:
+        if db is None:
+            session.close()
+
+
+def retry(job: Job) -> Job:
+    """Re-queue a dead job with a fresh set of attempts; the caller commits."""
+    job.status, job.attempts, job.run_at, job.finished_at = "queued", 0, datetime.utcnow(), None
+    return job
+
+
+def _lock_key(job_type: str) -> int:
+    return int.from_bytes(hashlib.blake2b(job_type.encode(), digest_size=8).digest(), "big", signed=True)
+
+
+class JobWorker:
+    def __init__(
+        self,
+        threads: int = settings.job_threads,
+        types: Optional[Iterable[str]] = None,
+        poll_interval: float = settings.job_poll_interval_seconds,
+        lease_seconds: float = settings.job_lease_seconds,
+        backoff_base: float = settings.job_backoff_base_seconds,
+        backoff_max: float = settings.job_backoff_max_seconds,
+        retention_hours: float = settings.job_retention_hours,
+    ):
+        self.threads = threads
+        self.types = list(types) if types else None  # None = every registered type
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retention_hours = retention_hours
+        self.name = ""
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._running: Dict[int, Job] = {}
+        self.stats: Dict[str, int] = {"claimed": 0, "succeeded": 0, "retried": 0, "dead": 0, "recovered": 0}
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self.name = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+            self._stop.clear()
+            self._pool = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="job")
+            self._thread = threading.Thread(target=self._run, name="job-dispatcher", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 30.0) -> bool:
+        """Stop claiming and wait for running jobs; False if some were still running at the timeout."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        deadline = time.monotonic() + timeout
+        with self._idle:
+            while self._running and time.monotonic() < deadline:
+                self._idle.wait(deadline - time.monotonic())
+            drained = not self._running
+        if self._pool:
+            # Jobs still running keep their lease and are picked up again once it expires
+            self._pool.shutdown(wait=False)
+            self._pool = None
+        return drained
+
+    def notify(self, *args) -> None:
+        """Wake the dispatcher after jobs were queued or finished."""
+        self._wake.set()
+
+    def _run(self) -> None:
+        last_heartbeat = last_maintenance = 0.0
+        while not self._stop.is_set():
+            claimed = free = 0
+            try:
+                now = time.monotonic()
+                if now - last_heartbeat >= self.lease_seconds / 3:
+                    self._heartbeat()
+                    last_heartbeat = now
+                if now - last_maintenance >= self.lease_seconds:
+                    self.recover()
+                    last_maintenance = now
+                with self._lock:
+                    free = self.threads - len(self._running)
+                if free > 0:
+                    jobs = self.claim(free)
+                    claimed = len(jobs)
+                    with self._lock:
+                        for job in jobs:
+                            self._running[job.id] = job
+                    for job in jobs:
+                        self._pool.submit(self._execute, job)
+            except Exception as e:
+                print(f"[JOB_ERROR] {e}")
+            # Keep claiming while there is both work and room for it
+            if not claimed or claimed >= free:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def _served_types(self) -> List[str]:
+        return [t for t in (self.types or HANDLERS) if t in HANDLERS]
+
+    def claim(self, limit: int) -> List[Job]:
+        """Lease up to ``limit`` due jobs to this worker, respecting per-type concurrency limits."""
+        types = self._served_types()
+        if not types or limit <= 0:
+            return []
+        db = SessionLocal(expire_on_commit=False)
+        try:
+            now = datetime.utcnow()
+            # Plain read first, so idle workers do not take a write lock on every poll
+            due = db.scalar(
+                select(Job.id).where(Job.status == "queued", Job.type.in_(types), Job.run_at <= now).limit(1)
+            )
+            db.commit()
+            if due is None:
+                return []
+
+            postgres = db.get_bind().dialect.name == "postgresql"
+            if not postgres:
+                db.connection().exec_driver_sql("BEGIN IMMEDIATE")
+            limited = [t for t in types if HANDLERS[t].concurrency is not None]
+            if postgres:
+                locked = {t for t in limited if db.scalar(select(func.pg_try_advisory_xact_lock(_lock_key(t))))}
+                types = [t for t in types if t not in limited or t in locked]
+                limited = [t for t in limited if t in locked]
+            running = dict(db.execute(
+                select(Job.type, func.count()).where(Job.status == "running", Job.type.in_(limited)).group_by(Job.type)
+            ).all()) if limited else {}
+
+            candidates: List[Job] = []
+            for job_type in types:
+                slots = limit
+                if job_type in limited:
+                    slots = min(slots, HANDLERS[job_type].concurrency - running.get(job_type, 0))
+                if slots <= 0:
+                    continue
+                query = (
+                    select(Job)
+                    .where(Job.status == "queued", Job.type == job_type, Job.run_at <= now)
+                    .order_by(Job.priority.desc(), Job.run_at, Job.id)
+                    .limit(slots)
+                )
+                if postgres:
+                    query = query.with_for_update(skip_locked=True)
+                candidates.extend(db.scalars(query))
+            candidates.sort(key=lambda job: (-job.priority, job.run_at, job.id))
+            jobs = candidates[:limit]
+            if jobs:
+                db.execute(
+                    update(Job).where(Job.id.in_([job.id for job in jobs])).values(
+                        status="running",
+                        attempts=Job.attempts + 1,
+                        locked_by=self.name,
+                        locked_until=now + timedelta(seconds=self.lease_seconds),
+                        started_at=now,
+                    )
+                )
+            db.commit()
+        except BaseException:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        # The UPDATE was applied to the loaded rows too (attempts, lease), so they reflect the claim
+        self.stats["claimed"] += len(jobs)
+        return jobs
+
+    def _heartbeat(self) -> None:
+        with self._lock:
+            ids = list(self._running)
+        if not ids:
+            return
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(Job)
+                .where(Job.id.in_(ids), Job.locked_by == self.name, Job.status == "running")
+                .values(locked_until=datetime.utcnow() + timedelta(seconds=self.lease_seconds))
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def recover(self) -> int:
+        """Re-queue jobs whose lease expired and drop old finished jobs; returns the number re-queued."""
+        now = datetime.utcnow()
+        error = "Lease expired: the worker running this job stopped or hung"
+        expired = (Job.status == "running", Job.locked_until < now)
+        db = SessionLocal()
+        try:
+            dead = db.execute(
+                update(Job).where(*expired, Job.attempts >= Job.max_attempts)
+                .values(status="dead", finished_at=now, locked_by=None, locked_until=None, last_error=error)
+            ).rowcount
+            requeued = db.execute(
+                update(Job).where(*expired)
+                .values(status="queued", run_at=now, locked_by=None, locked_until=None, last_error=error)
+            ).rowcount
+            if self.retention_hours:
+                db.execute(delete(Job).where(
+                    Job.status == "succeeded", Job.finished_at < now - timedelta(hours=self.retention_hours)
+                ))
+            db.commit()
+        finally:
+            db.close()
+        if dead or requeued:
+            print(f"[JOB] Recovered {requeued} jobs with expired leases ({dead} out of attempts)")
+        self.stats["recovered"] += requeued
+        self.stats["dead"] += dead
+        return requeued
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (attempts - 1)))
+        return delay * random.uniform(0.8, 1.2)
+
+    def _execute(self, job: Job) -> None:
+        try:
+            result = HANDLERS[job.type].fn(**job.payload)
+        except Exception as e:
+            self._record(job, error=f"{type(e).__name__}: {e}")
+        else:
+            self._record(job, result=result)
+        finally:
+            with self._idle:
+                self._running.pop(job.id, None)
+                self._idle.notify_all()
+            self._wake.set()
+
+    def _record(self, job: Job, result: Any = None, error: Optional[str] = None) -> None:
+        now = datetime.utcnow()
+        if error is None:
+            values = {"status": "succeeded", "result": result, "last_error": None, "finished_at": now}
+            outcome = "succeeded"
+        elif job.attempts >= job.max_attempts:
+            values = {"status": "dead", "last_error": error, "finished_at": now}
+            outcome = "dead"
+        else:
+            values = {"status": "queued", "last_error": error, "run_at": now + timedelta(seconds=self._backoff(job.attempts))}
+            outcome = "retried"
+        if error is not None:
+            print(f"[JOB] {job.type} #{job.id} failed (attempt {job.attempts}/{job.max_attempts}): {error}")
+        db = SessionLocal()
+        try:
+            # Only while we still hold the lease; otherwise the job was recovered and belongs to someone else
+            updated = db.execute(
+                update(Job)
+                .where(Job.id == job.id, Job.locked_by == self.name, Job.status == "running")
+                .values(locked_by=None, locked_until=None, **values)
+            ).rowcount
+            db.commit()
+        except Exception as e:
+            print(f"[JOB_ERROR] Could not record the outcome of {job.type} #{job.id}: {e}")
+            return
+        finally:
+            db.close()
+        if updated:
+            self.stats[outcome] += 1
+        else:
+            print(f"[JOB] {job.type} #{job.id} lost its lease before finishing; outcome discarded")
+
+
+class PeriodicJob:
+    """
+    Queues ``job_type`` every ``interval`` seconds from each process that
+    starts it. The job type as unique key keeps at most one copy queued however
+    many web workers do this, and a ``concurrency=1`` type never runs twice at
+    once, so periodic maintenance runs once per interval for the deployment.
+    """
+
+    def __init__(self, job_type: str, interval: float, payload: Optional[Dict[str, Any]] = None):
+        self.job_type = job_type
+        self.interval = interval
+        self.payload = payload
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self.interval <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"periodic-{self.job_type}", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                enqueue(self.job_type, self.payload, unique_key=self.job_type)
+            except Exception as e:
+                print(f"[JOB_ERROR] Could not queue {self.job_type}: {e}")
+
+
+# Runs jobs inside the web process when JOB_EMBEDDED_THREADS is set (single-process setups)
+embedded_worker = JobWorker(threads=settings.job_embedded_threads or 1)
@@ -0,0 +1,525 @@
+"""
+Prometheus-compatible metrics without external dependencies.
+
+Samples are float64 slots in a per-process file mapped with ``mmap``: a
+recording is a dict lookup plus an in-place add, so it is cheap enough to
+leave on everywhere. With several uvicorn workers, set ``METRICS_DIR`` to a
+directory shared by the workers (and emptied before they start); ``/metrics``
+then merges every worker's files, so whichever worker answers the scrape
+reports the totals. Without it, values live in memory and cover this
+process only.
+
+Counters and histograms are summed over all files, including those of
+workers that have exited (they are monotonic). Gauges live in separate files
+and only the ones of running processes are summed; callback gauges (pool
+and thread usage) are sampled into them every
+``metrics_sample_interval_seconds`` and right before a scrape.
+
+Histograms are pre-bucketed: an observation increments exactly one bucket
+slot (found with ``bisect``) plus ``_sum`` and ``_count``, and buckets are
+only made cumulative when the exposition is rendered.
+"""
+
+import glob
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ..core.config import settings
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+
+_HEADER = struct.Struct("i")
+_VALUE = struct.Struct("d")
+
+
+class _MemoryValues:
+    """Sample store for single-process use."""
+
+    def __init__(self):
+        self._values: Dict[str, float] = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def add(self, key: str, amount: float) -> None:
+        with self._lock:
+            self._values[key] += amount
+
+    def add_many(self, changes: Sequence[Tuple[str, float]]) -> None:
+        with self._lock:
+            for key, amount in changes:
+                self._values[key] += amount
+
+    def set(self, key: str, value: float) -> None:
+        self._values[key] = value
+
+    def items(self) -> List[Tuple[str, float]]:
+        return list(self._values.items())
+
+
+class _MmapValues:
+    """
+    Append-only ``key -> float64`` map in a memory-mapped file, written by one
+    process and read by any. Layout: a 4-byte used-length header, then entries
+    of ``<int32 key length><key, padded to 8 bytes><float64>``. The header is
+    bumped only after an entry is fully written, so readers never see a torn entry.
+    """
+
+    def __init__(self, path: str, initial_size: int = 1 << 16):
+        self.path = path
+        self._file = open(path, "a+b")
+        if os.fstat(self._file.fileno()).st_size < initial_size:
+            self._file.truncate(initial_size)
+        self._capacity = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), self._capacity)
+        self._positions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._used = _HEADER.unpack_from(self._map, 0)[0] or 8
+        for key, _, position in _read_entries(self._map, self._used):
+            self._positions[key] = position
+
+    def _position(self, key: str) -> int:
+        position = self._positions.get(key)
+        if position is not None:
+            return position
+        encoded = key.encode("utf-8")
+        padded = len(encoded) + (8 - (len(encoded) + 4) % 8) % 8
+        needed = 4 + padded + 8
+        while self._used + needed > self._capacity:
+            self._capacity *= 2
+            self._file.truncate(self._capacity)
+            self._map.close()
+            self._map = mmap.mmap(self._file.fileno(), self._capacity)
+        start = self._used
+        self._map[start:start + 4 + padded] = struct.pack("i", len(encoded)) + encoded.ljust(padded, b" ")
+        position = start + 4 + padded
+        _VALUE.pack_into(self._map, position, 0.0)
+        self._used += needed
+        _HEADER.pack_into(self._map, 0, self._used)
+        self._positions[key] = position
+        return position
+
+    def add(self, key: str, amount: float) -> None:
+        with self._lock:
+            position = self._position(key)
+            _VALUE.pack_into(self._map, position, _VALUE.unpack_from(self._map, position)[0] + amount)
+
+    def add_many(self, changes: Sequence[Tuple[str, float]]) -> None:
+        with self._lock:
+            for key, amount in changes:
+                position = self._position(key)
+                data = self._map
+                _VALUE.pack_into(data, position, _VALUE.unpack_from(data, position)[0] + amount)
+
+    def set(self, key: str, value: float) -> None:
+        with self._lock:
+            _VALUE.pack_into(self._map, self._position(key), value)
+
+    def items(self) -> List[Tuple[str, float]]:
+        with self._lock:
+            return [(key, value) for key, value, _ in _read_entries(self._map, self._used)]
+
+
+def _read_entries(data, used: int) -> Iterable[Tuple[str, float, int]]:
+    offset = 8
+    while offset < used:
+        length = struct.unpack_from("i", data, offset)[0]
+        padded = length + (8 - (length + 4) % 8) % 8
+        key = bytes(data[offset + 4:offset + 4 + length]).decode("utf-8")
+        position = offset + 4 + padded
+        yield key, _VALUE.unpack_from(data, position)[0], position
+        offset = position + 8
+
+
+def _read_file(path: str) -> List[Tuple[str, float]]:
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < 8:
+        return []
+    return [(key, value) for key, value, _ in _read_entries(data, _HEADER.unpack_from(data, 0)[0])]
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _sample_key(sample: str, labels: Sequence[Tuple[str, str]]) -> str:
+    return json.dumps([sample, list(labels)], separators=(",", ":"))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, registry: "Registry", name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        registry.register(self)
+
+    def labels(self, *values):
+        """Bound child for one label combination (cached, so reuse is a dict lookup)."""
+        if self.registry.pid != os.getpid():
+            self.registry.reopen()
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self._children[values] = self._child(tuple(zip(self.labelnames, map(str, values))))
+        return child
+
+
+class _CounterChild:
+    def __init__(self, metric: "Counter", labels):
+        self._store = metric.registry.accumulating
+        self._key = _sample_key(metric.name + "_total", labels)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._store.add(self._key, amount)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def _child(self, labels):
+        return _CounterChild(self, labels)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+
+class _GaugeChild:
+    def __init__(self, metric: "Gauge", labels):
+        self._store = metric.registry.live
+        self._key = _sample_key(metric.name, labels)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._store.add(self._key, amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._store.add(self._key, -amount)
+
+    def set(self, value: float) -> None:
+        self._store.set(self._key, value)
+
+
+class Gauge(Metric):
+    """Summed over running processes."""
+
+    kind = "gauge"
+
+    def _child(self, labels):
+        return _GaugeChild(self, labels)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.labels().dec(amount)
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+
+class _HistogramChild:
+    def __init__(self, metric: "Histogram", labels):
+        self._store = metric.registry.accumulating
+        self._bounds = metric.buckets
+        self._bucket_keys = [
+            _sample_key(metric.name + "_bucket", labels + (("le", _format_bound(bound)),))
+            for bound in metric.buckets + (float("inf"),)
+        ]
+        self._sum_key = _sample_key(metric.name + "_sum", labels)
+        self._count_key = _sample_key(metric.name + "_count", labels)
+
+    def observe(self, value: float) -> None:
+        self._store.add_many((
+            (self._bucket_keys[bisect_left(self._bounds, value)], 1.0),
+            (self._sum_key, value),
+            (self._count_key, 1.0),
+        ))
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(float(bound))
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+        super().__init__(registry, name, documentation, labelnames)
+
+    def _child(self, labels):
+        return _HistogramChild(self, labels)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+
+class Registry:
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self.metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self.pid: Optional[int] = None
+        self.reopen()
+
+    def reopen(self) -> None:
+        """Open this process's sample files; called again after a fork so each worker writes its own."""
+        self.pid = os.getpid()
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            live_path = os.path.join(self.directory, f"live_{self.pid}.db")
+            # A recycled pid must not inherit the gauges of the process that used it before
+            if os.path.exists(live_path):
+                os.unlink(live_path)
+            self._accumulating = _MmapValues(os.path.join(self.directory, f"acc_{self.pid}.db"))
+            self._live = _MmapValues(live_path)
+        else:
+            self._accumulating = _MemoryValues()
+            self._live = _MemoryValues()
+        for metric in self.metrics.values():
+            metric._children.clear()
+
+    @property
+    def accumulating(self):
+        return self._accumulating
+
+    @property
+    def live(self):
+        return self._live
+
+    def register(self, metric: Metric) -> None:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return Counter(self, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return Gauge(self, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return Histogram(self, name, documentation, labelnames, buckets)
+
+    def add_collector(self, collect: Callable[[], None]) -> None:
+        """Register a callback that refreshes callback gauges (pool sizes, queue depths)."""
+        self._collectors.append(collect)
+
+    def sample(self) -> None:
+        for collect in self._collectors:
+            try:
+                collect()
+            except Exception as e:
+                print(f"[METRICS_ERROR] collector failed: {e}")
+
+    def _samples(self) -> Dict[str, float]:
+        totals: Dict[str, float] = defaultdict(float)
+        if self.pid != os.getpid():
+            self.reopen()
+        if not self.directory:
+            sources = [self._accumulating.items(), self._live.items()]
+        else:
+            sources = []
+            for path in glob.glob(os.path.join(self.directory, "*.db")):
+                kind, _, pid = os.path.basename(path)[:-3].partition("_")
+                if kind == "live" and not _pid_alive(int(pid)):
+                    try:
+                        os.unlink(path)
+                    except OSError:
+                        pass
+                    continue
+                try:
+                    sources.append(_read_file(path))
+                except (OSError, ValueError, struct.error) as e:
+                    print(f"[METRICS_ERROR] unreadable {path}: {e}")
+        for source in sources:
+            for key, value in source:
+                totals[key] += value
+        return totals
+
+    def render(self) -> str:
+        """Prometheus text exposition of every registered metric, merged over all workers."""
+        self.sample()
+        grouped: Dict[str, List[Tuple[str, List[Tuple[str, str]], float]]] = defaultdict(list)
+        for key, value in self._samples().items():
+            sample, labels = json.loads(key)
+            for suffix in ("_total", "_bucket", "_sum", "_count", ""):
+                base = sample[: -len(suffix)] if suffix else sample
+                if sample.endswith(suffix) and base in self.metrics:
+                    grouped[base].append((sample, labels, value))
+                    break
+        lines: List[str] = []
+        for name in sorted(self.metrics):
+            metric = self.metrics[name]
+            family = name + "_total" if metric.kind == "counter" else name
+            lines.append(f"# HELP {family} {metric.documentation}")
+            lines.append(f"# TYPE {family} {metric.kind}")
+            samples = grouped.get(name, [])
+            if metric.kind == "histogram":
+                samples = _cumulative(metric, samples)
+            for sample, labels, value in sorted(samples, key=_sort_key):
+                label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+                lines.append(f"{sample}{{{label_text}}} {value!r}" if label_text else f"{sample} {value!r}")
+        return "\n".join(lines) + "\n"
+
+
+def _sort_key(sample):
+    name, labels, _ = sample
+    le = next((v for k, v in labels if k == "le"), None)
+    other = [(k, v) for k, v in labels if k != "le"]
+    return (other, name, float(le) if le is not None else 0.0)
+
+
+def _cumulative(metric: "Histogram", samples):
+    """Turn per-bucket counts into the cumulative series, emitting every bucket including ``+Inf``."""
+    result = []
+    counts: Dict[Tuple, Dict[str, float]] = defaultdict(dict)
+    for sample, labels, value in samples:
+        if sample.endswith("_bucket"):
+            series = tuple(tuple(pair) for pair in labels if pair[0] != "le")
+            counts[series][next(v for k, v in labels if k == "le")] = value
+        else:
+            result.append((sample, labels, value))
+    for series, by_bound in counts.items():
+        running = 0.0
+        for bound in metric.buckets + (float("inf"),):
+            le = _format_bound(bound)
+            running += by_bound.get(le, 0.0)
+            result.append((metric.name + "_bucket", [*series, ("le", le)], running))
+    return result
+
+
+registry = Registry(settings.metrics_dir or None)
+
+http_requests = registry.counter(
+    "laksham_http_requests", "HTTP requests by route and status class",
+    ("method", "route", "status"),
+)
+http_request_duration = registry.histogram(
+    "laksham_http_request_duration_seconds", "HTTP request latency by route", ("method", "route"),
+)
+http_in_flight = registry.gauge("laksham_http_requests_in_flight", "HTTP requests being handled", ("method",))
+cache_requests = registry.counter(
+    "laksham_cache_requests", "Cache lookups by cache and result", ("cache", "result"),
+)
+db_pool = registry.gauge(
+    "laksham_db_pool_connections", "Database pool connections by engine and state", ("engine", "state"),
+)
+threadpool = registry.gauge(
+    "laksham_threadpool_threads", "Worker threads of the request thread pool by state", ("pool", "state"),
+)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Hook for caches: count one lookup (``hit_ratio = hit / (hit + miss)``)."""
+    cache_requests.labels(cache, "hit" if hit else "miss").inc()
+
+
+def track_engines(engines: Dict[str, object]) -> None:
+    """Sample the connection pool of each ``{name: engine}`` into ``laksham_db_pool_connections``."""
+
+    def collect() -> None:
+        for name, engine in engines.items():
+            pool = engine.pool
+            for state, reader in (("size", "size"), ("checked_out", "checkedout"), ("idle", "checkedin"),
+                                  ("overflow", "overflow")):
+                read = getattr(pool, reader, None)
+                if read is not None:
+                    db_pool.labels(name, state).set(max(read(), 0))
+
+    registry.add_collector(collect)
+
+
+def track_thread_limiter(name: str, limiter) -> None:
+    """Sample an anyio ``CapacityLimiter`` (the pool running sync endpoints) for saturation."""
+
+    def collect() -> None:
+        threadpool.labels(name, "busy").set(limiter.borrowed_tokens)
+        threadpool.labels(name, "capacity").set(limiter.total_tokens)
+
+    registry.add_collector(collect)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware timing every HTTP request. Routes are labelled by
+    their path template (``/api/candidates/{candidate_id}``), so label
+    cardinality is bounded; unmatched paths share ``route="unmatched"``.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        status_code = 500
+        in_flight = http_in_flight.labels(method)
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_flight.dec()
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            http_request_duration.labels(method, template).observe(elapsed)
+            http_requests.labels(method, template, f"{status_code // 100}xx").inc()
+
+
+class Sampler:
+    """Refreshes callback gauges periodically so other workers' scrapes see this worker's pools."""
+
+    def __init__(self, interval: float = settings.metrics_sample_interval_seconds):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self.interval <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="metrics-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            registry.sample()
+
+
+sampler = Sampler()
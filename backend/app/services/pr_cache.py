@@ -0,0 +1,407 @@
+"""
+Local-first snapshot store for pull request content.
+
+PR content is fetched once (from GitHub, a local git checkout or a fixture
+directory) and written to a content-addressed cache on disk::
+
+    <root>/objects/ab/cdef...       file contents and diffs, keyed by sha256
+    <root>/snapshots/<key>.json     immutable manifest, key = (repo, pr, head sha)
+    <root>/refs/<key>.json          latest known head sha for (repo, pr)
+
+Because snapshot keys include the head SHA, a snapshot never changes once
+written and never needs invalidating; a new push simply produces a new key.
+
+Git and fixture imports read from the server's filesystem, so they only accept
+directories under ``PR_IMPORT_ROOT`` (and are disabled when it is unset), and
+revisions are verified as commits before they reach a ``git`` command line.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import re
+import subprocess
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+
+from ..core.config import settings
+from ..schemas import PRData, PRFile
+from .diff_parser import DiffIndex, parse_unified_diff
+from .metrics import record_cache
+
+
+GITHUB_API = "https://api.github.com"
+_GITHUB_URL_RE = re.compile(r"github\.com[/:]([^/]+)/([^/.]+?)(?:\.git)?/?$")
+
+
+class PRSnapshotError(Exception):
+    """Raised when PR content cannot be fetched or imported."""
+
+
+def _digest(*parts: str) -> str:
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+def parse_github_url(url: str) -> Tuple[str, str]:
+    match = _GITHUB_URL_RE.search(url.strip())
+    if not match:
+        raise PRSnapshotError(f"Not a GitHub repository URL: {url}")
+    return match.group(1), match.group(2)
+
+
+def diff_file_stats(diff_text: str) -> Dict[str, Tuple[int, int]]:
+    """Count added and removed lines per file in a unified diff."""
+    return {
+        parsed.filename: (parsed.additions, parsed.deletions)
+        for parsed in parse_unified_diff(diff_text.splitlines(keepends=True))
+    }
+
+
+class PRSnapshotStore:
+    def __init__(
+        self,
+        root: str = settings.pr_cache_dir,
+        import_root: str = settings.pr_import_root,
+        max_snapshots: int = settings.pr_cache_max_snapshots,
+    ):
+        self.root = Path(root)
+        self.import_root = import_root
+        # Manifests are immutable, so parsed copies never go stale; they are
+        # only evicted, least recently used first, to bound memory
+        self.max_snapshots = max_snapshots
+        self._manifests: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._diff_indexes: "OrderedDict[str, DiffIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _recall(self, cache: OrderedDict, key: str) -> Any:
+        with self._lock:
+            value = cache.get(key)
+            if value is not None:
+                cache.move_to_end(key)
+            return value
+
+    def _remember(self, cache: OrderedDict, key: str, value: Any) -> Any:
+        with self._lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            while len(cache) > self.max_snapshots:
+                cache.popitem(last=False)
+            return value
+
+    # -- blob storage -------------------------------------------------------
+
+    def _object_path(self, digest: str) -> Path:
+        return self.root / "objects" / digest[:2] / digest[2:]
+
+    def _atomic_write(self, path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        except Exception:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+    def put_blob(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if not path.exists():
+            self._atomic_write(path, data)
+        return digest
+
+    def read_blob(self, digest: str) -> memoryview:
+        """
+        Map a blob read-only. Slicing the returned view does not copy, so
+        callers only pay for the pages they actually touch.
+        """
+        path = self._object_path(digest)
+        try:
+            with open(path, "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return memoryview(b"")  # empty files cannot be mapped
+                return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        except FileNotFoundError:
+            raise PRSnapshotError(f"Missing cache object {digest}")
+
+    # -- snapshots ----------------------------------------------------------
+
+    def snapshot_key(self, repo: str, pr_number: int, head_sha: str) -> str:
+        return _digest(repo, str(pr_number), head_sha)
+
+    def _snapshot_path(self, key: str) -> Path:
+        return self.root / "snapshots" / f"{key}.json"
+
+    def _ref_path(self, repo: str, pr_number: int) -> Path:
+        return self.root / "refs" / f"{_digest(repo, str(pr_number))}.json"
+
+    def has_snapshot(self, repo: str, pr_number: int, head_sha: str) -> bool:
+        return self._snapshot_path(self.snapshot_key(repo, pr_number, head_sha)).exists()
+
+    def head_sha(self, repo: str, pr_number: int) -> Optional[str]:
+        path = self._ref_path(repo, pr_number)
+        if not path.exists():
+            return None
+        return json.loads(path.read_text())["head_sha"]
+
+    def _set_ref(self, repo: str, pr_number: int, head_sha: str) -> str:
+        self._atomic_write(
+            self._ref_path(repo, pr_number),
+            json.dumps({"head_sha": head_sha, "updated_at": datetime.now(timezone.utc).isoformat()}).encode("utf-8"),
+        )
+        return self.snapshot_key(repo, pr_number, head_sha)
+
+    def save_snapshot(
+        self,
+        repo: str,
+        pr_number: int,
+        head_sha: str,
+        metadata: Dict[str, Any],
+        diff_text: str,
+        file_contents: Dict[str, str],
+    ) -> str:
+        """Store a snapshot and point the (repo, pr) ref at it. Returns the snapshot key."""
+        key = self.snapshot_key(repo, pr_number, head_sha)
+        if not self._snapshot_path(key).exists():
+            stats = diff_file_stats(diff_text)
+            files = []
+            for filename in sorted(set(stats) | set(file_contents)):
+                added, removed = stats.get(filename, (0, 0))
+                files.append({
+                    "filename": filename,
+                    "blob": self.put_blob(file_contents.get(filename, "").encode("utf-8")),
+                    "additions": added,
+                    "deletions": removed,
+                    "changes": added + removed,
+                })
+            manifest = {
+                **metadata,
+                "repo": repo,
+                "number": pr_number,
+                "head_sha": head_sha,
+                "diff": self.put_blob(diff_text.encode("utf-8")),
+                "files": files,
+            }
+            self._atomic_write(self._snapshot_path(key), json.dumps(manifest).encode("utf-8"))
+        return self._set_ref(repo, pr_number, head_sha)
+
+    def load_manifest(self, repo: str, pr_number: int, head_sha: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        head_sha = head_sha or self.head_sha(repo, pr_number)
+        if not head_sha:
+            return None
+        key = self.snapshot_key(repo, pr_number, head_sha)
+        manifest = self._recall(self._manifests, key)
+        if manifest is None:
+            path = self._snapshot_path(key)
+            if not path.exists():
+                return None
+            manifest = self._remember(self._manifests, key, json.loads(path.read_text()))
+        return manifest
+
+    def load_pr(self, repo: str, pr_number: int, head_sha: Optional[str] = None) -> Optional[PRData]:
+        manifest = self.load_manifest(repo, pr_number, head_sha)
+        if manifest is None:
+            return None
+        files = [
+            PRFile(
+                filename=entry["filename"],
+                content=str(self.read_blob(entry["blob"]), "utf-8", "replace"),
+                additions=entry["additions"],
+                deletions=entry["deletions"],
+                changes=entry["changes"],
+            )
+            for entry in manifest["files"]
+        ]
+        return PRData(
+            number=manifest["number"],
+            title=manifest["title"],
+            body=manifest.get("body"),
+            state=manifest.get("state", "open"),
+            created_at=manifest["created_at"],
+            updated_at=manifest["updated_at"],
+            files=files,
+            diff_url=manifest.get("diff_url", ""),
+        )
+
+    def load_diff(self, repo: str, pr_number: int, head_sha: Optional[str] = None) -> Optional[memoryview]:
+        manifest = self.load_manifest(repo, pr_number, head_sha)
+        if manifest is None:
+            return None
+        return self.read_blob(manifest["diff"])
+
+    def diff_index(self, repo: str, pr_number: int, head_sha: Optional[str] = None) -> Optional[DiffIndex]:
+        head_sha = head_sha or self.head_sha(repo, pr_number)
+        if not head_sha:
+            return None
+        key = self.snapshot_key(repo, pr_number, head_sha)
+        index = self._recall(self._diff_indexes, key)
+        if index is None:
+            diff = self.load_diff(repo, pr_number, head_sha)
+            if diff is None:
+                return None
+            index = self._remember(self._diff_indexes, key, DiffIndex.from_text(str(diff, "utf-8", "replace")))
+        return index
+
+    # -- sources ------------------------------------------------------------
+
+    def _import_path(self, path: str) -> str:
+        """Resolve ``path`` and make sure it lies inside the import root."""
+        if not self.import_root:
+            raise PRSnapshotError("Local imports are disabled (PR_IMPORT_ROOT is not set)")
+        root = os.path.realpath(self.import_root)
+        resolved = os.path.realpath(os.path.join(root, path))
+        if os.path.commonpath([root, resolved]) != root or not os.path.isdir(resolved):
+            raise PRSnapshotError(f"Import path must be a directory under {self.import_root}")
+        return resolved
+
+    def fetch_github(self, repo_url: str, pr_number: int) -> str:
+        """Fetch a PR from the GitHub API unless its current head is already cached."""
+        owner, name = parse_github_url(repo_url)
+        session = requests.Session()
+        session.headers["Accept"] = "application/vnd.github+json"
+        token = os.getenv("GITHUB_TOKEN")
+        if token:
+            session.headers["Authorization"] = f"Bearer {token}"
+        base = f"{GITHUB_API}/repos/{owner}/{name}/pulls/{pr_number}"
+        try:
+            res = session.get(base, timeout=10)
+            if res.status_code != 200:
+                raise PRSnapshotError(f"GitHub returned {res.status_code} for {owner}/{name}#{pr_number}")
+            pr = res.json()
+            head_sha = pr["head"]["sha"]
+            if self.has_snapshot(repo_url, pr_number, head_sha):
+                return self._set_ref(repo_url, pr_number, head_sha)
+
+            diff_res = session.get(base, headers={"Accept": "application/vnd.github.v3.diff"}, timeout=30)
+            if diff_res.status_code != 200:
+                raise PRSnapshotError(f"GitHub returned {diff_res.status_code} for the diff of #{pr_number}")
+
+            contents: Dict[str, str] = {}
+            page = 1
+            while True:
+                files_res = session.get(f"{base}/files", params={"per_page": 100, "page": page}, timeout=10)
+                if files_res.status_code != 200:
+                    raise PRSnapshotError(f"GitHub returned {files_res.status_code} listing files of #{pr_number}")
+                batch = files_res.json()
+                for entry in batch:
+                    if entry.get("status") == "removed" or not entry.get("raw_url"):
+                        contents[entry["filename"]] = ""
+                        continue
+                    raw = session.get(entry["raw_url"], timeout=30)
+                    contents[entry["filename"]] = raw.text if raw.status_code == 200 else ""
+                if len(batch) < 100:
+                    break
+                page += 1
+        except requests.RequestException as e:
+            raise PRSnapshotError(f"Could not reach GitHub: {e}")
+
+        metadata = {
+            "title": pr["title"],
+            "body": pr.get("body"),
+            "state": pr.get("state", "open"),
+            "created_at": pr["created_at"],
+            "updated_at": pr["updated_at"],
+            "diff_url": pr.get("diff_url", ""),
+        }
+        return self.save_snapshot(repo_url, pr_number, head_sha, metadata, diff_res.text, contents)
+
+    def import_git(
+        self,
+        repo_url: str,
+        pr_number: int,
+        repo_path: str,
+        base: str,
+        head: str,
+        title: Optional[str] = None,
+        body: Optional[str] = None,
+    ) -> str:
+        """Import a PR from a local git checkout as the diff between two revisions."""
+        repo_path = self._import_path(repo_path)
+
+        def git(*args: str) -> str:
+            try:
+                return subprocess.run(
+                    ["git", "-C", repo_path, *args], check=True, capture_output=True, text=True
+                ).stdout
+            except (OSError, subprocess.CalledProcessError) as e:
+                raise PRSnapshotError(f"git {' '.join(args)} failed: {e}")
+
+        def commit(rev: str) -> str:
+            # Revisions come from requests: never let them be parsed as options
+            try:
+                sha = git("rev-parse", "--verify", "--quiet", "--end-of-options", f"{rev}^{{commit}}").strip()
+            except PRSnapshotError:
+                sha = ""
+            if not re.fullmatch(r"[0-9a-f]{40,64}", sha):
+                raise PRSnapshotError(f"Not a commit in {repo_path}: {rev}")
+            return sha
+
+        base_sha, head_sha = commit(base), commit(head)
+        if self.has_snapshot(repo_url, pr_number, head_sha):
+            return self._set_ref(repo_url, pr_number, head_sha)
+        diff_text = git("diff", "--end-of-options", f"{base_sha}...{head_sha}")
+        contents = {}
+        names = git("diff", "--name-only", "--diff-filter=d", "--end-of-options", f"{base_sha}...{head_sha}")
+        for filename in names.splitlines():
+            contents[filename] = git("show", "--end-of-options", f"{head_sha}:{filename}")
+        committed_at = git("show", "-s", "--format=%cI", "--end-of-options", head_sha).strip()
+        metadata = {
+            "title": title or git("show", "-s", "--format=%s", "--end-of-options", head_sha).strip(),
+            "body": body,
+            "state": "open",
+            "created_at": committed_at,
+            "updated_at": committed_at,
+            "diff_url": "",
+        }
+        return self.save_snapshot(repo_url, pr_number, head_sha, metadata, diff_text, contents)
+
+    def import_fixture(self, repo_url: str, pr_number: int, fixture_dir: str) -> str:
+        """
+        Import a PR from a fixture directory containing ``pr.json`` (metadata,
+        including ``head_sha``), ``diff.patch`` and a ``files/`` tree with the
+        post-change file contents.
+        """
+        root = Path(self._import_path(fixture_dir))
+        try:
+            metadata = json.loads((root / "pr.json").read_text())
+            diff_text = (root / "diff.patch").read_text()
+        except (OSError, ValueError) as e:
+            raise PRSnapshotError(f"Invalid PR fixture {fixture_dir}: {e}")
+        head_sha = metadata.pop("head_sha", None) or hashlib.sha1(diff_text.encode("utf-8")).hexdigest()
+        now = datetime.now(timezone.utc).isoformat()
+        metadata.setdefault("title", f"PR #{pr_number}")
+        metadata.setdefault("created_at", now)
+        metadata.setdefault("updated_at", metadata["created_at"])
+        contents = {}
+        files_dir = root / "files"
+        if files_dir.is_dir():
+            for path in files_dir.rglob("*"):
+                if path.is_file():
+                    contents[path.relative_to(files_dir).as_posix()] = path.read_text(errors="replace")
+        return self.save_snapshot(repo_url, pr_number, head_sha, metadata, diff_text, contents)
+
+    def get_or_fetch(self, repo_url: str, pr_number: int, refresh: bool = False) -> PRData:
+        if not refresh:
+            pr = self.load_pr(repo_url, pr_number)
+            record_cache("pr_snapshot", pr is not None)
+            if pr is not None:
+                return pr
+        self.fetch_github(repo_url, pr_number)
+        pr = self.load_pr(repo_url, pr_number)
+        if pr is None:
+            raise PRSnapshotError(f"No snapshot for {repo_url}#{pr_number}")
+        return pr
+
+
+pr_snapshot_store = PRSnapshotStore()
@@ -0,0 +1,456 @@
+"""
+On-demand statistical profiling of individual requests.
+
+A request is profiled when it carries a valid ``X-Profile`` header, or when it
+is picked by a sampling rule (``rate`` of the requests to one method + route
+template) set through ``/api/admin/profiling/rules``. The header value is a
+short-lived token signed with ``PROFILE_SECRET``::
+
+    python -c "from app.services.profiling import make_token; print(make_token(600))"
+    curl -H "X-Profile: <token>" http://localhost:8001/api/candidates/42
+
+While at least one request is being profiled, a sampler thread wakes up every
+``profile_interval_ms`` and captures the stack of every thread working on it:
+the event loop thread while the request's task is the one running, and the
+threadpool worker whose job runs in the request's context (sync endpoints and
+dependencies). Ticks where neither is the case are recorded as ``[waiting]``
+(queued for a worker thread, or the loop is busy with another request). SQL
+statements issued from the request's context are captured with their
+duration.
+
+Each profile is written to ``PROFILE_DIR`` as ``<id>.speedscope.json`` (open
+it in https://www.speedscope.app), ``<id>.folded`` (collapsed stacks for
+flamegraph.pl) and ``<id>.json`` (request summary and SQL).
+
+With ``PROFILE_SECRET`` unset the middleware and SQL hooks are never
+installed, so there is no cost at all. With it set, a request that is not
+profiled pays one header scan, plus a route match while sampling rules are
+active. Rules are kept in ``PROFILE_DIR/rules.json`` so every worker sees
+them; workers re-read the file when its mtime changes, at most once a second.
+"""
+
+import asyncio
+import contextvars
+import glob
+import hashlib
+import hmac
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import anyio.to_thread
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.routing import Match
+
+from ..core.config import settings
+
+
+HEADER = b"x-profile"
+ADMIN_PREFIX = "/api/admin/profiling"
+
+_current: contextvars.ContextVar[Optional["RequestProfile"]] = contextvars.ContextVar("request_profile", default=None)
+
+try:
+    from anyio._backends._asyncio import WorkerThread as _AnyioWorker
+    _WORKER_RUN = _AnyioWorker.run.__code__
+except (ImportError, AttributeError):  # pragma: no cover - other anyio versions
+    _WORKER_RUN = None
+_LOOP_RUN = asyncio.events.Handle._run.__code__
+
+
+def _sign(expires: int) -> str:
+    return hmac.new(settings.profile_secret.encode(), str(expires).encode(), hashlib.sha256).hexdigest()
+
+
+def make_token(ttl_seconds: int = 600) -> str:
+    """Token for the ``X-Profile`` header, valid for ``ttl_seconds``."""
+    if not settings.profile_secret:
+        raise RuntimeError("PROFILE_SECRET is not set")
+    expires = int(time.time()) + ttl_seconds
+    return f"{expires}.{_sign(expires)}"
+
+
+def verify_token(token: Optional[str]) -> bool:
+    if not settings.profile_secret or not token:
+        return False
+    expires, _, signature = token.partition(".")
+    try:
+        expires_at = int(expires)
+    except ValueError:
+        return False
+    return expires_at >= time.time() and hmac.compare_digest(signature, _sign(expires_at))
+
+
+class RequestProfile:
+    """Samples and SQL statements collected for one request."""
+
+    def __init__(self, method: str, path: str, trigger: str):
+        self.id = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        self.method = method
+        self.path = path
+        self.trigger = trigger
+        self.route: Optional[str] = None
+        self.status_code: Optional[int] = None
+        self.started_at = datetime.now(timezone.utc)
+        self.started = time.perf_counter()
+        self.duration = 0.0
+        self.loop = asyncio.get_running_loop()
+        self.task = asyncio.current_task()
+        self.loop_thread = threading.get_ident()
+        self.samples: List[Tuple[Tuple[Tuple[str, str, int], ...], float]] = []
+        self.statements: List[Dict] = []
+        self.dropped_statements = 0
+
+    def add_statement(self, statement: str, duration: float, many: bool) -> None:
+        if len(self.statements) >= settings.profile_max_statements:
+            self.dropped_statements += 1
+            return
+        self.statements.append({
+            "offset_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            "duration_ms": round(duration * 1000, 3),
+            "executemany": many,
+            "statement": statement,
+        })
+
+    def summary(self) -> Dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status_code": self.status_code,
+            "trigger": self.trigger,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.duration * 1000, 3),
+            "samples": len(self.samples),
+            "sql_count": len(self.statements) + self.dropped_statements,
+            "sql_ms": round(sum(s["duration_ms"] for s in self.statements), 3),
+        }
+
+    def speedscope(self) -> Dict:
+        frames: List[Dict] = []
+        index: Dict[Tuple[str, str, int], int] = {}
+        samples, weights = [], []
+        for stack, weight in self.samples:
+            ids = []
+            for frame in stack:
+                if frame not in index:
+                    index[frame] = len(frames)
+                    name, filename, line = frame
+                    frames.append({"name": name, "file": filename, "line": line} if filename else {"name": name})
+                ids.append(index[frame])
+            samples.append(ids)
+            weights.append(round(weight * 1000, 3))
+        name = f"{self.method} {self.route or self.path}"
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "laksham-profiler",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": round(sum(weights), 3),
+                "samples": samples,
+                "weights": weights,
+            }],
+        }
+
+    def folded(self) -> str:
+        totals: Dict[str, float] = {}
+        for stack, weight in self.samples:
+            key = ";".join(name for name, _, _ in stack)
+            totals[key] = totals.get(key, 0.0) + weight
+        # flamegraph.pl wants integer counts; use microseconds
+        return "".join(f"{stack} {max(1, round(weight * 1e6))}\n" for stack, weight in totals.items())
+
+    def save(self, directory: str) -> None:
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, self.id)
+        with open(f"{base}.speedscope.json", "w", encoding="utf-8") as fh:
+            json.dump(self.speedscope(), fh)
+        with open(f"{base}.folded", "w", encoding="utf-8") as fh:
+            fh.write(self.folded())
+        with open(f"{base}.json", "w", encoding="utf-8") as fh:
+            json.dump({**self.summary(), "sql": self.statements}, fh, indent=1)
+        _prune(directory, settings.profile_keep)
+
+
+def _prune(directory: str, keep: int) -> None:
+    summaries = sorted(p for p in glob.glob(os.path.join(directory, "*.json")) if not p.endswith(".speedscope.json")
+                       and os.path.basename(p) != "rules.json")
+    for path in summaries[:-keep] if keep > 0 else []:
+        base = path[:-len(".json")]
+        for suffix in (".json", ".speedscope.json", ".folded"):
+            try:
+                os.unlink(base + suffix)
+            except FileNotFoundError:
+                pass
+
+
+def _stack(frame, boundary) -> Tuple[Tuple[str, str, int], ...]:
+    """Frames from just above ``boundary`` (exclusive) to the leaf, root first."""
+    stack = []
+    while frame is not None and frame.f_code is not boundary:
+        code = frame.f_code
+        stack.append((getattr(code, "co_qualname", code.co_name), code.co_filename, code.co_firstlineno))
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+
+def _worker_context(frame) -> Optional[contextvars.Context]:
+    """Context of the job an anyio worker thread is running, if ``frame`` belongs to one."""
+    if _WORKER_RUN is None:
+        return None
+    while frame is not None:
+        if frame.f_code is _WORKER_RUN:
+            context = frame.f_locals.get("context")
+            return context if isinstance(context, contextvars.Context) else None
+        frame = frame.f_back
+    return None
+
+
+class Sampler:
+    """Background thread sampling the stacks of the requests being profiled."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._active: Dict[str, RequestProfile] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._active[profile.id] = profile
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def stop(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._active.pop(profile.id, None)
+
+    def _run(self) -> None:
+        last = time.perf_counter()
+        while True:
+            with self._lock:
+                profiles = list(self._active.values())
+            if not profiles:
+                self._wake.clear()
+                # Park until the next profiled request instead of ticking
+                self._wake.wait(60)
+                last = time.perf_counter()
+                continue
+            time.sleep(self.interval)
+            now = time.perf_counter()
+            self._sample(profiles, now - last)
+            last = now
+
+    def _sample(self, profiles: List[RequestProfile], weight: float) -> None:
+        frames = sys._current_frames()
+        current_tasks = getattr(asyncio.tasks, "_current_tasks", {})
+        me = threading.get_ident()
+        workers = {}
+        for thread_id, frame in frames.items():
+            if thread_id == me:
+                continue
+            context = _worker_context(frame)
+            if context is not None:
+                profile = context.get(_current)
+                if profile is not None:
+                    workers.setdefault(profile.id, []).append(frame)
+        for profile in profiles:
+            stacks = [(("[worker thread]", "", 0),) + _stack(f, _WORKER_RUN) for f in workers.get(profile.id, [])]
+            if current_tasks.get(profile.loop) is profile.task and profile.loop_thread in frames:
+                stacks.append((("[event loop]", "", 0),) + _stack(frames[profile.loop_thread], _LOOP_RUN))
+            if not stacks:
+                stacks = [(("[waiting]", "", 0),)]
+            for stack in stacks:
+                profile.samples.append((stack, weight / len(stacks)))
+
+
+sampler = Sampler(settings.profile_interval_ms / 1000)
+
+
+class _Rules:
+    """Sampling rules shared by all workers through ``rules.json``."""
+
+    CHECK_INTERVAL = 1.0
+
+    def __init__(self, directory: str):
+        self.path = os.path.join(directory, "rules.json")
+        self._rules: List[Dict] = []
+        self._mtime: Optional[float] = None
+        self._checked = 0.0
+
+    def active(self) -> List[Dict]:
+        now = time.monotonic()
+        if now - self._checked >= self.CHECK_INTERVAL:
+            self._checked = now
+            try:
+                mtime = os.stat(self.path).st_mtime
+            except OSError:
+                mtime = None
+            if mtime != self._mtime:
+                self._mtime = mtime
+                self._rules = self._read()
+        if self._rules:
+            wall = time.time()
+            return [rule for rule in self._rules if rule["expires_at"] > wall]
+        return self._rules
+
+    def _read(self) -> List[Dict]:
+        try:
+            with open(self.path, encoding="utf-8") as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return []
+
+    def replace(self, rules: List[Dict]) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(rules, fh)
+        os.replace(tmp, self.path)
+        self._checked = 0.0
+
+    def upsert(self, method: str, route: str, rate: float, duration_seconds: int) -> List[Dict]:
+        wall = time.time()
+        rules = [r for r in self._read() if r["expires_at"] > wall and (r["method"], r["route"]) != (method, route)]
+        rules.append({"method": method, "route": route, "rate": rate, "expires_at": wall + duration_seconds})
+        self.replace(rules)
+        return rules
+
+
+rules = _Rules(settings.profile_dir)
+
+
+def list_profiles(limit: int = 50) -> List[Dict]:
+    paths = sorted(
+        (p for p in glob.glob(os.path.join(settings.profile_dir, "*.json"))
+         if not p.endswith(".speedscope.json") and os.path.basename(p) != "rules.json"),
+        reverse=True,
+    )[:limit]
+    profiles = []
+    for path in paths:
+        try:
+            with open(path, encoding="utf-8") as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            continue
+        data.pop("sql", None)
+        profiles.append(data)
+    return profiles
+
+
+def profile_path(profile_id: str, suffix: str) -> Optional[str]:
+    # Ids are generated by us; reject anything that could escape the directory
+    if not profile_id or os.path.basename(profile_id) != profile_id or profile_id.startswith("."):
+        return None
+    path = os.path.join(settings.profile_dir, profile_id + suffix)
+    return path if os.path.isfile(path) else None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("profile_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current.get()
+    started = conn.info.get("profile_started")
+    if profile is not None and started:
+        profile.add_statement(statement, time.perf_counter() - started.pop(), executemany)
+
+
+_hooks_installed = False
+
+
+def install_sql_hooks() -> None:
+    global _hooks_installed
+    if not _hooks_installed:
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        _hooks_installed = True
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware profiling requests picked by the header or a sampling rule."""
+
+    def __init__(self, app):
+        self.app = app
+        install_sql_hooks()
+
+    def _trigger(self, scope) -> Optional[str]:
+        for name, value in scope["headers"]:
+            if name == HEADER:
+                return "header" if verify_token(value.decode("latin-1")) else None
+        active = rules.active()
+        if not active:
+            return None
+        method = scope["method"]
+        route = None
+        for rule in active:
+            if rule["method"] != method:
+                continue
+            if route is None:
+                route = self._match(scope)
+                if route is None:
+                    return None
+            if rule["route"] == route and random.random() < rule["rate"]:
+                return "rule"
+        return None
+
+    @staticmethod
+    def _match(scope) -> Optional[str]:
+        app = scope.get("app")
+        for candidate in getattr(app, "routes", ()):
+            match, _ = candidate.matches(scope)
+            if match == Match.FULL:
+                return getattr(candidate, "path", None)
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(ADMIN_PREFIX):
+            await self.app(scope, receive, send)
+            return
+        trigger = self._trigger(scope)
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"], trigger)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                profile.status_code = message["status"]
+                message = {**message, "headers": [*message.get("headers", []), (b"x-profile-id", profile.id.encode())]}
+            await send(message)
+
+        token = _current.set(profile)
+        sampler.start(profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop(profile)
+            _current.reset(token)
+            profile.duration = time.perf_counter() - profile.started
+            route = scope.get("route")
+            profile.route = getattr(route, "path", None)
+            try:
+                await anyio.to_thread.run_sync(profile.save, settings.profile_dir)
+                print(f"[PROFILE] {profile.method} {profile.path} -> {settings.profile_dir}/{profile.id}.speedscope.json")
+            except OSError as exc:
+                print(f"[PROFILE] Failed to save profile {profile.id}: {exc}")
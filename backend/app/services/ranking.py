@@ -0,0 +1,184 @@
+"""
+In-memory percentile and leaderboard engine for assessment scores.
+
+Each assessment keeps its candidates' best evaluation scores in a NumPy array
+sorted ascending, with a parallel array of candidate ids and a dict from
+candidate id to score. Snapshots are immutable: new scores are merged with
+``searchsorted`` (binary search) and ``insert`` into a new snapshot that
+replaces the old one, so readers holding a snapshot always see consistent
+arrays without taking the lock. Percentiles, ranks and histograms are
+computed with vectorized operations over the sorted array. Arrays are built
+lazily from the database, which is also how the engine recovers after a
+restart, and evicted LRU beyond a fixed number of assessments. Scores
+committed by other processes (the job workers) arrive as
+``ranking:<assessment id>`` invalidations in the response cache's log, which
+drop the assessment here.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+from sqlalchemy import func, select
+
+from ..core.config import settings
+from ..db import SessionLocal
+from ..models.submission import CodeReviewSubmission
+from .metrics import record_cache
+from .response_cache import response_cache
+
+
+class AssessmentScores:
+    __slots__ = ("scores", "candidate_ids", "_by_candidate")
+
+    def __init__(self, scores: np.ndarray, candidate_ids: np.ndarray):
+        order = np.argsort(scores, kind="stable")
+        self.scores = scores[order]
+        self.candidate_ids = candidate_ids[order]
+        self._by_candidate: Dict[int, float] = dict(zip(self.candidate_ids.tolist(), self.scores.tolist()))
+
+    def __len__(self) -> int:
+        return int(self.scores.size)
+
+    def score_of(self, candidate_id: int) -> Optional[float]:
+        return self._by_candidate.get(candidate_id)
+
+    def with_best(self, best: Dict[int, float]) -> "AssessmentScores":
+        """A new snapshot keeping each candidate's best score; ``self`` if nothing improved."""
+        improved = {
+            candidate_id: score for candidate_id, score in best.items()
+            if candidate_id not in self._by_candidate or score > self._by_candidate[candidate_id]
+        }
+        if not improved:
+            return self
+        ids = np.fromiter(improved.keys(), dtype=np.int64, count=len(improved))
+        new_scores = np.fromiter(improved.values(), dtype=np.float64, count=len(improved))
+        keep = ~np.isin(self.candidate_ids, ids)
+        scores, candidate_ids = self.scores[keep], self.candidate_ids[keep]
+        order = np.argsort(new_scores, kind="stable")
+        positions = np.searchsorted(scores, new_scores[order], side="right")
+        # Skips __init__: the merged arrays are already sorted
+        snapshot = AssessmentScores.__new__(AssessmentScores)
+        snapshot.scores = np.insert(scores, positions, new_scores[order])
+        snapshot.candidate_ids = np.insert(candidate_ids, positions, ids[order])
+        snapshot._by_candidate = {**self._by_candidate, **improved}
+        return snapshot
+
+    def percentile(self, score: float) -> float:
+        """Percentage of candidates scoring at or below ``score``."""
+        if not self.scores.size:
+            return 0.0
+        return 100.0 * np.searchsorted(self.scores, score, side="right") / self.scores.size
+
+    def rank(self, score: float) -> int:
+        """1-based competition rank: one more than the number of strictly higher scores."""
+        return int(self.scores.size - np.searchsorted(self.scores, score, side="right") + 1)
+
+    def percentiles(self) -> Dict[int, float]:
+        if not self.scores.size:
+            return {}
+        values = 100.0 * np.searchsorted(self.scores, self.scores, side="right") / self.scores.size
+        return dict(zip(self.candidate_ids.tolist(), values.tolist()))
+
+    def top(self, n: int) -> List[Dict[str, float]]:
+        scores = self.scores[::-1][:n]
+        ids = self.candidate_ids[::-1][:n]
+        # Competition ranking: ties share the rank of their first occurrence
+        ranks = self.scores.size - np.searchsorted(self.scores, scores, side="right") + 1
+        return [
+            {"rank": int(r), "candidate_id": int(c), "score": float(s)}
+            for r, c, s in zip(ranks, ids, scores)
+        ]
+
+    def histogram(self, bins: int = 10, low: float = 0.0, high: float = 100.0) -> Dict[str, list]:
+        counts, edges = np.histogram(self.scores, bins=bins, range=(low, high))
+        return {"edges": edges.round(4).tolist(), "counts": counts.tolist()}
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        if not self.scores.size:
+            return {"count": 0, "mean": None, "median": None, "p90": None}
+        p50, p90 = np.percentile(self.scores, [50, 90])
+        return {"count": int(self.scores.size), "mean": float(self.scores.mean()),
+                "median": float(p50), "p90": float(p90)}
+
+
+class RankingEngine:
+    def __init__(self, max_assessments: int = settings.ranking_max_assessments):
+        self.max_assessments = max_assessments
+        self._entries: "OrderedDict[int, AssessmentScores]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def _load(self, assessment_id: int) -> AssessmentScores:
+        db = SessionLocal()
+        try:
+            rows = db.execute(
+                select(CodeReviewSubmission.candidate_id, func.max(CodeReviewSubmission.evaluation_score))
+                .where(
+                    CodeReviewSubmission.assessment_id == assessment_id,
+                    CodeReviewSubmission.is_evaluated.is_(True),
+                    CodeReviewSubmission.evaluation_score.is_not(None),
+                )
+                .group_by(CodeReviewSubmission.candidate_id)
+            ).all()
+        finally:
+            db.close()
+        candidate_ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+        scores = np.fromiter((r[1] for r in rows), dtype=np.float64, count=len(rows))
+        return AssessmentScores(scores, candidate_ids)
+
+    def get(self, assessment_id: int) -> AssessmentScores:
+        response_cache.sync()
+        with self._lock:
+            entry = self._entries.get(assessment_id)
+            if entry is not None:
+                self._entries.move_to_end(assessment_id)
+                record_cache("ranking", True)
+                return entry
+        record_cache("ranking", False)
+        entry = self._load(assessment_id)
+        with self._lock:
+            # Another thread may have loaded (and updated) it meanwhile; keep theirs
+            entry = self._entries.setdefault(assessment_id, entry)
+            self._entries.move_to_end(assessment_id)
+            while len(self._entries) > self.max_assessments:
+                self._entries.popitem(last=False)
+            return entry
+
+    def invalidate(self, assessment_id: int) -> None:
+        with self._lock:
+            self._entries.pop(assessment_id, None)
+
+    def on_invalidate(self, tags: Set[str]) -> None:
+        """Response cache listener: drop assessments re-scored in another process."""
+        with self._lock:
+            for tag in tags:
+                kind, _, assessment_id = tag.partition(":")
+                if kind == "ranking" and assessment_id.isdigit():
+                    self._entries.pop(int(assessment_id), None)
+
+    def observe(self, evaluations: List[Dict[str, object]]) -> None:
+        """
+        Evaluation hook, called after the scores are committed. New scores are
+        applied incrementally; a re-score can lower a best score, so it drops
+        the assessment and lets the next read rebuild it from the database.
+        """
+        updates: Dict[int, Dict[int, float]] = {}
+        rescored: Set[int] = set()
+        for item in evaluations:
+            if item["was_evaluated"]:
+                rescored.add(item["assessment_id"])
+                continue
+            best = updates.setdefault(item["assessment_id"], {})
+            best[item["candidate_id"]] = max(item["score"], best.get(item["candidate_id"], item["score"]))
+        with self._lock:
+            for assessment_id in rescored:
+                self._entries.pop(assessment_id, None)
+            for assessment_id, best in updates.items():
+                entry = self._entries.get(assessment_id)
+                if entry is not None and assessment_id not in rescored:
+                    self._entries[assessment_id] = entry.with_best(best)
+
+
+ranking_engine = RankingEngine()
+response_cache.add_listener(ranking_engine.on_invalidate)
@@ -0,0 +1,293 @@
+"""
+Streaming exports of assessment results.
+
+Rows come from a server-side cursor (``stream_results`` with ``yield_per``,
+a named cursor on Postgres) and are encoded one chunk at a time, so the first
+bytes go out as soon as the first chunk is fetched and memory stays flat
+regardless of the number of rows. CSV and NDJSON are encoded directly; XLSX
+is written as a zip stream whose worksheet XML is generated row by row
+(entries use data descriptors, so nothing has to be seeked or buffered).
+Text that a spreadsheet would run as a formula is prefixed with ``'`` in CSV;
+XLSX writes it as inline strings, which are never evaluated.
+
+On SQLite the export holds a read transaction until the last row is sent,
+which only stays harmless because the database runs in WAL mode (see
+``app.db``): writers carry on while the export reads its snapshot.
+
+Large exports can also run as ``reports.results`` jobs, which write the file to
+``REPORT_DIR`` for a later download. With several job hosts, ``REPORT_DIR`` must
+be shared storage.
+"""
+
+import csv
+import io
+import json
+import os
+import time
+import uuid
+import zipfile
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+from xml.sax.saxutils import escape
+
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+
+from ..core.config import settings
+from ..db import engine as default_engine
+from ..models.assessment import Assessment
+from ..models.candidate import Candidate
+from ..models.submission import CodeReviewSubmission
+from .jobs import job_handler
+
+
+FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+}
+
+RESULT_COLUMNS = (
+    ("submission_id", CodeReviewSubmission.id),
+    ("assessment_id", Assessment.id),
+    ("assessment_title", Assessment.title),
+    ("assessment_type", Assessment.assessment_type),
+    ("candidate_id", Candidate.id),
+    ("first_name", Candidate.first_name),
+    ("last_name", Candidate.last_name),
+    ("email", Candidate.email),
+    ("submitted_at", CodeReviewSubmission.submitted_at),
+    ("is_evaluated", CodeReviewSubmission.is_evaluated),
+    ("evaluation_score", CodeReviewSubmission.evaluation_score),
+    ("evaluated_at", CodeReviewSubmission.evaluated_at),
+)
+
+
+def iter_results(
+    engine: Engine = default_engine,
+    assessment_id: Optional[int] = None,
+    evaluated_only: bool = False,
+    submitted_after: Optional[datetime] = None,
+    chunk_size: int = 2000,
+) -> Iterator[Sequence[Any]]:
+    """Yield result rows (in ``RESULT_COLUMNS`` order) from a server-side cursor."""
+    query = (
+        select(*(column for _, column in RESULT_COLUMNS))
+        .join(Candidate, Candidate.id == CodeReviewSubmission.candidate_id)
+        .join(Assessment, Assessment.id == CodeReviewSubmission.assessment_id)
+        .order_by(CodeReviewSubmission.id)
+    )
+    if assessment_id is not None:
+        query = query.where(CodeReviewSubmission.assessment_id == assessment_id)
+    if evaluated_only:
+        query = query.where(CodeReviewSubmission.is_evaluated.is_(True))
+    if submitted_after is not None:
+        query = query.where(CodeReviewSubmission.submitted_at >= submitted_after)
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(query)
+        for partition in result.partitions():
+            yield from partition
+
+
+def _text(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+# Spreadsheets run cells starting with these as formulas (CSV injection); such text gets a leading '
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _csv_text(value: Any) -> str:
+    text = _text(value)
+    if isinstance(value, str) and text.startswith(_FORMULA_PREFIXES):
+        return "'" + text
+    return text
+
+
+def _batched(rows: Iterable[Sequence[Any]], size: int) -> Iterator[List[Sequence[Any]]]:
+    batch: List[Sequence[Any]] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def encode_csv(header: Sequence[str], rows: Iterable[Sequence[Any]], batch_size: int = 500) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    yield buffer.getvalue().encode("utf-8")
+    for batch in _batched(rows, batch_size):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_csv_text(v) for v in row] for row in batch)
+        yield buffer.getvalue().encode("utf-8")
+
+
+def encode_ndjson(header: Sequence[str], rows: Iterable[Sequence[Any]], batch_size: int = 500) -> Iterator[bytes]:
+    for batch in _batched(rows, batch_size):
+        yield "".join(
+            json.dumps(dict(zip(header, row)), default=_text, separators=(",", ":")) + "\n" for row in batch
+        ).encode("utf-8")
+
+
+class _Sink(io.RawIOBase):
+    """Write-only, non-seekable stream collecting zip output until it is drained."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+def _column_name(index: int) -> str:
+    name = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        name = chr(65 + remainder) + name
+    return name
+
+
+def _xlsx_cell(ref: str, value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return f'<c r="{ref}" t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f'<c r="{ref}"><v>{value}</v></c>'
+    # Strip characters XML 1.0 cannot carry
+    text = "".join(ch for ch in _text(value) if ch in "\t\n\r" or ch >= " ")
+    return f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{escape(text)}</t></is></c>'
+
+
+_XLSX_STATIC = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Results" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def encode_xlsx(header: Sequence[str], rows: Iterable[Sequence[Any]], batch_size: int = 500) -> Iterator[bytes]:
+    sink = _Sink()
+    refs = [_column_name(i) for i in range(len(header))]
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in _XLSX_STATIC.items():
+            archive.writestr(name, content)
+        yield sink.drain()
+        with archive.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            sheet.write(('<row r="1">' + "".join(_xlsx_cell(f"{ref}1", h) for ref, h in zip(refs, header))
+                         + "</row>").encode("utf-8"))
+            number = 1
+            for batch in _batched(rows, batch_size):
+                parts = []
+                for row in batch:
+                    number += 1
+                    cells = "".join(_xlsx_cell(f"{ref}{number}", value) for ref, value in zip(refs, row))
+                    parts.append(f'<row r="{number}">{cells}</row>')
+                sheet.write("".join(parts).encode("utf-8"))
+                data = sink.drain()
+                if data:
+                    yield data
+            sheet.write(b"</sheetData></worksheet>")
+    yield sink.drain()
+
+
+ENCODERS = {"csv": encode_csv, "ndjson": encode_ndjson, "xlsx": encode_xlsx}
+
+
+def stream_results_report(fmt: str, engine: Engine = default_engine, **filters: Any) -> Iterator[bytes]:
+    header = [name for name, _ in RESULT_COLUMNS]
+    return ENCODERS[fmt](header, iter_results(engine, **filters))
+
+
+def _prune_reports(directory: str, max_age_seconds: float) -> None:
+    cutoff = time.time() - max_age_seconds
+    for entry in os.scandir(directory):
+        if entry.is_file() and entry.stat().st_mtime < cutoff:
+            os.remove(entry.path)
+
+
+@job_handler("reports.results", max_attempts=3, concurrency=2)
+def write_results_report(
+    format: str,
+    assessment_id: Optional[int] = None,
+    evaluated_only: bool = False,
+    submitted_after: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Job: write a results export to ``REPORT_DIR``; the result says where to find it."""
+    media_type, extension = FORMATS[format]
+    os.makedirs(settings.report_dir, exist_ok=True)
+    # Files live as long as the jobs that point at them
+    if settings.job_retention_hours:
+        _prune_reports(settings.report_dir, settings.job_retention_hours * 3600)
+    name = f"{uuid.uuid4().hex}.{extension}"
+    path = os.path.join(settings.report_dir, name)
+    size = 0
+    with open(path + ".part", "wb") as out:
+        for chunk in stream_results_report(
+            format,
+            assessment_id=assessment_id,
+            evaluated_only=evaluated_only,
+            submitted_after=datetime.fromisoformat(submitted_after) if submitted_after else None,
+        ):
+            out.write(chunk)
+            size += len(chunk)
+    os.replace(path + ".part", path)
+    return {
+        "file": name,  # inside REPORT_DIR
+        "filename": f"results-{assessment_id or 'all'}-{datetime.utcnow():%Y%m%d%H%M%S}.{extension}",
+        "media_type": media_type,
+        "bytes": size,
+    }
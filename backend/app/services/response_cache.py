@@ -0,0 +1,534 @@
+"""
+Opt-in response cache for GET routes, shared by all workers.
+
+A route is cached by decorating its endpoint::
+
+    @router.get("/{assessment_id}", response_model=AssessmentRead)
+    @cached(ttl=60, tags=("assessments", "assessment:{assessment_id}"), vary_headers=("x-tenant-id",))
+    def get_assessment(...): ...
+
+The key is the path, the query parameters (all of them, or only those listed
+in ``vary_query``), the values of ``vary_headers`` and, with
+``vary_auth=True``, a hash of the ``Authorization`` header. Only 200 responses
+without ``Set-Cookie`` or ``Cache-Control: no-store/private`` are stored.
+
+There are two tiers: an LRU dict in each process, and a SQLite file
+(``RESPONSE_CACHE_PATH``) that every worker reads, so a response computed by
+one worker serves the others. Tags are formatted with the path parameters.
+Write endpoints call ``response_cache.invalidate(...)`` with the tags they
+affect. That drops the entries from this process and from the shared file,
+and appends the tags to an invalidation log. The other workers replay the log
+at most every ``response_cache_sync_interval_seconds``. Other in-process caches
+can follow the same log with ``add_listener``.
+
+A response computed while one of its tags was invalidated is not stored, so a
+slow read that started before a write cannot put the old data back.
+
+On a miss, identical requests that arrive while the first one is still
+running wait for its response instead of running the endpoint again (see
+``single_flight``). Errors and non-200 responses are shared with the waiters
+as well. A waiter gives up with 504 after ``coalesce_timeout``. Routes that
+must not be cached can still be coalesced with ``@coalesced(timeout=...)``.
+
+``X-Cache`` on a response is ``HIT`` (memory), ``HIT-SHARED`` (the SQLite
+file), ``COALESCED`` or ``MISS``.
+
+The middleware answers memory hits on the event loop. Anything that reads the
+SQLite file (shared-tier lookups, replaying the invalidation log, stores) runs
+in a worker thread, so a busy or locked file never blocks other requests.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+import anyio.to_thread
+from starlette.routing import Match
+
+from ..core.config import settings
+from .metrics import record_cache
+from .single_flight import NOT_SHARED, FlightTimeout, SingleFlight
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    ttl: float
+    tags: Tuple[str, ...] = ()
+    vary_query: Optional[Tuple[str, ...]] = None
+    vary_headers: Tuple[str, ...] = ()
+    vary_auth: bool = False
+    # Seconds a request waits for an identical in-flight one; 0 disables coalescing
+    coalesce_timeout: float = settings.coalesce_timeout_seconds
+
+
+def _mark(policy: CachePolicy):
+    def decorate(endpoint):
+        endpoint.__response_cache__ = policy
+        return endpoint
+
+    return decorate
+
+
+def cached(
+    ttl: float,
+    tags: Sequence[str] = (),
+    vary_query: Optional[Sequence[str]] = None,
+    vary_headers: Sequence[str] = (),
+    vary_auth: bool = False,
+    coalesce_timeout: Optional[float] = None,
+):
+    """Mark an endpoint as cacheable; place it below the ``@router.get`` decorator."""
+    return _mark(CachePolicy(
+        ttl=ttl,
+        tags=tuple(tags),
+        vary_query=tuple(vary_query) if vary_query is not None else None,
+        vary_headers=tuple(h.lower() for h in vary_headers),
+        vary_auth=vary_auth,
+        coalesce_timeout=settings.coalesce_timeout_seconds if coalesce_timeout is None else coalesce_timeout,
+    ))
+
+
+def coalesced(
+    timeout: Optional[float] = None,
+    vary_query: Optional[Sequence[str]] = None,
+    vary_headers: Sequence[str] = (),
+    vary_auth: bool = False,
+):
+    """Share one run among identical concurrent requests without caching the response."""
+    return cached(0, vary_query=vary_query, vary_headers=vary_headers, vary_auth=vary_auth, coalesce_timeout=timeout)
+
+
+@dataclass
+class CachedResponse:
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+    stored_at: float
+    expires_at: float
+    tags: Tuple[str, ...]
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entry_tags (
+    tag TEXT NOT NULL,
+    key TEXT NOT NULL,
+    PRIMARY KEY (tag, key)
+);
+CREATE INDEX IF NOT EXISTS ix_entry_tags_key ON entry_tags (key);
+CREATE TABLE IF NOT EXISTS invalidations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tag TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+class ResponseCache:
+    # Invalidation log rows are kept this long; a worker further behind drops its whole memory tier
+    LOG_RETENTION_SECONDS = 3600
+
+    def __init__(
+        self,
+        path: str = settings.response_cache_path,
+        memory_entries: int = settings.response_cache_memory_entries,
+        max_entry_bytes: int = settings.response_cache_max_entry_bytes,
+        sync_interval: float = settings.response_cache_sync_interval_seconds,
+    ):
+        self.path = path
+        self.memory_entries = memory_entries
+        self.max_entry_bytes = max_entry_bytes
+        self.sync_interval = sync_interval
+        self._memory: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._pid = os.getpid()
+        # Last invalidation log id applied to the memory tier, and per-tag counters of local invalidations
+        self._seen_log_id = 0
+        self._synced_at = 0.0
+        self._tag_epochs: Dict[str, int] = {}
+        self._stores = 0
+        self._listeners: List[Callable[[Set[str]], None]] = []
+
+    # ---------------------------------------------------------------- shared tier
+
+    def _conn(self) -> Optional[sqlite3.Connection]:
+        if not self.path:
+            return None
+        if self._pid != os.getpid():
+            # Forked worker: start with an empty memory tier and fresh connections
+            with self._lock:
+                self._pid = os.getpid()
+                self._memory.clear()
+                self._local = threading.local()
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+            if not self._seen_log_id:
+                self._seen_log_id = conn.execute("SELECT coalesce(max(id), 0) FROM invalidations").fetchone()[0]
+        return conn
+
+    def add_listener(self, listener: Callable[[Set[str]], None]) -> None:
+        """Call ``listener(tags)`` with the tags other processes invalidated, as they are replayed."""
+        self._listeners.append(listener)
+
+    def sync(self) -> None:
+        """Replay invalidations logged by other workers into the memory tier."""
+        now = time.monotonic()
+        if now - self._synced_at < self.sync_interval:
+            return
+        self._synced_at = now
+        conn = self._conn()
+        if conn is None:
+            return
+        rows = conn.execute(
+            "SELECT id, tag FROM invalidations WHERE id > ? ORDER BY id", (self._seen_log_id,)
+        ).fetchall()
+        if not rows:
+            return
+        oldest = conn.execute("SELECT min(id) FROM invalidations").fetchone()[0]
+        tags = {tag for _, tag in rows}
+        with self._lock:
+            if oldest is not None and oldest > self._seen_log_id + 1:
+                # Some of the log was pruned before we saw it
+                self._memory.clear()
+            self._drop_tags_locked(tags)
+            self._seen_log_id = max(self._seen_log_id, rows[-1][0])
+        for listener in self._listeners:
+            listener(tags)
+
+    def _drop_tags_locked(self, tags) -> None:
+        for tag in tags:
+            self._tag_epochs[tag] = self._tag_epochs.get(tag, 0) + 1
+        for key in [k for k, entry in self._memory.items() if not tags.isdisjoint(entry.tags)]:
+            del self._memory[key]
+
+    # ---------------------------------------------------------------- lookups
+
+    def get_memory(self, key: str) -> Optional[CachedResponse]:
+        """Memory-tier hit without any I/O; None on a miss or when the log is due to be replayed."""
+        if self._pid != os.getpid() or (self.path and time.monotonic() - self._synced_at >= self.sync_interval):
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None or entry.expires_at <= now:
+                return None
+            self._memory.move_to_end(key)
+        record_cache("response", True)
+        return entry
+
+    def get(self, key: str) -> Tuple[Optional[CachedResponse], str]:
+        try:
+            return self._get(key)
+        except sqlite3.Error as exc:
+            print(f"[CACHE] Shared tier unavailable: {exc}")
+            record_cache("response", False)
+            return None, "MISS"
+
+    def _get(self, key: str) -> Tuple[Optional[CachedResponse], str]:
+        self.sync()
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry.expires_at > now:
+                    self._memory.move_to_end(key)
+                    record_cache("response", True)
+                    return entry, "HIT"
+                del self._memory[key]
+        conn = self._conn()
+        if conn is not None:
+            row = conn.execute(
+                "SELECT status, headers, body, stored_at, expires_at FROM entries WHERE key = ? AND expires_at > ?",
+                (key, now),
+            ).fetchone()
+            if row is not None:
+                tags = tuple(t for (t,) in conn.execute("SELECT tag FROM entry_tags WHERE key = ?", (key,)))
+                headers = [(k.encode("latin-1"), v.encode("latin-1")) for k, v in json.loads(row[1])]
+                entry = CachedResponse(row[0], headers, row[2], row[3], row[4], tags)
+                self._remember(key, entry)
+                record_cache("response", True)
+                return entry, "HIT-SHARED"
+        record_cache("response", False)
+        return None, "MISS"
+
+    def _remember(self, key: str, entry: CachedResponse) -> None:
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def epochs(self, tags: Sequence[str]) -> Tuple[Tuple[int, ...], int]:
+        """Snapshot taken before computing a response, checked again by ``store``."""
+        self.sync()
+        with self._lock:
+            return tuple(self._tag_epochs.get(t, 0) for t in tags), self._seen_log_id
+
+    def store(self, key: str, entry: CachedResponse, snapshot: Tuple[Tuple[int, ...], int]) -> bool:
+        epochs, log_id = snapshot
+        with self._lock:
+            if tuple(self._tag_epochs.get(t, 0) for t in entry.tags) != epochs:
+                return False
+        conn = self._conn()
+        if conn is not None:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if entry.tags:
+                    # Another worker may have invalidated one of the tags while we were computing
+                    placeholders = ", ".join("?" * len(entry.tags))
+                    stale = conn.execute(
+                        f"SELECT 1 FROM invalidations WHERE id > ? AND tag IN ({placeholders}) LIMIT 1",
+                        (log_id, *entry.tags),
+                    ).fetchone()
+                    if stale:
+                        conn.execute("ROLLBACK")
+                        return False
+                self._write(conn, key, entry)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        self._remember(key, entry)
+        self._stores += 1
+        if conn is not None and self._stores % 500 == 0:
+            self._prune(conn)
+        return True
+
+    @staticmethod
+    def _write(conn: sqlite3.Connection, key: str, entry: CachedResponse) -> None:
+        headers = json.dumps([(k.decode("latin-1"), v.decode("latin-1")) for k, v in entry.headers])
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (key, status, headers, body, stored_at, expires_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (key, entry.status, headers, entry.body, entry.stored_at, entry.expires_at),
+        )
+        conn.execute("DELETE FROM entry_tags WHERE key = ?", (key,))
+        conn.executemany("INSERT OR IGNORE INTO entry_tags (tag, key) VALUES (?, ?)", [(t, key) for t in entry.tags])
+
+    def _prune(self, conn: sqlite3.Connection) -> None:
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM entry_tags WHERE key IN (SELECT key FROM entries WHERE expires_at <= ?)", (now,))
+            conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+            conn.execute("DELETE FROM invalidations WHERE created_at < ?", (now - self.LOG_RETENTION_SECONDS,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    # ---------------------------------------------------------------- invalidation
+
+    def invalidate(self, *tags: str) -> None:
+        """Drop every entry carrying one of ``tags``, in all workers."""
+        tags = {t for t in tags if t}
+        if not tags:
+            return
+        with self._lock:
+            self._drop_tags_locked(tags)
+        conn = self._conn()
+        if conn is None:
+            return
+        placeholders = ", ".join("?" * len(tags))
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                f"DELETE FROM entries WHERE key IN (SELECT key FROM entry_tags WHERE tag IN ({placeholders}))",
+                tuple(tags),
+            )
+            conn.execute(f"DELETE FROM entry_tags WHERE tag IN ({placeholders})", tuple(tags))
+            conn.executemany("INSERT INTO invalidations (tag, created_at) VALUES (?, ?)", [(t, now) for t in tags])
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+        conn = self._conn()
+        if conn is not None:
+            conn.execute("DELETE FROM entries")
+            conn.execute("DELETE FROM entry_tags")
+
+
+response_cache = ResponseCache()
+
+
+def _header(scope, name: bytes) -> bytes:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value
+    return b""
+
+
+def cache_key(scope, policy: CachePolicy) -> str:
+    query = parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True)
+    if policy.vary_query is not None:
+        query = [(k, v) for k, v in query if k in policy.vary_query]
+    parts = [scope["path"], urlencode(sorted(query))]
+    parts.extend(_header(scope, h.encode("latin-1")).decode("latin-1") for h in policy.vary_headers)
+    if policy.vary_auth:
+        parts.append(hashlib.sha256(_header(scope, b"authorization")).hexdigest())
+    app_version = getattr(scope.get("app"), "version", "")
+    return hashlib.sha256("\x1f".join([app_version, *parts]).encode()).hexdigest()
+
+
+def _cacheable(status: int, headers: List[Tuple[bytes, bytes]]) -> bool:
+    if status != 200:
+        return False
+    for key, value in headers:
+        key = key.lower()
+        if key == b"set-cookie":
+            return False
+        if key == b"cache-control" and (b"no-store" in value or b"private" in value):
+            return False
+    return True
+
+
+class ResponseCacheMiddleware:
+    """Pure ASGI middleware serving, coalescing and filling the cache for routes marked with ``@cached``."""
+
+    def __init__(self, app, cache: ResponseCache = response_cache):
+        self.app = app
+        self.cache = cache
+        self.flights = SingleFlight()
+        self._routes = None
+        self._prefixes: Tuple[str, ...] = ()
+
+    def _load_routes(self, app) -> None:
+        self._routes = list(getattr(app, "routes", ()))
+        prefixes = []
+        for route in self._routes:
+            if getattr(getattr(route, "endpoint", None), "__response_cache__", None) is not None:
+                prefixes.append(route.path.split("{", 1)[0])
+        self._prefixes = tuple(prefixes)
+
+    def _match(self, scope):
+        """The route the router will pick, with its path parameters, if it is cached."""
+        for route in self._routes:
+            match, child_scope = route.matches(scope)
+            if match == Match.FULL:
+                policy = getattr(getattr(route, "endpoint", None), "__response_cache__", None)
+                return (route, policy, child_scope.get("path_params", {})) if policy else None
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+        if self._routes is None:
+            self._load_routes(scope.get("app"))
+        if not self._prefixes or not scope["path"].startswith(self._prefixes):
+            await self.app(scope, receive, send)
+            return
+        matched = self._match(scope)
+        if matched is None:
+            await self.app(scope, receive, send)
+            return
+        route, policy, path_params = matched
+        key = cache_key(scope, policy)
+        if policy.ttl > 0:
+            entry, state = self.cache.get_memory(key), "HIT"
+            if entry is None:
+                entry, state = await anyio.to_thread.run_sync(self.cache.get, key)
+            if entry is not None:
+                # Outer middleware (metrics) labels requests by the matched route
+                scope["route"] = route
+                await self._replay(entry, state, send)
+                return
+        if policy.coalesce_timeout <= 0:
+            await self._fill(scope, receive, send, key, policy, path_params)
+            return
+        try:
+            response, shared = await self.flights.run(
+                key, lambda: self._fill(scope, receive, send, key, policy, path_params), policy.coalesce_timeout
+            )
+        except FlightTimeout as exc:
+            record_cache("single_flight", False)
+            await self._send_timeout(str(exc), send)
+            return
+        if not shared:
+            return
+        record_cache("single_flight", response is not NOT_SHARED)
+        if response is NOT_SHARED:
+            await self._fill(scope, receive, send, key, policy, path_params)
+            return
+        scope["route"] = route
+        await self._replay(response, "COALESCED", send)
+
+    @staticmethod
+    async def _replay(entry: CachedResponse, state: str, send) -> None:
+        headers = [*entry.headers, (b"x-cache", state.encode())]
+        if state != "COALESCED":
+            headers.append((b"age", str(max(0, int(time.time() - entry.stored_at))).encode()))
+        await send({"type": "http.response.start", "status": entry.status, "headers": headers})
+        await send({"type": "http.response.body", "body": entry.body})
+
+    @staticmethod
+    async def _send_timeout(detail: str, send) -> None:
+        body = json.dumps({"detail": detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 504,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def _fill(self, scope, receive, send, key: str, policy: CachePolicy, path_params: Dict):
+        """Run the endpoint; returns the whole response for coalesced waiters, or ``NOT_SHARED``."""
+        tags = tuple(tag.format(**path_params) for tag in policy.tags)
+        snapshot = await anyio.to_thread.run_sync(self.cache.epochs, tags) if policy.ttl > 0 else None
+        start = None
+        chunks: List[bytes] = []
+        size = 0
+        buffered = True
+
+        async def send_wrapper(message):
+            nonlocal start, size, buffered
+            if message["type"] == "http.response.start":
+                start = message
+                message = {**message, "headers": [*message.get("headers", []), (b"x-cache", b"MISS")]}
+            elif message["type"] == "http.response.body" and buffered:
+                size += len(message.get("body", b""))
+                if size > self.cache.max_entry_bytes:
+                    buffered = False
+                    chunks.clear()
+                else:
+                    chunks.append(message.get("body", b""))
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+        if start is None or not buffered:
+            return NOT_SHARED
+        now = time.time()
+        entry = CachedResponse(
+            start["status"], list(start.get("headers", [])), b"".join(chunks), now, now + policy.ttl, tags
+        )
+        if policy.ttl > 0 and _cacheable(entry.status, entry.headers):
+            try:
+                await anyio.to_thread.run_sync(self.cache.store, key, entry, snapshot)
+            except sqlite3.Error as exc:
+                print(f"[CACHE] Failed to store response for {scope['path']}: {exc}")
+        return entry
@@ -0,0 +1,342 @@
+"""
+Warm pool of sandbox workers for coding assessments.
+
+Each worker is a long-lived ``sandbox_runner.py`` interpreter that keeps a
+locked-down judge interpreter started ahead of the next job, so a run does
+not wait for interpreter start-up. Judges only receive the code and the
+inputs; expected outputs stay in the worker, which compares them. Jobs go through a bounded queue; when it is full callers
+get ``SandboxBusy`` instead of piling up. A dispatcher thread owns each worker
+and replaces it if it dies or stops answering.
+
+Judging a submission uses batch jobs: the code is compiled once in a single
+sandboxed process that runs every test case in turn, and per-case results are
+streamed back through a ``BatchRun`` as they complete.
+
+Isolation requires the server to run as root on a host with PID, mount and
+network namespaces; otherwise the runner refuses every job (see ``sandbox_runner.py``).
+"""
+
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from ..core.config import settings
+
+
+RUNNER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sandbox_runner.py")
+SUPPORTED_LANGUAGES = ("python",)
+PASSING_STATUSES = ("passed", "completed")
+
+
+class SandboxBusy(Exception):
+    """Raised when the job queue is full."""
+
+
+class SandboxError(Exception):
+    """Raised when a worker fails to produce a result."""
+
+
+def _runner_env() -> Dict[str, str]:
+    # Nothing from the server's environment (database URLs, secrets) reaches the runner
+    env = {"PATH": "/usr/bin:/bin", "LANG": "C.UTF-8"}
+    if settings.sandbox_allow_unisolated:
+        env["SANDBOX_ALLOW_UNISOLATED"] = "1"
+    return env
+
+
+class _Worker:
+    def __init__(self):
+        self.proc = subprocess.Popen(
+            [sys.executable, "-I", "-u", RUNNER_PATH],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            bufsize=1,
+            start_new_session=True,
+            env=_runner_env(),
+        )
+
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def run(self, job: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        self.proc.stdin.write(json.dumps(job) + "\n")
+        self.proc.stdin.flush()
+        # The runner enforces the job's own deadline; this guards against the runner itself hanging
+        timer = threading.Timer(timeout, self.kill)
+        timer.start()
+        try:
+            line = self.proc.stdout.readline()
+        finally:
+            timer.cancel()
+        if not line:
+            raise SandboxError("sandbox worker exited without a result")
+        return json.loads(line)
+
+    def run_batch(self, job: Dict[str, Any], run: "BatchRun") -> None:
+        self.proc.stdin.write(json.dumps(job) + "\n")
+        self.proc.stdin.flush()
+        timeout = len(job["cases"]) * (job["time_limit_ms"] / 1000.0 + 0.5) + 10
+        timer = threading.Timer(timeout, self.kill)
+        timer.start()
+        try:
+            while True:
+                line = self.proc.stdout.readline()
+                if not line:
+                    raise SandboxError("sandbox worker exited in the middle of a batch")
+                result = json.loads(line)
+                if result.get("done"):
+                    if result.get("error"):
+                        raise SandboxError(result["error"])
+                    return
+                run._put(result)
+        finally:
+            timer.cancel()
+
+    def kill(self) -> None:
+        if self.alive():
+            self.proc.kill()
+        self.proc.wait()
+
+
+class BatchRun:
+    """Per-case results of a batch job, iterable as they arrive."""
+
+    _END = object()
+
+    def __init__(self, total: int, timeout: float):
+        self.total = total
+        self.timeout = timeout
+        self._results: "queue.Queue[Any]" = queue.Queue()
+
+    def _put(self, result: Dict[str, Any]) -> None:
+        self._results.put(result)
+
+    def _finish(self, error: Optional[BaseException] = None) -> None:
+        self._results.put(error if error is not None else self._END)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        while True:
+            try:
+                item = self._results.get(timeout=self.timeout)
+            except queue.Empty:
+                raise TimeoutError("timed out waiting for the code runner")
+            if item is self._END:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+
+# A queued job and the future or batch receiving its result; None stops a worker thread
+QueueItem = Optional[tuple[Dict[str, Any], Union[Future, BatchRun]]]
+
+
+class SandboxPool:
+    def __init__(
+        self,
+        workers: int = settings.sandbox_workers,
+        max_queue: int = settings.sandbox_queue_size,
+    ):
+        self.size = workers or os.cpu_count() or 1
+        self._queue: "queue.Queue[QueueItem]" = queue.Queue(maxsize=max_queue)
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"jobs": 0, "restarts": 0}
+
+    def start(self) -> None:
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.size):
+                ready = threading.Event()
+                t = threading.Thread(target=self._dispatch, args=(ready,), name=f"sandbox-{i}", daemon=True)
+                t.start()
+                ready.wait()
+                self._threads.append(t)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._queue.put(None)
+        for t in threads:
+            t.join(5)
+
+    def submit(
+        self,
+        code: str,
+        stdin: str = "",
+        expected_output: Optional[str] = None,
+        time_limit_ms: int = settings.sandbox_time_limit_ms,
+        memory_mb: int = settings.sandbox_memory_mb,
+    ) -> Future:
+        """Queue a single run; the future resolves to the runner's result dict."""
+        self.start()
+        job = {
+            "code": code,
+            "input": stdin,
+            "expected_output": expected_output,
+            "time_limit_ms": min(time_limit_ms, settings.sandbox_max_time_limit_ms),
+            "memory_mb": min(memory_mb, settings.sandbox_max_memory_mb),
+            "max_output_bytes": settings.sandbox_max_output_bytes,
+        }
+        future: Future = Future()
+        try:
+            self._queue.put_nowait((job, future))
+        except queue.Full:
+            raise SandboxBusy("Code runner is busy, try again shortly")
+        return future
+
+    def submit_batch(
+        self,
+        code: str,
+        cases: List[Dict[str, Any]],
+        time_limit_ms: int = settings.sandbox_time_limit_ms,
+        memory_mb: int = settings.sandbox_memory_mb,
+        stop_on_first_failure: bool = False,
+    ) -> BatchRun:
+        """Queue a judge run over ``cases``; iterate the result to stream per-case outcomes."""
+        self.start()
+        time_limit_ms = min(time_limit_ms, settings.sandbox_max_time_limit_ms)
+        job = {
+            "mode": "batch",
+            "code": code,
+            "cases": [{"input": c.get("input") or "", "expected_output": c.get("expected_output")} for c in cases],
+            "stop_on_first_failure": stop_on_first_failure,
+            "time_limit_ms": time_limit_ms,
+            "memory_mb": min(memory_mb, settings.sandbox_max_memory_mb),
+            "max_output_bytes": settings.sandbox_max_output_bytes,
+        }
+        # Includes time spent waiting in the queue behind other jobs
+        run = BatchRun(len(cases), timeout=time_limit_ms / 1000.0 * max(len(cases), 1) + 30)
+        try:
+            self._queue.put_nowait((job, run))
+        except queue.Full:
+            raise SandboxBusy("Code runner is busy, try again shortly")
+        return run
+
+    def _dispatch(self, ready: threading.Event) -> None:
+        worker = _Worker()
+        ready.set()
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            job, sink = item
+            if isinstance(sink, Future) and not sink.set_running_or_notify_cancel():
+                continue
+            if not worker.alive():
+                worker = self._restart(worker)
+            try:
+                if isinstance(sink, BatchRun):
+                    worker.run_batch(job, sink)
+                    sink._finish()
+                else:
+                    sink.set_result(worker.run(job, timeout=job["time_limit_ms"] / 1000.0 + 5))
+                self.stats["jobs"] += 1
+            except Exception as e:
+                print(f"[SANDBOX] Worker failed: {e}")
+                error = e if isinstance(e, SandboxError) else SandboxError(str(e))
+                if isinstance(sink, BatchRun):
+                    sink._finish(error)
+                else:
+                    sink.set_exception(error)
+                worker = self._restart(worker)
+        worker.kill()
+
+    def _restart(self, worker: _Worker) -> _Worker:
+        worker.kill()
+        self.stats["restarts"] += 1
+        return _Worker()
+
+
+sandbox_pool = SandboxPool()
+
+
+def _case_result(index: int, case: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
+    hidden = bool(case.get("hidden"))
+    out = {
+        "index": index,
+        "hidden": hidden,
+        "status": result["status"],
+        "time_ms": result["time_ms"],
+        "cpu_ms": result["cpu_ms"],
+        "memory_kb": result["memory_kb"],
+        "exit_code": result["exit_code"],
+    }
+    if not hidden:
+        out.update(stdout=result["stdout"], stderr=result["stderr"], expected_output=case.get("expected_output"))
+    return out
+
+
+def _judge_options(criteria: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    limits = (criteria or {}).get("limits") or {}
+    return {
+        "time_limit_ms": int(limits.get("time_limit_ms", settings.sandbox_time_limit_ms)),
+        "memory_mb": int(limits.get("memory_mb", settings.sandbox_memory_mb)),
+        "stop_on_first_failure": bool((criteria or {}).get("stop_on_first_failure", False)),
+    }
+
+
+def judge_stream(code: str, criteria: Optional[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """
+    Judge ``code`` against the test cases in an assessment's evaluation criteria:
+    ``{"test_cases": [{"input", "expected_output", "hidden"}], "limits": {"time_limit_ms", "memory_mb"},
+    "stop_on_first_failure": bool}``.
+
+    Yields one ``{"type": "case", ...}`` event per finished case, then a
+    ``{"type": "summary", ...}`` event. Queueing happens eagerly so
+    ``SandboxBusy`` is raised before the first event is consumed.
+    """
+    cases = (criteria or {}).get("test_cases") or []
+    run = sandbox_pool.submit_batch(code, cases, **_judge_options(criteria))
+    return _judge_events(run, cases)
+
+
+def _judge_events(run: BatchRun, cases: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    passed = 0
+    failing = None
+    judged = 0
+    for result in run:
+        index = result["index"]
+        judged += 1
+        if result["status"] in PASSING_STATUSES:
+            passed += 1
+        elif failing is None:
+            failing = result["status"]
+        yield {"type": "case", **_case_result(index, cases[index], result)}
+    yield {
+        "type": "summary",
+        "status": failing or "passed",
+        "passed": passed,
+        "judged": judged,
+        "total": len(cases),
+    }
+
+
+def run_test_cases(code: str, criteria: Optional[Dict[str, Any]], stdin: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Run ``code`` against the assessment's test cases and collect every result.
+    With ``stdin`` the code is run once against that input and nothing is compared.
+    """
+    if stdin is not None:
+        options = _judge_options(criteria)
+        case = {"input": stdin, "expected_output": None}
+        future = sandbox_pool.submit(code, stdin, None, options["time_limit_ms"], options["memory_mb"])
+        result = _case_result(0, case, future.result(timeout=options["time_limit_ms"] / 1000.0 + 30))
+        return {"status": result["status"], "passed": int(result["status"] in PASSING_STATUSES), "total": 1,
+                "cases": [result]}
+    results = []
+    for event in judge_stream(code, criteria):
+        if event.pop("type") == "case":
+            results.append(event)
+        else:
+            summary = event
+    return {"status": summary["status"], "passed": summary["passed"], "total": summary["total"], "cases": results}
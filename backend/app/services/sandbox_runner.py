@@ -0,0 +1,538 @@
+"""
+Sandbox worker process for running candidate code.
+
+This file is executed directly (``python -I sandbox_runner.py``) by
+``app.services.sandbox`` and must not import anything from the app. A worker
+stays warm and reads one JSON job per line on stdin.
+
+The worker holds the expected outputs, so candidate code never runs in a
+process forked from it. Every job gets a fresh judge interpreter (this file's
+source with ``--judge``, started through ``execve``) running as ``nobody`` and
+as PID 1 of its own PID, mount, IPC and network namespaces. It cannot see or
+signal any other run, and its filesystem is a read-only root holding only the
+interpreter and system libraries, with a private writable ``/tmp``. The judge
+only ever receives the code and one input at a time. It compiles the code once and forks a short-lived, rlimited
+child per input, so every case keeps its own time limit and a crash only fails
+that case. The worker sends the next input once the previous result is back,
+compares the output with the expected one and writes the verdict. The next
+judge is started while the worker waits for a job, so a run does not pay for
+interpreter start-up.
+
+Isolation needs root and PID, mount and network namespaces. Without them every job fails
+with an ``internal_error`` unless ``SANDBOX_ALLOW_UNISOLATED=1`` is set. That
+setting is for local development only: the code then runs as the server's own
+user, with sockets merely patched out.
+
+Single runs write one result line. Batch runs (``"mode": "batch"``) write one
+result line per case as soon as it finishes, followed by a ``{"done": true}``
+line.
+
+Job:    {"code": str, "input": str, "expected_output": str | null,
+         "time_limit_ms": int, "memory_mb": int, "max_output_bytes": int}
+Batch:  {"mode": "batch", "code": str, "cases": [{"input", "expected_output"}],
+         "stop_on_first_failure": bool, "time_limit_ms", "memory_mb", "max_output_bytes"}
+Result: {"status": "passed" | "failed" | "completed" | "runtime_error" |
+         "timeout" | "memory_limit" | "output_limit" | "compile_error",
+         "exit_code": int | null, "stdout": str, "stderr": str,
+         "time_ms": float, "cpu_ms": float, "memory_kb": int}
+"""
+
+import ctypes
+import io
+import json
+import os
+import resource
+import select
+import shutil
+import signal
+import sys
+import tempfile
+import time
+import traceback
+
+CLONE_NEWNS = 0x00020000
+CLONE_NEWIPC = 0x08000000
+CLONE_NEWPID = 0x20000000
+CLONE_NEWNET = 0x40000000
+NAMESPACES = CLONE_NEWNS | CLONE_NEWIPC | CLONE_NEWPID | CLONE_NEWNET
+MS_RDONLY = 0x1
+MS_NOSUID = 0x2
+MS_NODEV = 0x4
+MS_REMOUNT = 0x20
+MS_BIND = 0x1000
+MS_REC = 0x4000
+MS_PRIVATE = 0x40000
+PR_SET_PDEATHSIG = 1
+PR_SET_DUMPABLE = 4
+NOBODY = 65534
+PASSING = ("passed", "completed")
+ALLOW_UNISOLATED = os.environ.get("SANDBOX_ALLOW_UNISOLATED") == "1"
+INTERPRETER = os.path.realpath(sys.executable)
+# Generous: includes starting the judge interpreter if no spare one was ready
+COMPILE_TIMEOUT_SECONDS = 10
+# The jail's root is a tmpfs mounted over /tmp inside the judge's own mount namespace
+JAIL = "/tmp"
+JAIL_TMP_MB = 64
+# Everything else on the host filesystem is invisible to the judge
+SYSTEM_PATHS = ("/usr", "/bin", "/sbin", "/lib", "/lib32", "/lib64", "/etc/ld.so.cache")
+DEVICES = ("/dev/null", "/dev/zero", "/dev/urandom")
+
+_libc = ctypes.CDLL(None, use_errno=True)
+
+
+class JudgeError(Exception):
+    """Raised when a judge process dies or stops answering."""
+
+
+def _check(result: int, action: str) -> None:
+    if result != 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, f"{action}: {os.strerror(errno)}")
+
+
+def _mount(source, target: str, fstype, flags: int, data=None) -> None:
+    encode = lambda value: value.encode() if value is not None else None  # noqa: E731
+    _check(_libc.mount(encode(source), encode(target), encode(fstype), ctypes.c_ulong(flags), encode(data)),
+           f"mount {target}")
+
+
+def _isolation_error():
+    """Why candidate code cannot be properly isolated on this host, or None if it can."""
+    if os.getuid() != 0:
+        return "the code runner must run as root to drop privileges"
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os._exit(0 if _libc.unshare(NAMESPACES) == 0 else 1)
+        except BaseException:
+            os._exit(1)
+    _, status = os.waitpid(pid, 0)
+    if os.waitstatus_to_exitcode(status) != 0:
+        return "PID, mount and network namespaces are unavailable to the code runner"
+    return None
+
+
+def _block_sockets() -> None:
+    """Development only: make the socket module unusable when no network namespace isolates the judge."""
+    import socket
+
+    def _blocked(*args, **kwargs):
+        raise OSError("network access is disabled in the sandbox")
+
+    socket.socket = _blocked
+    socket.create_connection = _blocked
+    socket.getaddrinfo = _blocked
+
+
+def _bind_readonly(path: str) -> None:
+    """Make ``path`` from the host visible at the same place in the jail, read-only."""
+    target = JAIL + path
+    if not os.path.lexists(path) or os.path.lexists(target):
+        return
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    if os.path.islink(path):
+        os.symlink(os.readlink(path), target)
+        return
+    if os.path.isdir(path):
+        os.mkdir(target)
+    else:
+        open(target, "w").close()
+    flags = MS_NOSUID if path in DEVICES else MS_NOSUID | MS_NODEV
+    _mount(path, target, None, MS_BIND)
+    _mount(None, target, None, MS_BIND | MS_REMOUNT | MS_RDONLY | flags)
+
+
+def _enter_jail() -> None:
+    """
+    Build the judge's filesystem and chroot into it. Runs as root, in a mount
+    namespace of its own: a read-only tmpfs root holding the interpreter and
+    system libraries, plus a small private writable /tmp.
+    """
+    _mount(None, "/", None, MS_REC | MS_PRIVATE)
+    _mount("sandbox", JAIL, "tmpfs", MS_NOSUID | MS_NODEV, "size=1m,mode=0755")
+    for path in SYSTEM_PATHS + (sys.base_prefix, os.path.dirname(INTERPRETER)) + DEVICES:
+        _bind_readonly(path)
+    os.mkdir(JAIL + "/tmp")
+    _mount("sandbox", JAIL + "/tmp", "tmpfs", MS_NOSUID | MS_NODEV, f"size={JAIL_TMP_MB}m,mode=1777")
+    _mount(None, JAIL, None, MS_REMOUNT | MS_RDONLY | MS_NOSUID | MS_NODEV)
+    os.chroot(JAIL)
+
+
+def _exec_judge(source: str, workdir: str, jailed: bool) -> None:
+    """Drop privileges and replace the current process with a judge interpreter."""
+    if jailed:
+        _enter_jail()
+        workdir = "/tmp"
+    os.chdir(workdir)
+    if os.getuid() == 0:
+        os.chown(workdir, NOBODY, NOBODY)
+        os.setgroups([])
+        os.setgid(NOBODY)
+        os.setuid(NOBODY)
+    elif not ALLOW_UNISOLATED:
+        raise RuntimeError("cannot drop privileges without root")
+    # Set after the uid change, which clears it: the judge dies with its parent
+    _libc.prctl(PR_SET_PDEATHSIG, signal.SIGKILL)
+    env = {"PATH": "/usr/bin:/bin", "HOME": workdir, "LANG": "C.UTF-8"}
+    if ALLOW_UNISOLATED:
+        env["SANDBOX_ALLOW_UNISOLATED"] = "1"
+    # A fresh interpreter: nothing from the worker's memory reaches the candidate code
+    os.execve(INTERPRETER, [INTERPRETER, "-I", "-S", "-c", source, "--judge"], env)
+
+
+def _start_judge(source: str, workdir: str) -> None:
+    """
+    Body of the worker's child: move into new PID, mount, IPC and network
+    namespaces and start the judge as PID 1 there, so it cannot see or signal
+    anything outside and everything it leaves behind dies with it.
+    """
+    os.setsid()
+    os.closerange(3, 256)
+    jailed = _libc.unshare(NAMESPACES) == 0
+    if not jailed and not ALLOW_UNISOLATED:
+        raise RuntimeError("namespaces are unavailable")
+    pid = os.fork()
+    if pid == 0:
+        try:
+            _exec_judge(source, workdir, jailed)
+        finally:
+            os._exit(1)
+    _, status = os.waitpid(pid, 0)
+    os._exit(os.waitstatus_to_exitcode(status))
+
+
+def _apply_limits(job: dict) -> None:
+    cpu_seconds = max(1, int(job["time_limit_ms"] / 1000.0 + 0.999))
+    memory = job["memory_mb"] * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1))
+    resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (1024 * 1024, 1024 * 1024))
+    resource.setrlimit(resource.RLIMIT_NOFILE, (32, 32))
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+    try:
+        resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+    except (ValueError, OSError):
+        pass
+
+
+def _execute(compiled, job: dict, stdin_r: int, stdout_w: int, stderr_w: int) -> None:
+    """Body of a forked child: wire up stdio, apply limits, run the code and exit."""
+    code = 1
+    try:
+        os.dup2(stdin_r, 0)
+        os.dup2(stdout_w, 1)
+        os.dup2(stderr_w, 2)
+        os.closerange(3, 256)
+        _apply_limits(job)
+        sys.stdin = io.TextIOWrapper(io.FileIO(0, "r"))
+        sys.stdout = io.TextIOWrapper(io.FileIO(1, "w"), write_through=False)
+        sys.stderr = io.TextIOWrapper(io.FileIO(2, "w"), write_through=True)
+        try:
+            exec(compiled, {"__name__": "__main__", "__builtins__": __builtins__})
+            code = 0
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        except MemoryError:
+            sys.stderr.write("MemoryError\n")
+            code = 137
+        except BaseException as e:
+            # Drop the runner's own frame so the traceback starts at the submission
+            traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+            code = 1
+        sys.stdout.flush()
+        sys.stderr.flush()
+    finally:
+        os._exit(code)
+
+
+def _kill(pid: int) -> None:
+    for target in (lambda: os.killpg(pid, signal.SIGKILL), lambda: os.kill(pid, signal.SIGKILL)):
+        try:
+            target()
+        except (ProcessLookupError, PermissionError):
+            pass
+
+
+def _reap(pid: int, deadline: float):
+    """
+    Wait for ``pid`` without blocking past ``deadline``, then kill it. A child
+    may close its stdout and stderr and keep running, so EOF is not an exit.
+    Returns ``(status, rusage, killed)``.
+    """
+    while True:
+        reaped, status, usage = os.wait4(pid, os.WNOHANG)
+        if reaped:
+            return status, usage, False
+        if time.monotonic() >= deadline:
+            _kill(pid)
+            _, status, usage = os.wait4(pid, 0)
+            return status, usage, True
+        time.sleep(0.001)
+
+
+def _normalize(output: str) -> str:
+    return "\n".join(line.rstrip() for line in output.strip().splitlines())
+
+
+def _spawn_and_wait(job: dict, stdin_text: str, before_exec, compiled) -> dict:
+    """Fork a child running the code, feed it ``stdin_text`` and classify how it ended."""
+    stdin_r, stdin_w = os.pipe()
+    stdout_r, stdout_w = os.pipe()
+    stderr_r, stderr_w = os.pipe()
+    started = time.monotonic()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            before_exec()
+        except BaseException:
+            os._exit(1)
+        _execute(compiled, job, stdin_r, stdout_w, stderr_w)
+    os.close(stdin_r)
+    os.close(stdout_w)
+    os.close(stderr_w)
+
+    pending_input = (stdin_text or "").encode("utf-8")
+    outputs = {stdout_r: bytearray(), stderr_r: bytearray()}
+    limit = job["max_output_bytes"]
+    deadline = started + job["time_limit_ms"] / 1000.0
+    timed_out = output_exceeded = False
+    writers = [stdin_w] if pending_input else []
+    if not pending_input:
+        os.close(stdin_w)
+    readers = [stdout_r, stderr_r]
+    while readers:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            timed_out = True
+            break
+        ready_r, ready_w, _ = select.select(readers, writers, [], remaining)
+        for fd in ready_w:
+            try:
+                written = os.write(fd, pending_input[:65536])
+                pending_input = pending_input[written:]
+            except BrokenPipeError:
+                pending_input = b""
+            if not pending_input:
+                os.close(fd)
+                writers = []
+        for fd in ready_r:
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                readers.remove(fd)
+                continue
+            outputs[fd].extend(chunk)
+            if len(outputs[fd]) > limit:
+                output_exceeded = True
+        if output_exceeded:
+            break
+    if writers:
+        os.close(stdin_w)
+    if readers:
+        _kill(pid)
+        _, status, usage = os.wait4(pid, 0)
+    else:
+        status, usage, killed = _reap(pid, deadline)
+        timed_out = timed_out or killed
+    elapsed_ms = (time.monotonic() - started) * 1000.0
+    os.close(stdout_r)
+    os.close(stderr_r)
+
+    stdout = outputs[stdout_r][:limit].decode("utf-8", errors="replace")
+    stderr = outputs[stderr_r][:limit].decode("utf-8", errors="replace")
+    exit_code = os.WEXITSTATUS(status) if os.WIFEXITED(status) else None
+    signalled = os.WTERMSIG(status) if os.WIFSIGNALED(status) else None
+
+    if output_exceeded:
+        verdict = "output_limit"
+    elif timed_out or signalled == signal.SIGXCPU:
+        verdict = "timeout"
+    elif exit_code == 137 or "MemoryError" in stderr[-200:]:
+        verdict = "memory_limit"
+    elif exit_code != 0:
+        verdict = "runtime_error"
+    else:
+        verdict = "completed"
+
+    return {
+        "status": verdict,
+        "exit_code": exit_code,
+        "stdout": stdout,
+        "stderr": stderr,
+        "time_ms": round(elapsed_ms, 2),
+        "cpu_ms": round((usage.ru_utime + usage.ru_stime) * 1000.0, 2),
+        "memory_kb": usage.ru_maxrss,
+    }
+
+
+def judge_main() -> None:
+    """
+    Body of the judge interpreter: read the code and limits, compile once, then
+    run the code on each input line that arrives and write one result per input.
+    """
+    # Loaded once so forked children start with them imported
+    import array, bisect, collections, dataclasses, decimal, fractions, functools, heapq  # noqa: E401,F401
+    import itertools, math, operator, random, re, statistics, string, typing  # noqa: E401,F401
+
+    # Keeps the case children, which run as the same user, from tracing the judge
+    _libc.prctl(PR_SET_DUMPABLE, 0)
+    if ALLOW_UNISOLATED:
+        _block_sockets()
+    requests = io.open(0, "rb")
+    replies = io.TextIOWrapper(io.FileIO(1, "w"), write_through=True)
+    job = json.loads(requests.readline())
+    try:
+        compiled = compile(job.pop("code"), "<submission>", "exec")
+    except (SyntaxError, ValueError) as e:
+        replies.write(json.dumps({"compile_error": "".join(traceback.format_exception_only(type(e), e))}) + "\n")
+        return
+    replies.write(json.dumps({"compiled": True}) + "\n")
+    index = 0
+    while True:
+        line = requests.readline()
+        if not line:
+            return
+        casedir = os.path.abspath(str(index))
+        os.mkdir(casedir)
+        result = _spawn_and_wait(job, json.loads(line)["input"], lambda: os.chdir(casedir), compiled)
+        shutil.rmtree(casedir, ignore_errors=True)
+        replies.write(json.dumps(result) + "\n")
+        index += 1
+
+
+class Judge:
+    """A judge interpreter started for one job, spoken to in JSON lines over a pair of pipes."""
+
+    def __init__(self, source: str):
+        self.workdir = tempfile.mkdtemp(prefix="sandbox-")
+        requests_r, requests_w = os.pipe()
+        replies_r, replies_w = os.pipe()
+        self.pid = os.fork()
+        if self.pid == 0:
+            try:
+                os.dup2(requests_r, 0)
+                os.dup2(replies_w, 1)
+                _start_judge(source, self.workdir)
+            finally:
+                os._exit(1)
+        os.close(requests_r)
+        os.close(replies_w)
+        self._requests = requests_w
+        self._replies = replies_r
+        self._buffer = b""
+
+    def send(self, message: dict) -> None:
+        data = (json.dumps(message) + "\n").encode("utf-8")
+        try:
+            while data:
+                data = data[os.write(self._requests, data):]
+        except BrokenPipeError:
+            raise JudgeError("judge process crashed")
+
+    def receive(self, deadline: float) -> dict:
+        while b"\n" not in self._buffer:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise JudgeError("judge exceeded its deadline")
+            ready, _, _ = select.select([self._replies], [], [], remaining)
+            if not ready:
+                continue
+            chunk = os.read(self._replies, 65536)
+            if not chunk:
+                raise JudgeError("judge process crashed")
+            self._buffer += chunk
+        line, self._buffer = self._buffer.split(b"\n", 1)
+        return json.loads(line)
+
+    def close(self) -> None:
+        os.close(self._requests)
+        os.close(self._replies)
+        _kill(self.pid)
+        os.waitpid(self.pid, 0)
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+def _judge_cases(judge: Judge, job: dict, cases: list):
+    """Send the code, then each case's input in turn; yields ``(index, result)`` with the verdict applied."""
+    judge.send({key: job[key] for key in ("code", "time_limit_ms", "memory_mb", "max_output_bytes")})
+    reply = judge.receive(time.monotonic() + COMPILE_TIMEOUT_SECONDS)
+    if "compile_error" in reply:
+        result = {"status": "compile_error", "exit_code": None, "stdout": "", "stderr": reply["compile_error"],
+                  "time_ms": 0.0, "cpu_ms": 0.0, "memory_kb": 0}
+        for index in range(len(cases)):
+            yield index, dict(result)
+        return
+    for index, case in enumerate(cases):
+        judge.send({"input": case.get("input") or ""})
+        # The judge enforces the case's own limit; this guards against the judge itself hanging
+        result = judge.receive(time.monotonic() + job["time_limit_ms"] / 1000.0 + 2)
+        expected_output = case.get("expected_output")
+        if result["status"] == "completed" and expected_output is not None:
+            result["status"] = "passed" if _normalize(result["stdout"]) == _normalize(expected_output) else "failed"
+        yield index, result
+
+
+def run_job(job: dict, judge: Judge) -> dict:
+    _, result = next(_judge_cases(judge, job, [job]))
+    return result
+
+
+def run_batch(job: dict, judge: Judge, out) -> None:
+    """Run a batch job, relaying each case result to ``out`` as soon as it arrives."""
+    error = None
+    try:
+        for index, result in _judge_cases(judge, job, job["cases"]):
+            out.write(json.dumps({"index": index, **result}) + "\n")
+            out.flush()
+            if job.get("stop_on_first_failure") and result["status"] not in PASSING:
+                break
+    except JudgeError as e:
+        error = str(e)
+    out.write(json.dumps({"done": True, "error": error}) + "\n")
+    out.flush()
+
+
+def main() -> None:
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    out = sys.stdout
+    refusal = None if ALLOW_UNISOLATED else _isolation_error()
+    # The judge gets this file's source rather than its path, which need not be readable by nobody
+    with open(__file__) as f:
+        source = f.read()
+    spare = None
+    while True:
+        if spare is None and refusal is None:
+            spare = Judge(source)
+        line = sys.stdin.readline()
+        if not line:
+            break
+        job = None
+        judge, spare = spare, None
+        try:
+            job = json.loads(line)
+            if refusal is not None:
+                raise RuntimeError(f"refusing to run code without isolation: {refusal}")
+            if job.get("mode") == "batch":
+                run_batch(job, judge, out)
+                continue
+            result = run_job(job, judge)
+        except Exception as e:
+            if job is not None and job.get("mode") == "batch":
+                out.write(json.dumps({"done": True, "error": str(e)}) + "\n")
+                out.flush()
+                continue
+            result = {"status": "internal_error", "exit_code": None, "stdout": "", "stderr": str(e),
+                      "time_ms": 0.0, "cpu_ms": 0.0, "memory_kb": 0}
+        finally:
+            if judge is not None:
+                judge.close()
+        out.write(json.dumps(result) + "\n")
+        out.flush()
+    if spare is not None:
+        spare.close()
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["--judge"]:
+        judge_main()
+    else:
+        main()
@@ -0,0 +1,376 @@
+"""
+Near-duplicate detection for code review submissions.
+
+Every submission's comments and overall feedback are split into token
+shingles, and the shingle set is reduced to a fixed-size MinHash signature
+(``num_perm`` 32-bit values) that is stored alongside the submission. The
+fraction of equal positions in two signatures estimates the Jaccard
+similarity of the underlying shingle sets.
+
+Per assessment, signatures are kept in an LSH index: each signature is cut
+into ``bands`` bands of ``num_perm / bands`` rows and every band is hashed
+into a bucket. Only submissions sharing at least one bucket are compared, so
+checking a new submission costs roughly the number of bands plus its true
+near-duplicates rather than the size of the assessment. Candidates found
+this way are verified against the signature estimate and flagged when they
+reach ``threshold``.
+
+New submissions are indexed by ``similarity.index`` jobs and re-indexing
+runs as ``similarity.reindex``; both types run one job at a time across all
+job workers. Indexes are built lazily from the stored signatures (which is
+also how the index recovers after a restart) and evicted LRU beyond a fixed
+number of assessments. Before use, a cached index loads the signatures
+stored after its newest member, so it also sees submissions indexed by other
+processes. Signatures deleted by a re-index or the archiver arrive as
+``similarity:<assessment id>`` invalidations in the response cache's log,
+which drop the assessment here.
+"""
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..db import SessionLocal
+from ..models.similarity import SimilarityMatch, SubmissionSignature
+from ..models.submission import CodeReviewSubmission
+from .jobs import enqueue, job_handler
+from .metrics import record_cache
+from .response_cache import response_cache
+
+
+_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+# Fixed so signatures stay comparable across restarts and processes
+_SEED = 20240601
+
+# (submission_id, assessment_id, candidate_id, comments, overall_feedback)
+SubmissionRow = Tuple[int, int, int, Dict[str, str], Optional[str]]
+
+
+def shingle_hashes(texts: Iterable[Optional[str]], size: int = settings.similarity_shingle_size) -> np.ndarray:
+    """32-bit hashes of the ``size``-token shingles of each text (texts are shingled separately)."""
+    hashes: Set[int] = set()
+    for text in texts:
+        tokens = _TOKEN_RE.findall((text or "").lower())
+        if not tokens:
+            continue
+        for i in range(max(1, len(tokens) - size + 1)):
+            shingle = "\x1f".join(tokens[i:i + size]).encode("utf-8")
+            hashes.add(int.from_bytes(hashlib.blake2b(shingle, digest_size=4).digest(), "little"))
+    return np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+
+
+def submission_texts(comments: Optional[Dict[str, str]], overall_feedback: Optional[str]) -> List[Optional[str]]:
+    return [*(comments or {}).values(), overall_feedback]
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = settings.similarity_num_perm, seed: int = _SEED):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        # a, b < 2**32 and hashes < 2**32, so a * x + b never overflows uint64
+        self.a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def signature(self, hashes: np.ndarray, chunk: int = 2048) -> np.ndarray:
+        signature = np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        for start in range(0, hashes.size, chunk):
+            values = (np.outer(self.a, hashes[start:start + chunk]) + self.b[:, None]) % _PRIME
+            np.minimum(signature, (values & _MAX_HASH).min(axis=1), out=signature)
+        return signature.astype(np.uint32)
+
+
+def estimate_similarity(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.count_nonzero(a == b)) / a.size
+
+
+class LSHIndex:
+    """Banded LSH buckets for one assessment."""
+
+    def __init__(self, bands: int, rows: int):
+        self.bands = bands
+        self.rows = rows
+        self.buckets: List[Dict[int, List[int]]] = [{} for _ in range(bands)]
+        self.members: Dict[int, Tuple[int, np.ndarray]] = {}
+        self.last_id = 0  # newest submission loaded or inserted
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def _keys(self, signature: np.ndarray) -> List[int]:
+        return [hash(signature[i * self.rows:(i + 1) * self.rows].tobytes()) for i in range(self.bands)]
+
+    def insert(self, submission_id: int, candidate_id: int, signature: np.ndarray) -> None:
+        if submission_id in self.members:
+            return
+        self.members[submission_id] = (candidate_id, signature)
+        self.last_id = max(self.last_id, submission_id)
+        for bucket, key in zip(self.buckets, self._keys(signature)):
+            bucket.setdefault(key, []).append(submission_id)
+
+    def query(self, signature: np.ndarray) -> Set[int]:
+        found: Set[int] = set()
+        for bucket, key in zip(self.buckets, self._keys(signature)):
+            found.update(bucket.get(key, ()))
+        return found
+
+    def near_duplicates(
+        self, submission_id: int, candidate_id: int, signature: np.ndarray, threshold: float
+    ) -> List[Tuple[int, int, float]]:
+        """(other_submission_id, other_candidate_id, similarity) for other candidates at or above ``threshold``."""
+        matches = []
+        for other_id in self.query(signature):
+            other_candidate, other_signature = self.members[other_id]
+            if other_id == submission_id or other_candidate == candidate_id:
+                continue
+            similarity = estimate_similarity(signature, other_signature)
+            if similarity >= threshold:
+                matches.append((other_id, other_candidate, similarity))
+        return matches
+
+
+class SimilarityIndex:
+    def __init__(
+        self,
+        num_perm: int = settings.similarity_num_perm,
+        bands: int = settings.similarity_bands,
+        threshold: float = settings.similarity_threshold,
+        min_shingles: int = settings.similarity_min_shingles,
+        max_assessments: int = settings.similarity_max_assessments,
+    ):
+        if num_perm % bands:
+            raise ValueError("similarity_num_perm must be a multiple of similarity_bands")
+        self.hasher = MinHasher(num_perm)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.min_shingles = min_shingles
+        self.max_assessments = max_assessments
+        self._entries: "OrderedDict[int, LSHIndex]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def _load(self, assessment_id: int, index: Optional[LSHIndex] = None) -> LSHIndex:
+        """Add the stored signatures newer than ``index``'s newest member (all of them for a new index)."""
+        index = index or LSHIndex(self.bands, self.rows)
+        db = SessionLocal()
+        try:
+            rows = db.execute(
+                select(SubmissionSignature.submission_id, SubmissionSignature.candidate_id, SubmissionSignature.signature)
+                .where(
+                    SubmissionSignature.assessment_id == assessment_id,
+                    SubmissionSignature.submission_id > index.last_id,
+                    SubmissionSignature.shingle_count >= self.min_shingles,
+                )
+                .order_by(SubmissionSignature.submission_id)
+            )
+            for submission_id, candidate_id, raw in rows:
+                signature = np.frombuffer(raw, dtype="<u4")
+                if signature.size == self.hasher.num_perm:
+                    index.insert(submission_id, candidate_id, signature)
+        finally:
+            db.close()
+        return index
+
+    def get(self, assessment_id: int) -> LSHIndex:
+        response_cache.sync()
+        with self._lock:
+            entry = self._entries.get(assessment_id)
+            record_cache("similarity", entry is not None)
+            if entry is not None:
+                self._entries.move_to_end(assessment_id)
+                return self._load(assessment_id, entry)
+            entry = self._entries[assessment_id] = self._load(assessment_id)
+            while len(self._entries) > self.max_assessments:
+                self._entries.popitem(last=False)
+            return entry
+
+    def invalidate(self, assessment_id: Optional[int] = None) -> None:
+        """Drop cached indexes here and, through the response cache's log, in every other process."""
+        with self._lock:
+            if assessment_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(assessment_id, None)
+        response_cache.invalidate(f"similarity:{assessment_id if assessment_id is not None else 'all'}")
+
+    def on_invalidate(self, tags: Set[str]) -> None:
+        """Response cache listener: drop assessments whose signatures another process deleted."""
+        with self._lock:
+            for tag in tags:
+                kind, _, assessment_id = tag.partition(":")
+                if kind != "similarity":
+                    continue
+                if assessment_id == "all":
+                    self._entries.clear()
+                elif assessment_id.isdigit():
+                    self._entries.pop(int(assessment_id), None)
+
+    def signature(self, comments: Optional[Dict[str, str]], overall_feedback: Optional[str]) -> Tuple[np.ndarray, int]:
+        hashes = shingle_hashes(submission_texts(comments, overall_feedback))
+        return self.hasher.signature(hashes), int(hashes.size)
+
+    def index_submissions(self, db: Session, rows: List[SubmissionRow]) -> List[Dict[str, Any]]:
+        """
+        Sign ``rows``, flag near-duplicates against everything already indexed
+        (including earlier rows of the same call) and stage signatures and
+        matches on ``db``. The caller commits; on failure it must call
+        ``invalidate`` because the in-memory indexes are updated eagerly.
+        """
+        ids = [row[0] for row in rows]
+        existing = set(db.scalars(select(SubmissionSignature.submission_id).where(SubmissionSignature.submission_id.in_(ids))))
+        now = datetime.utcnow()
+        signatures: List[Dict[str, Any]] = []
+        matches: List[Dict[str, Any]] = []
+        with self._lock:
+            # One refresh per assessment and call, not per row
+            indexes = {assessment_id: self.get(assessment_id) for assessment_id in {row[1] for row in rows}}
+            for submission_id, assessment_id, candidate_id, comments, overall_feedback in rows:
+                if submission_id in existing:
+                    continue
+                signature, count = self.signature(comments, overall_feedback)
+                signatures.append({
+                    "submission_id": submission_id,
+                    "assessment_id": assessment_id,
+                    "candidate_id": candidate_id,
+                    "signature": signature.astype("<u4").tobytes(),
+                    "shingle_count": count,
+                    "created_at": now,
+                })
+                # Very short submissions ("LGTM") are trivially similar; keep the signature but don't flag
+                if count < self.min_shingles:
+                    continue
+                index = indexes[assessment_id]
+                for other_id, other_candidate, similarity in index.near_duplicates(
+                    submission_id, candidate_id, signature, self.threshold
+                ):
+                    matches.append({
+                        "assessment_id": assessment_id,
+                        "submission_id": max(submission_id, other_id),
+                        "other_submission_id": min(submission_id, other_id),
+                        "candidate_id": candidate_id if submission_id > other_id else other_candidate,
+                        "other_candidate_id": other_candidate if submission_id > other_id else candidate_id,
+                        "similarity": round(similarity, 4),
+                        "detected_at": now,
+                    })
+                index.insert(submission_id, candidate_id, signature)
+        if signatures:
+            db.execute(insert(SubmissionSignature), signatures)
+        if matches:
+            db.execute(insert(SimilarityMatch), matches)
+        return matches
+
+    def _index_and_commit(self, rows: List[SubmissionRow]) -> List[Dict[str, Any]]:
+        db = SessionLocal()
+        try:
+            matches = self.index_submissions(db, rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            for assessment_id in {row[1] for row in rows}:
+                self.invalidate(assessment_id)
+            raise
+        finally:
+            db.close()
+        for match in matches:
+            print(f"[SIMILARITY] assessment={match['assessment_id']} submissions "
+                  f"{match['submission_id']}~{match['other_submission_id']} similarity={match['similarity']}")
+        return matches
+
+    def index_by_id(self, submission_ids: List[int]) -> Dict[str, int]:
+        db = SessionLocal()
+        try:
+            rows = [tuple(r) for r in db.execute(
+                select(
+                    CodeReviewSubmission.id,
+                    CodeReviewSubmission.assessment_id,
+                    CodeReviewSubmission.candidate_id,
+                    CodeReviewSubmission.comments,
+                    CodeReviewSubmission.overall_feedback,
+                )
+                .where(CodeReviewSubmission.id.in_(submission_ids))
+                .order_by(CodeReviewSubmission.id)
+            )]
+        finally:
+            db.close()
+        return {"indexed": len(rows), "flagged": len(self._index_and_commit(rows)) if rows else 0}
+
+    def schedule_new_submissions(self, submissions: List[CodeReviewSubmission]) -> None:
+        """Buffer hook: index freshly committed submissions off the request path."""
+        enqueue("similarity.index", {"submission_ids": [s.id for s in submissions]})
+
+    def reindex(self, assessment_id: Optional[int] = None, page_size: int = 1000) -> Dict[str, int]:
+        """Rebuild signatures and matches from scratch for one assessment, or all of them."""
+        db = SessionLocal()
+        try:
+            signatures = delete(SubmissionSignature)
+            matches = delete(SimilarityMatch)
+            if assessment_id is not None:
+                signatures = signatures.where(SubmissionSignature.assessment_id == assessment_id)
+                matches = matches.where(SimilarityMatch.assessment_id == assessment_id)
+            db.execute(matches)
+            db.execute(signatures)
+            db.commit()
+        finally:
+            db.close()
+        self.invalidate(assessment_id)
+
+        indexed = flagged = 0
+        last_id = 0
+        while True:
+            db = SessionLocal()
+            try:
+                query = (
+                    select(
+                        CodeReviewSubmission.id,
+                        CodeReviewSubmission.assessment_id,
+                        CodeReviewSubmission.candidate_id,
+                        CodeReviewSubmission.comments,
+                        CodeReviewSubmission.overall_feedback,
+                    )
+                    .where(CodeReviewSubmission.id > last_id)
+                    .order_by(CodeReviewSubmission.id)
+                    .limit(page_size)
+                )
+                if assessment_id is not None:
+                    query = query.where(CodeReviewSubmission.assessment_id == assessment_id)
+                rows = [tuple(r) for r in db.execute(query)]
+            finally:
+                db.close()
+            if not rows:
+                break
+            flagged += len(self._index_and_commit(rows))
+            indexed += len(rows)
+            last_id = rows[-1][0]
+        return {"indexed": indexed, "flagged": flagged}
+
+    def schedule_reindex(self, assessment_id: Optional[int] = None) -> None:
+        enqueue(
+            "similarity.reindex",
+            {"assessment_id": assessment_id},
+            unique_key=f"similarity.reindex:{assessment_id if assessment_id is not None else 'all'}",
+        )
+
+
+similarity_index = SimilarityIndex()
+response_cache.add_listener(similarity_index.on_invalidate)
+
+
+@job_handler("similarity.index", max_attempts=5, concurrency=1)
+def index_submissions_job(submission_ids: List[int]) -> Dict[str, int]:
+    return similarity_index.index_by_id(submission_ids)
+
+
+@job_handler("similarity.reindex", max_attempts=3, concurrency=1)
+def reindex_job(assessment_id: Optional[int] = None) -> Dict[str, int]:
+    result = similarity_index.reindex(assessment_id)
+    print(f"[SIMILARITY] Re-indexed assessment={assessment_id or 'all'}: {result}")
+    return result
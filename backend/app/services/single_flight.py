@@ -0,0 +1,62 @@
+"""
+Single-flight execution for the event loop: concurrent calls with the same key
+share one computation.
+
+The first caller for a key becomes the leader and runs the function. Anyone
+asking for the same key while it runs waits for the leader's result instead.
+If the leader raises, every waiter gets the same exception. Waiters give up
+after their own timeout with ``FlightTimeout``, and the leader keeps running.
+
+A leader can return ``NOT_SHARED`` (for example, a response too large to
+buffer), or be cancelled. In both cases its waiters receive ``NOT_SHARED`` and
+must compute the result themselves.
+
+Flights are per process. With several workers, a cold key is computed at most
+once per worker.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+NOT_SHARED = object()
+
+
+class FlightTimeout(Exception):
+    pass
+
+
+class SingleFlight:
+    def __init__(self):
+        self._flights: Dict[Any, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def run(self, key, fn: Callable[[], Awaitable[Any]], timeout: float) -> Tuple[Any, bool]:
+        """``(result, shared)``; ``shared`` is True when the result came from another caller's run."""
+        flight = self._flights.get(key)
+        if flight is not None:
+            try:
+                return await asyncio.wait_for(asyncio.shield(flight), timeout), True
+            except asyncio.TimeoutError:
+                raise FlightTimeout(f"No result for an identical in-flight request within {timeout:g}s")
+
+        flight = asyncio.get_running_loop().create_future()
+        self._flights[key] = flight
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            flight.set_result(NOT_SHARED)
+            raise
+        except BaseException as exc:
+            flight.set_exception(exc)
+            # Nobody may be waiting; mark the exception as retrieved so asyncio does not log it again
+            flight.exception()
+            raise
+        else:
+            flight.set_result(result)
+            return result, False
+        finally:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
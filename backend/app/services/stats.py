@@ -0,0 +1,194 @@
+"""
+Precomputed assessment and candidate counters.
+
+Counters live in the ``assessment_stats`` and ``candidate_stats`` summary
+tables and are adjusted with a single upsert per key inside the same
+transaction as the write that changes them, so reads are a primary-key
+lookup. ``reconcile`` recomputes the derived counters from the source tables
+and adds the difference to repair any drift; the ``stats.reconcile`` job runs
+it periodically, one run at a time for the whole deployment.
+"""
+
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..db import SessionLocal
+from ..models.draft import AssessmentDraft
+from ..models.invitation import AssessmentInvitation
+from ..models.stats import AssessmentStats, CandidateStats
+from ..models.submission import CodeReviewSubmission
+from .jobs import PeriodicJob, job_handler
+
+
+COUNTERS = ("assigned", "in_progress", "submitted", "evaluated", "score_sum")
+
+
+def _upsert(db: Session, model, key_column: str, deltas: Dict[int, Dict[str, float]]) -> None:
+    if not deltas:
+        return
+    insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    now = datetime.utcnow()
+    table = model.__table__
+    # One executemany per distinct set of touched counters
+    groups: Dict[Tuple[str, ...], List[Dict[str, object]]] = defaultdict(list)
+    for key, delta in deltas.items():
+        touched = tuple(name for name in COUNTERS if delta.get(name))
+        if touched:
+            groups[touched].append({key_column: key, **{name: delta.get(name, 0) for name in COUNTERS}, "updated_at": now})
+    for touched, rows in groups.items():
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[key_column],
+            set_={**{name: table.c[name] + stmt.excluded[name] for name in touched}, "updated_at": now},
+        )
+        db.execute(stmt, rows)
+
+
+def adjust(db: Session, changes: Iterable[Tuple[int, int, Dict[str, float]]]) -> None:
+    """Apply counter deltas for ``(assessment_id, candidate_id, {counter: delta})`` triples."""
+    by_assessment: Dict[int, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+    by_candidate: Dict[int, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+    for assessment_id, candidate_id, delta in changes:
+        for name, value in delta.items():
+            if assessment_id is not None:
+                by_assessment[assessment_id][name] += value
+            if candidate_id is not None:
+                by_candidate[candidate_id][name] += value
+    _upsert(db, AssessmentStats, "assessment_id", by_assessment)
+    _upsert(db, CandidateStats, "candidate_id", by_candidate)
+
+
+def record_submissions(db: Session, submissions: List[CodeReviewSubmission]) -> None:
+    """Submission buffer hook: runs inside the batch transaction."""
+    adjust(db, ((s.assessment_id, s.candidate_id, {"submitted": 1}) for s in submissions))
+
+
+def record_evaluations(db: Session, results: Dict[int, float]) -> List[Dict[str, object]]:
+    """
+    Account for ``{submission_id: new_score}`` before the scores are written.
+    Re-scored submissions only move ``score_sum`` by the difference. Returns
+    one entry per submission describing the change, for after-commit hooks.
+    """
+    if not results:
+        return []
+    previous = db.execute(
+        select(
+            CodeReviewSubmission.id,
+            CodeReviewSubmission.assessment_id,
+            CodeReviewSubmission.candidate_id,
+            CodeReviewSubmission.is_evaluated,
+            CodeReviewSubmission.evaluation_score,
+        ).where(CodeReviewSubmission.id.in_(list(results)))
+    )
+    changes = []
+    evaluations = []
+    for submission_id, assessment_id, candidate_id, was_evaluated, old_score in previous:
+        new_score = results[submission_id]
+        if was_evaluated:
+            changes.append((assessment_id, candidate_id, {"score_sum": new_score - (old_score or 0.0)}))
+        else:
+            changes.append((assessment_id, candidate_id, {"evaluated": 1, "score_sum": new_score}))
+        evaluations.append({
+            "submission_id": submission_id,
+            "assessment_id": assessment_id,
+            "candidate_id": candidate_id,
+            "was_evaluated": bool(was_evaluated),
+            "score": new_score,
+        })
+    adjust(db, changes)
+    return evaluations
+
+
+def serialize(row, key_name: str, key: int) -> Dict[str, object]:
+    if row is None:
+        return {key_name: key, "assigned": 0, "in_progress": 0, "submitted": 0, "evaluated": 0,
+                "average_score": None, "updated_at": None}
+    return {
+        key_name: key,
+        "assigned": row.assigned,
+        "in_progress": row.in_progress,
+        "submitted": row.submitted,
+        "evaluated": row.evaluated,
+        "average_score": round(row.score_sum / row.evaluated, 2) if row.evaluated else None,
+        "updated_at": row.updated_at,
+    }
+
+
+def _drift(db: Session, model, key_column: str, group_column, draft_column, invitation_column) -> Dict[int, Dict[str, float]]:
+    """``{key: {counter: actual - stored}}`` for every key whose counters are off."""
+    totals = {
+        key: [submitted, int(evaluated or 0), float(score_sum or 0.0), 0, 0]
+        for key, submitted, evaluated, score_sum in db.execute(
+            select(
+                group_column,
+                func.count(),
+                func.sum(case((CodeReviewSubmission.is_evaluated.is_(True), 1), else_=0)),
+                func.sum(CodeReviewSubmission.evaluation_score),
+            ).group_by(group_column)
+        )
+    }
+    for key, in_progress in db.execute(select(draft_column, func.count()).group_by(draft_column)):
+        totals.setdefault(key, [0, 0, 0.0, 0, 0])[3] = in_progress
+    for key, assigned in db.execute(select(invitation_column, func.count()).group_by(invitation_column)):
+        totals.setdefault(key, [0, 0, 0.0, 0, 0])[4] = assigned
+    names = ("submitted", "evaluated", "score_sum", "in_progress", "assigned")
+    drift: Dict[int, Dict[str, float]] = {}
+    for row in db.scalars(select(model)):
+        actual = totals.pop(getattr(row, key_column), (0, 0, 0.0, 0, 0))
+        delta = {name: value - getattr(row, name) for name, value in zip(names, actual)
+                 if abs(value - getattr(row, name)) > 1e-6}
+        if delta:
+            drift[getattr(row, key_column)] = delta
+    for key, actual in totals.items():
+        delta = {name: value for name, value in zip(names, actual) if value}
+        if delta:
+            drift[key] = delta
+    return drift
+
+
+def reconcile(db: Optional[Session] = None) -> Dict[str, int]:
+    """
+    Recompute derived counters from submissions, drafts and invitations and
+    apply the difference as increments. Counts and counters are read in one
+    snapshot; writes committed since then moved both, so adding the
+    difference never undoes them. Two overlapping runs would both apply it,
+    so outside of scripts this runs as the ``stats.reconcile`` job.
+    """
+    own = db is None
+    db = db or SessionLocal()
+    try:
+        if db.get_bind().dialect.name == "postgresql":
+            db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        else:
+            db.connection().exec_driver_sql("BEGIN")
+        by_assessment = _drift(db, AssessmentStats, "assessment_id", CodeReviewSubmission.assessment_id,
+                               AssessmentDraft.assessment_id, AssessmentInvitation.assessment_id)
+        by_candidate = _drift(db, CandidateStats, "candidate_id", CodeReviewSubmission.candidate_id,
+                              AssessmentDraft.candidate_id, AssessmentInvitation.candidate_id)
+        db.commit()
+        _upsert(db, AssessmentStats, "assessment_id", by_assessment)
+        _upsert(db, CandidateStats, "candidate_id", by_candidate)
+        db.commit()
+        return {"assessments": len(by_assessment), "candidates": len(by_candidate)}
+    finally:
+        if own:
+            db.close()
+
+
+@job_handler("stats.reconcile", max_attempts=3, concurrency=1)
+def reconcile_job() -> Dict[str, int]:
+    fixed = reconcile()
+    if any(fixed.values()):
+        print(f"[STATS_RECONCILE] corrected {fixed}")
+    return fixed
+
+
+# Every web worker queues the run; the unique key and concurrency 1 make it a single run
+stats_reconciler = PeriodicJob("stats.reconcile", settings.stats_reconcile_interval_seconds)
@@ -0,0 +1,235 @@
+"""
+Write-behind buffer for code review submissions.
+
+Deadline spikes produce thousands of submissions within the same minute. Instead
+of one transaction per HTTP request, request handlers enqueue their submission
+and block until a background flusher has committed it together with everything
+else that arrived in the same window (group commit). A submission is only
+acknowledged once its batch is committed, so acknowledgements are durable, and
+the wait is bounded by ``flush_interval`` plus the time of a single batch insert.
+
+A client that gave up waiting (504) cannot tell whether its submission was
+stored. Submissions carrying an idempotency key are unique per candidate and
+key: a retry resolves to the stored row instead of adding another, including
+when both copies are flushed at once by different processes (the unique
+index rejects the second batch, whose rows are then retried one by one).
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..db import SessionLocal
+from ..models.assessment import Assessment
+from ..models.candidate import Candidate
+from ..models.submission import CodeReviewSubmission
+
+
+class BufferFullError(Exception):
+    """Raised when the buffer cannot accept more submissions."""
+
+
+class SubmissionRejected(Exception):
+    """Raised for a submission that references a missing assessment or candidate."""
+
+
+class IdempotencyConflict(Exception):
+    """Raised when an idempotency key was already used for a different assessment."""
+
+
+class SubmissionBuffer:
+    def __init__(
+        self,
+        session_factory: Callable[..., Session] = SessionLocal,
+        batch_size: int = settings.submission_batch_size,
+        flush_interval: float = settings.submission_flush_interval_ms / 1000.0,
+        max_queue: int = settings.submission_queue_size,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Tuple[CodeReviewSubmission, Future]]" = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        # Hooks run inside the batch transaction, before commit: fn(db, submissions)
+        self.on_flush: List[Callable[[Session, List[CodeReviewSubmission]], None]] = []
+        # Hooks run after a successful commit: fn(submissions)
+        self.after_commit: List[Callable[[List[CodeReviewSubmission]], None]] = []
+        self.stats: Dict[str, int] = {"batches": 0, "rows": 0, "failed": 0}
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="submission-buffer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop the flusher after draining everything already enqueued."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def enqueue(
+        self,
+        assessment_id: int,
+        candidate_id: int,
+        comments: Dict[str, str],
+        overall_feedback: Optional[str] = None,
+        idempotency_key: Optional[str] = None,
+    ) -> Future:
+        """Enqueue a submission; the returned future resolves once it (or the stored retry target) is committed."""
+        self.start()
+        submission = CodeReviewSubmission(
+            assessment_id=assessment_id,
+            candidate_id=candidate_id,
+            comments=comments,
+            overall_feedback=overall_feedback,
+            submitted_at=datetime.utcnow(),
+            is_evaluated=False,
+            idempotency_key=idempotency_key,
+        )
+        future: Future = Future()
+        try:
+            self._queue.put_nowait((submission, future))
+        except queue.Full:
+            raise BufferFullError("Submission buffer is full")
+        return future
+
+    def submit(self, *args, timeout: float = settings.submission_ack_timeout_seconds, **kwargs) -> CodeReviewSubmission:
+        """Enqueue a submission and block until it has been committed."""
+        return self.enqueue(*args, **kwargs).result(timeout=timeout)
+
+    def _collect(self) -> List[Tuple[CodeReviewSubmission, Future]]:
+        try:
+            first = self._queue.get(timeout=0.1)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while not (self._stop.is_set() and self._queue.empty()):
+            batch = self._collect()
+            if batch:
+                self._flush(batch)
+
+    def _reject_missing(self, db: Session, items: List[Tuple[CodeReviewSubmission, Future]]):
+        """Validate references for the whole batch with two set-based queries."""
+        assessment_ids = {submission.assessment_id for submission, _ in items}
+        candidate_ids = {submission.candidate_id for submission, _ in items}
+        found_assessments = set(db.scalars(select(Assessment.id).where(Assessment.id.in_(assessment_ids))))
+        found_candidates = set(db.scalars(select(Candidate.id).where(Candidate.id.in_(candidate_ids))))
+        accepted = []
+        for submission, future in items:
+            if submission.assessment_id not in found_assessments:
+                future.set_exception(SubmissionRejected("Assessment not found"))
+            elif submission.candidate_id not in found_candidates:
+                future.set_exception(SubmissionRejected("Candidate not found"))
+            else:
+                accepted.append((submission, future))
+        return accepted
+
+    def _resolve_retries(self, db: Session, items: List[Tuple[CodeReviewSubmission, Future]]):
+        """
+        Answer retried submissions with the row stored for their key. Returns
+        the items to insert and (first submission, future) pairs for repeats
+        of a key within this batch, answered once the first one is committed.
+        """
+        keys = {(s.candidate_id, s.idempotency_key) for s, _ in items if s.idempotency_key}
+        if not keys:
+            return items, []
+        stored = {}
+        for row in db.scalars(select(CodeReviewSubmission).where(
+            CodeReviewSubmission.candidate_id.in_({candidate_id for candidate_id, _ in keys}),
+            CodeReviewSubmission.idempotency_key.in_({key for _, key in keys}),
+        )):
+            if (row.candidate_id, row.idempotency_key) in keys:
+                db.expunge(row)
+                stored[(row.candidate_id, row.idempotency_key)] = row
+        accepted, repeats = [], []
+        first: Dict[Tuple[int, str], CodeReviewSubmission] = {}
+        for submission, future in items:
+            key = (submission.candidate_id, submission.idempotency_key)
+            original = stored.get(key) or first.get(key)
+            if not submission.idempotency_key:
+                accepted.append((submission, future))
+            elif original is not None and original.assessment_id != submission.assessment_id:
+                future.set_exception(IdempotencyConflict("Idempotency-Key was already used for another assessment"))
+            elif key in stored:
+                future.set_result(original)
+            elif original is not None:
+                repeats.append((original, future))
+            else:
+                first[key] = submission
+                accepted.append((submission, future))
+        return accepted, repeats
+
+    def _write(self, items: List[Tuple[CodeReviewSubmission, Future]]) -> List[Tuple[CodeReviewSubmission, Future]]:
+        db = self.session_factory(expire_on_commit=False)
+        try:
+            items = self._reject_missing(db, items)
+            items, repeats = self._resolve_retries(db, items)
+            submissions = [submission for submission, _ in items]
+            if not submissions:
+                return items
+            db.add_all(submissions)
+            db.flush()
+            for hook in self.on_flush:
+                hook(db, submissions)
+            db.commit()
+            for submission in submissions:
+                db.expunge(submission)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        for hook in self.after_commit:
+            try:
+                hook(submissions)
+            except Exception as e:
+                print(f"[SUBMISSION_BUFFER_HOOK_ERROR] {e}")
+        return items + repeats
+
+    def _flush(self, batch: List[Tuple[CodeReviewSubmission, Future]]) -> None:
+        self.stats["batches"] += 1
+        try:
+            written = self._write(batch)
+        except Exception:
+            # Isolate the offending rows so the rest of the batch is still acknowledged
+            written = []
+            for item in batch:
+                if item[1].done():
+                    continue
+                item[0].id = None
+                try:
+                    written.extend(self._write([item]))
+                except Exception as e:
+                    self.stats["failed"] += 1
+                    item[1].set_exception(e)
+        self.stats["rows"] += len(written)
+        for submission, future in written:
+            future.set_result(submission)
+
+
+submission_buffer = SubmissionBuffer()
@@ -0,0 +1,376 @@
+"""
+Outbound webhooks for assessment events.
+
+Events are written to the ``webhook_outbox`` table by hooks that run inside
+the transaction of the change they describe (submission batches, evaluation
+results), one row per subscribed endpoint, so an event exists if and only if
+its change was committed.
+
+``WebhookDispatcher`` polls the outbox (and is woken right after commits),
+claims due rows, groups them per endpoint into batches of ``batch_size``
+events and POSTs each batch as ``{"events": [...]}`` through a pooled
+``requests.Session`` per endpoint. Failed batches are retried with
+exponential backoff and jitter; after ``max_attempts`` the rows are marked
+``failed`` and can be retried by hand.
+
+Every request carries ``X-Laksham-Signature: t=<unix time>,v1=<hex>`` where
+``v1`` is the HMAC-SHA256 of ``"<t>.<body>"`` with the endpoint's secret.
+
+Endpoint URLs are user supplied, so deliveries must not reach internal
+services: ``check_target`` refuses hosts resolving to loopback, private,
+link-local (cloud metadata) or reserved addresses when an endpoint is
+registered, and every connection the dispatcher opens checks the address it
+actually connected to, which also covers DNS answers that change later.
+Redirects are not followed. Only the status code of failed responses is
+kept, never the body.
+"""
+
+import hashlib
+import hmac
+import ipaddress
+import json
+import random
+import socket
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import NewConnectionError
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..db import SessionLocal
+from ..models.submission import CodeReviewSubmission
+from ..models.webhook import WebhookDelivery, WebhookEndpoint
+
+
+SIGNATURE_HEADER = "X-Laksham-Signature"
+EVENT_TYPES = ("submission.created", "submission.evaluated", "webhook.test")
+
+
+def sign(secret: str, timestamp: int, body: bytes) -> str:
+    digest = hmac.new(secret.encode(), f"{timestamp}.".encode() + body, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={digest}"
+
+
+def verify_signature(secret: str, header: Optional[str], body: bytes, tolerance: int = 300) -> bool:
+    """Check a signature header; receivers should also reject stale timestamps to prevent replays."""
+    try:
+        parts = dict(item.split("=", 1) for item in (header or "").split(","))
+        timestamp = int(parts["t"])
+    except (KeyError, ValueError):
+        return False
+    if abs(time.time() - timestamp) > tolerance:
+        return False
+    return hmac.compare_digest(sign(secret, timestamp, body), header)
+
+
+class WebhookTargetError(ValueError):
+    """The URL is not an http(s) URL of a public host."""
+
+
+def _is_public(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+def check_target(url: str) -> None:
+    """Raise ``WebhookTargetError`` unless every address of the URL's host is public."""
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise WebhookTargetError("url must be an absolute http(s) URL")
+    if settings.webhook_allow_private_targets:
+        return
+    try:
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        addresses = {info[4][0] for info in socket.getaddrinfo(parts.hostname, port, proto=socket.IPPROTO_TCP)}
+    except (OSError, ValueError) as e:
+        raise WebhookTargetError(f"cannot resolve {parts.hostname}: {e}")
+    blocked = sorted(a for a in addresses if not _is_public(a))
+    if blocked:
+        raise WebhookTargetError(f"{parts.hostname} resolves to a non-public address ({blocked[0]})")
+
+
+class _PublicHTTPConnection(HTTPConnection):
+    def _new_conn(self):
+        sock = super()._new_conn()
+        address = sock.getpeername()[0]
+        if not settings.webhook_allow_private_targets and not _is_public(address):
+            sock.close()
+            raise NewConnectionError(self, f"refusing to connect to non-public address {address}")
+        return sock
+
+
+class _PublicHTTPSConnection(_PublicHTTPConnection, HTTPSConnection):
+    pass
+
+
+class _PublicHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _PublicHTTPConnection
+
+
+class _PublicHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _PublicHTTPSConnection
+
+
+class _PublicOnlyAdapter(HTTPAdapter):
+    """Checks the peer of every new connection, so DNS changes after ``check_target`` cannot reach internal hosts."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _PublicHTTPConnectionPool,
+            "https": _PublicHTTPSConnectionPool,
+        }
+
+
+def emit(db: Session, event_type: str, items: Iterable[Dict[str, Any]]) -> int:
+    """Stage one outbox row per (event, subscribed endpoint) on ``db``; the caller commits."""
+    endpoints = [
+        endpoint_id
+        for endpoint_id, event_types in db.execute(
+            select(WebhookEndpoint.id, WebhookEndpoint.event_types).where(WebhookEndpoint.is_active.is_(True))
+        )
+        if not event_types or event_type in event_types
+    ]
+    if not endpoints:
+        return 0
+    now = datetime.utcnow()
+    rows = []
+    for item in items:
+        event_id = str(uuid.uuid4())
+        for endpoint_id in endpoints:
+            rows.append({
+                "endpoint_id": endpoint_id,
+                "event_id": event_id,
+                "event_type": event_type,
+                "payload": item,
+                "status": "pending",
+                "attempts": 0,
+                "next_attempt_at": now,
+                "created_at": now,
+            })
+    if rows:
+        db.execute(insert(WebhookDelivery), rows)
+    return len(rows)
+
+
+def record_submissions(db: Session, submissions: List[CodeReviewSubmission]) -> None:
+    """Submission buffer hook: runs inside the batch transaction."""
+    emit(db, "submission.created", (
+        {
+            "submission_id": s.id,
+            "assessment_id": s.assessment_id,
+            "candidate_id": s.candidate_id,
+            "submitted_at": s.submitted_at.isoformat() if s.submitted_at else None,
+        }
+        for s in submissions
+    ))
+
+
+def record_evaluations(db: Session, evaluations: List[Dict[str, Any]]) -> None:
+    """Evaluation hook: runs inside the transaction that stores the scores."""
+    emit(db, "submission.evaluated", (
+        {
+            "submission_id": e["submission_id"],
+            "assessment_id": e["assessment_id"],
+            "candidate_id": e["candidate_id"],
+            "score": e["score"],
+            "rescored": e["was_evaluated"],
+        }
+        for e in evaluations
+    ))
+
+
+class WebhookDispatcher:
+    def __init__(
+        self,
+        poll_interval: float = settings.webhook_poll_interval_seconds,
+        batch_size: int = settings.webhook_batch_size,
+        max_attempts: int = settings.webhook_max_attempts,
+        backoff_base: float = settings.webhook_backoff_base_seconds,
+        backoff_max: float = settings.webhook_backoff_max_seconds,
+        timeout: float = settings.webhook_timeout_seconds,
+        workers: int = settings.webhook_workers,
+    ):
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.workers = workers
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._sessions: Dict[int, requests.Session] = {}
+        self.stats: Dict[str, int] = {"batches": 0, "delivered": 0, "retried": 0, "failed": 0}
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="webhook-dispatcher", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        for session in self._sessions.values():
+            session.close()
+        self._sessions.clear()
+
+    def notify(self, *args) -> None:
+        """Wake the dispatcher after new events were committed (usable as an after-commit hook)."""
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            try:
+                # Keep going while full pages are being claimed
+                while not self._stop.is_set() and self.deliver_due() >= self.batch_size * self.workers:
+                    pass
+            except Exception as e:
+                print(f"[WEBHOOK_ERROR] {e}")
+
+    def _session(self, endpoint_id: int) -> requests.Session:
+        with self._lock:
+            session = self._sessions.get(endpoint_id)
+            if session is None:
+                session = requests.Session()
+                session.mount("http://", _PublicOnlyAdapter(pool_maxsize=self.workers))
+                session.mount("https://", _PublicOnlyAdapter(pool_maxsize=self.workers))
+                session.headers.update({"Content-Type": "application/json", "User-Agent": "Laksham-Webhooks/1.0"})
+                self._sessions[endpoint_id] = session
+            return session
+
+    def _claim(self) -> Tuple[Dict[int, WebhookEndpoint], List[WebhookDelivery]]:
+        """Lease due rows so that other dispatchers skip them while they are in flight."""
+        db = SessionLocal(expire_on_commit=False)
+        try:
+            now = datetime.utcnow()
+            query = (
+                select(WebhookDelivery)
+                .where(WebhookDelivery.status == "pending", WebhookDelivery.next_attempt_at <= now)
+                .order_by(WebhookDelivery.id)
+                .limit(self.batch_size * self.workers)
+            )
+            if db.get_bind().dialect.name == "postgresql":
+                query = query.with_for_update(skip_locked=True)
+            rows = list(db.scalars(query))
+            if not rows:
+                return {}, []
+            lease = now + timedelta(seconds=self.timeout * 2 + 30)
+            db.execute(update(WebhookDelivery).where(WebhookDelivery.id.in_([r.id for r in rows]))
+                       .values(next_attempt_at=lease))
+            endpoints = {
+                e.id: e for e in db.scalars(select(WebhookEndpoint).where(
+                    WebhookEndpoint.id.in_({r.endpoint_id for r in rows})))
+            }
+            db.commit()
+            return endpoints, rows
+        finally:
+            db.close()
+
+    def deliver_due(self) -> int:
+        """Deliver one round of due events; returns the number of events attempted."""
+        endpoints, rows = self._claim()
+        if not rows:
+            return 0
+        batches: List[Tuple[WebhookEndpoint, List[WebhookDelivery]]] = []
+        by_endpoint: Dict[int, List[WebhookDelivery]] = defaultdict(list)
+        for row in rows:
+            by_endpoint[row.endpoint_id].append(row)
+        for endpoint_id, items in by_endpoint.items():
+            endpoint = endpoints.get(endpoint_id)
+            for start in range(0, len(items), self.batch_size):
+                batches.append((endpoint, items[start:start + self.batch_size]))
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="webhook-send") as pool:
+            results = list(pool.map(lambda batch: self._post(*batch), batches))
+        self._record(list(zip(batches, results)))
+        return len(rows)
+
+    def _post(self, endpoint: Optional[WebhookEndpoint], items: List[WebhookDelivery]) -> Optional[str]:
+        """Send one batch; returns an error message or None on success."""
+        if endpoint is None or not endpoint.is_active:
+            return "endpoint is disabled"
+        body = json.dumps({
+            "events": [
+                {"id": item.event_id, "type": item.event_type, "created_at": item.created_at.isoformat(), "data": item.payload}
+                for item in items
+            ]
+        }, separators=(",", ":")).encode()
+        headers = {SIGNATURE_HEADER: sign(endpoint.secret, int(time.time()), body)}
+        try:
+            response = self._session(endpoint.id).post(
+                endpoint.url, data=body, headers=headers, timeout=self.timeout, allow_redirects=False
+            )
+        except requests.RequestException as e:
+            return f"{type(e).__name__}: {e}"
+        response.close()
+        if 200 <= response.status_code < 300:
+            return None
+        # The body is not stored: it is the receiver's data and may contain anything
+        return f"HTTP {response.status_code}"
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (attempts - 1)))
+        return delay * random.uniform(0.8, 1.2)
+
+    def _record(self, outcomes: List[Tuple[Tuple[Optional[WebhookEndpoint], List[WebhookDelivery]], Optional[str]]]) -> None:
+        now = datetime.utcnow()
+        delivered: List[int] = []
+        retries: List[Dict[str, Any]] = []
+        for (_, items), error in outcomes:
+            self.stats["batches"] += 1
+            if error is None:
+                delivered.extend(item.id for item in items)
+                continue
+            attempts = items[0].attempts + 1
+            exhausted = attempts >= self.max_attempts
+            next_attempt = now + timedelta(seconds=self._backoff(attempts))
+            for item in items:
+                retries.append({
+                    "id": item.id,
+                    "attempts": item.attempts + 1,
+                    "status": "failed" if item.attempts + 1 >= self.max_attempts else "pending",
+                    "next_attempt_at": next_attempt,
+                    "last_error": error,
+                })
+            self.stats["failed" if exhausted else "retried"] += len(items)
+            print(f"[WEBHOOK] {len(items)} events to endpoint={items[0].endpoint_id} failed "
+                  f"(attempt {attempts}): {error}")
+        db = SessionLocal()
+        try:
+            if delivered:
+                db.execute(update(WebhookDelivery).where(WebhookDelivery.id.in_(delivered))
+                           .values(status="delivered", delivered_at=now, attempts=WebhookDelivery.attempts + 1,
+                                   last_error=None))
+            if retries:
+                db.execute(update(WebhookDelivery), retries)
+            db.commit()
+        finally:
+            db.close()
+        self.stats["delivered"] += len(delivered)
+
+
+webhook_dispatcher = WebhookDispatcher()
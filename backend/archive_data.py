@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Move submissions and candidates past the retention window into the archive tables.
+
+    python archive_data.py --older-than-days 365
+    python archive_data.py --older-than-days 365 --dry-run
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.config import settings
+from app.db import SessionLocal, init_database
+from app.services.archive import count_archivable, run_archival
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--older-than-days", type=int, default=settings.archive_after_days or 365)
+    parser.add_argument("--batch-size", type=int, default=settings.archive_batch_size)
+    parser.add_argument("--dry-run", action="store_true", help="Only count the rows past the window")
+    args = parser.parse_args()
+    if args.older_than_days <= 0:
+        parser.error("--older-than-days must be positive")
+
+    init_database()
+    if args.dry_run:
+        db = SessionLocal()
+        try:
+            counts = count_archivable(db, datetime.utcnow() - timedelta(days=args.older_than_days))
+        finally:
+            db.close()
+        print(f"🔎 {counts['submissions']} submissions and up to {counts['candidates']} candidates "
+              f"are older than {args.older_than_days} days")
+        return
+
+    started = time.perf_counter()
+    moved = run_archival(args.older_than_days, args.batch_size)
+    elapsed = time.perf_counter() - started
+    print(f"✅ Archived {moved['submissions']} submissions and {moved['candidates']} candidates in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
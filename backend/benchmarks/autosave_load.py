@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Load test for draft autosave write coalescing.
+
+Simulates thousands of concurrent assessment sessions autosaving at a fixed
+rate against a DraftStore on a scratch database, and counts the SQL write
+statements and rows the flusher issues. DB writes should be bounded by
+(sessions x flush ticks), independent of the autosave rate.
+
+    python benchmarks/autosave_load.py --sessions 5000 --saves-per-second 2 --duration 20
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base
+from app.models.assessment import Assessment
+from app.models.candidate import Candidate
+from app.models.draft import AssessmentDraft
+from app.services.drafts import DraftStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=5000)
+    parser.add_argument("--saves-per-second", type=float, default=2.0, help="Autosaves per session per second")
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--flush-interval", type=float, default=5.0)
+    parser.add_argument("--database-url", help="Defaults to a scratch SQLite file")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="autosave-load-")
+    url = args.database_url or f"sqlite:///{workdir}/autosave.db"
+    engine = create_engine(url, connect_args={"check_same_thread": False} if url.startswith("sqlite") else {})
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+
+    with Session() as db:
+        assessments = [Assessment(title=f"Timed coding {i}", assessment_type="coding") for i in range(20)]
+        db.add_all(assessments)
+        db.flush()
+        candidates = [
+            {"first_name": "Load", "last_name": str(i), "email": f"autosave-{i}@example.com"}
+            for i in range(args.sessions)
+        ]
+        db.execute(Candidate.__table__.insert(), candidates)
+        db.commit()
+        assessment_ids = [a.id for a in assessments]
+        candidate_ids = [c for (c,) in db.query(Candidate.id).all()]
+
+    writes = {"statements": 0, "rows": 0}
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def count_writes(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("INSERT", "UPDATE", "DELETE")):
+            writes["statements"] += 1
+            writes["rows"] += max(cursor.rowcount, 0)
+
+    store = DraftStore(
+        session_factory=Session,
+        flush_interval=args.flush_interval,
+        journal_dir=os.path.join(workdir, "journal"),
+    )
+    store.start()
+
+    rng = random.Random(1)
+    sessions = [(candidate_ids[i], rng.choice(assessment_ids)) for i in range(args.sessions)]
+    total_rate = args.sessions * args.saves_per_second
+    interval = 1.0 / total_rate
+    started = time.perf_counter()
+    saves = 0
+    code = "def solve(xs):\n    return sorted(xs)\n"
+    while True:
+        elapsed = time.perf_counter() - started
+        if elapsed >= args.duration:
+            break
+        due = int(elapsed / interval)
+        while saves < due:
+            candidate_id, assessment_id = sessions[saves % len(sessions)]
+            store.save(candidate_id, assessment_id, {"code": code + f"# keystroke {saves}\n", "language": "python"}, saves)
+            saves += 1
+        time.sleep(0.001)
+    store.stop()
+    wall = time.perf_counter() - started
+
+    with Session() as db:
+        persisted = db.query(AssessmentDraft).count()
+    ticks = max(1, int(wall / args.flush_interval))
+    print(f"sessions:            {args.sessions} at {args.saves_per_second}/s each for {wall:.1f}s")
+    print(f"autosaves accepted:  {saves} ({saves / wall:.0f}/s)")
+    print(f"flushes:             {store.stats['flushes']}, draft rows written {store.stats['rows_written']}")
+    print(f"SQL write stmts:     {writes['statements']} ({writes['rows']} rows)")
+    print(f"write amplification: {writes['rows'] / max(saves, 1):.4f} rows per autosave")
+    print(f"bound check:         rows written {store.stats['rows_written']} <= sessions x ticks "
+          f"{args.sessions * (ticks + 1)}: {store.stats['rows_written'] <= args.sessions * (ticks + 1)}")
+    print(f"drafts persisted:    {persisted}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the streaming unified-diff parser and its line-anchor index.
+
+Generates synthetic diffs of the requested sizes, then measures parse
+throughput, peak memory and anchor lookups per second.
+
+    python benchmarks/diff_parser_bench.py --lines 10000 100000
+"""
+
+import argparse
+import io
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.diff_parser import DiffIndex, parse_unified_diff
+
+
+def synthetic_diff(total_lines: int, seed: int = 7) -> str:
+    rng = random.Random(seed)
+    out = io.StringIO()
+    written = 0
+    file_no = 0
+    while written < total_lines:
+        file_no += 1
+        out.write(f"diff --git a/src/module_{file_no}.py b/src/module_{file_no}.py\n")
+        out.write("index 1111111..2222222 100644\n")
+        out.write(f"--- a/src/module_{file_no}.py\n+++ b/src/module_{file_no}.py\n")
+        old_line = new_line = 1
+        for _ in range(rng.randint(3, 12)):
+            old_line += rng.randint(5, 60)
+            new_line = old_line + (new_line - old_line if new_line > old_line else 0)
+            body = []
+            old_count = new_count = 0
+            for _ in range(rng.randint(6, 40)):
+                kind = rng.random()
+                if kind < 0.6:
+                    body.append(f" context line {old_count}\n")
+                    old_count += 1
+                    new_count += 1
+                elif kind < 0.8:
+                    body.append(f"+added line {new_count}\n")
+                    new_count += 1
+                else:
+                    body.append(f"-removed line {old_count}\n")
+                    old_count += 1
+            out.write(f"@@ -{old_line},{old_count} +{new_line},{new_count} @@\n")
+            out.writelines(body)
+            written += len(body) + 1
+            old_line += old_count
+            new_line += new_count
+        written += 4
+    return out.getvalue()
+
+
+def run(total_lines: int, lookups: int) -> None:
+    text = synthetic_diff(total_lines)
+    lines = text.splitlines(keepends=True)
+
+    started = time.perf_counter()
+    files = 0
+    for _ in parse_unified_diff(lines):
+        files += 1
+    streaming = time.perf_counter() - started
+
+    started = time.perf_counter()
+    index = DiffIndex(parse_unified_diff(lines))
+    build = time.perf_counter() - started
+
+    tracemalloc.start()
+    DiffIndex(parse_unified_diff(lines))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    index_bytes = sum(parsed.index.nbytes() for parsed in index.files.values())
+
+    rng = random.Random(1)
+    names = list(index.files)
+    queries = [(rng.choice(names), rng.randint(1, 2000)) for _ in range(lookups)]
+    started = time.perf_counter()
+    hits = 0
+    for filename, line in queries:
+        if index.anchor(line, filename) is not None:
+            hits += 1
+    lookup = time.perf_counter() - started
+
+    print(f"{len(lines):>8} diff lines, {files} files")
+    print(f"  parse (stream):   {streaming * 1000:8.1f} ms  ({len(lines) / streaming / 1e6:.2f} M lines/s)")
+    print(f"  parse + index:    {build * 1000:8.1f} ms  peak alloc {peak / 1024:.0f} KiB, index {index_bytes / 1024:.0f} KiB")
+    print(f"  anchor lookups:   {lookups / lookup / 1e3:8.1f} k/s  ({hits} of {lookups} anchored)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--lookups", type=int, default=100_000)
+    args = parser.parse_args()
+    for total in args.lines:
+        run(total, args.lookups)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,472 @@
+#!/usr/bin/env python3
+"""
+Load-testing harness with latency regression baselines.
+
+Drives a fixed set of traffic scenarios against the API and records
+throughput and p50/p95/p99 latency for each:
+
+    content_pages      marketing page views (page list and page + sections)
+    login_burst        bursts of logins by seeded, verified users
+    candidate_listing  recruiters searching, listing and opening candidates
+    submission_spike   open-loop submission arrivals with a 5x spike mid-run
+
+By default a scratch server is started on SQLite: the databases are seeded
+directly through the models, then served by uvicorn. Pass --database-url to
+run the same thing on a local Postgres (seeding is idempotent), or --base-url
+together with the server's --database-url/--content-database-url to target a
+server you started yourself.
+
+    python benchmarks/load_harness.py                      # run and compare with the baseline
+    python benchmarks/load_harness.py --update-baseline    # record a new baseline
+    python benchmarks/load_harness.py --scenario login_burst --repeat 1 --no-compare
+
+Baselines live in benchmarks/baselines/<backend>.json. A scenario regresses
+when its p95 or p99 grows, or its throughput drops, by more than --threshold
+(default 25%), or its error rate rises by more than one percentage point; the
+harness then exits with status 1. Each scenario is measured --repeat times
+and compared on the medians, which keeps one noisy run from failing the
+check. Open-loop scenarios measure latency from
+each request's scheduled send time, so a stalled server cannot hide queueing.
+Baselines are machine-specific: record them where they are checked.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_DIR = os.path.join(BACKEND_DIR, "benchmarks", "baselines")
+sys.path.append(BACKEND_DIR)
+
+PASSWORD = "load-harness-password"
+SEARCH_TERMS = ("load", "cand", "example", "tester", "ada", "grace", "linus")
+FIRST_NAMES = ("Ada", "Grace", "Linus", "Barbara", "Edsger", "Margaret", "Ken", "Frances")
+REVIEW_WORDS = (
+    "loop", "bound", "null", "check", "missing", "error", "handling", "index", "cache", "lock", "retry", "timeout",
+    "query", "batch", "leak", "close", "rename", "variable", "test", "edge", "case", "overflow", "input", "validate",
+)
+
+# A request factory returns (label, method, path, kwargs) for one call
+RequestFactory = Callable[[Dict[str, Any]], Tuple[str, str, str, Dict[str, Any]]]
+
+
+@dataclass
+class Scenario:
+    name: str
+    requests: List[Tuple[float, RequestFactory]]
+    # Closed loop: ``users`` threads back to back. Open loop: ``rate(fraction_of_run)`` requests per second.
+    users: int = 8
+    rate: Optional[Callable[[float], float]] = None
+    concurrency: int = 64
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _page(ctx):
+    return "page", "GET", f"/api/content/pages/{random.choice(ctx['slugs'])}", {}
+
+
+def _page_list(ctx):
+    return "page_list", "GET", "/api/content/pages", {}
+
+
+def _login(ctx):
+    return "login", "POST", "/api/auth/login", {"json": {"email": random.choice(ctx["users"]), "password": PASSWORD}}
+
+
+def _search(ctx):
+    return "search", "GET", "/api/candidates/search", {"params": {"q": random.choice(SEARCH_TERMS), "limit": 20}}
+
+
+def _candidate(ctx):
+    return "candidate", "GET", f"/api/candidates/{random.choice(ctx['candidate_ids'])}", {}
+
+
+def _candidate_stats(ctx):
+    return "candidate_stats", "GET", f"/api/candidates/{random.choice(ctx['candidate_ids'])}/stats", {}
+
+
+def _candidate_list(ctx):
+    return "candidate_list", "GET", "/api/candidates/", {}
+
+
+def _submission(ctx):
+    return "submission", "POST", "/api/submissions/", {
+        "params": {"candidate_id": random.choice(ctx["candidate_ids"])},
+        "json": {
+            "assessment_id": ctx["assessment_id"],
+            # Distinct text per submission, so the load does not consist of near-duplicates
+            "comments": {
+                str(random.randint(1, 400)): " ".join(random.choices(REVIEW_WORDS, k=12)) for _ in range(3)
+            },
+            "overall_feedback": " ".join(random.choices(REVIEW_WORDS, k=20)),
+        },
+    }
+
+
+def scenarios(scale: float) -> Dict[str, Scenario]:
+    def burst(fraction: float) -> float:
+        # Two bursts per run, each a tenth of the run long, idle in between
+        return 8 * scale if (fraction * 2) % 1 < 0.2 else 0.0
+
+    def spike(fraction: float) -> float:
+        return (150 if 1 / 3 <= fraction < 2 / 3 else 30) * scale
+
+    return {
+        "content_pages": Scenario("content_pages", [(0.85, _page), (0.15, _page_list)], users=max(1, int(8 * scale))),
+        "login_burst": Scenario("login_burst", [(1.0, _login)], rate=burst),
+        "candidate_listing": Scenario(
+            "candidate_listing",
+            [(0.45, _search), (0.35, _candidate), (0.15, _candidate_stats), (0.05, _candidate_list)],
+            users=max(1, int(8 * scale)),
+        ),
+        "submission_spike": Scenario("submission_spike", [(1.0, _submission)], rate=spike, concurrency=256),
+    }
+
+
+@dataclass
+class Recorder:
+    latencies: List[float] = field(default_factory=list)
+    errors: Dict[str, int] = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    elapsed: float = 0.0
+
+    def record(self, latency: float, error: Optional[str]) -> None:
+        with self.lock:
+            self.latencies.append(latency)
+            if error:
+                self.errors[error] = self.errors.get(error, 0) + 1
+
+
+def _call(session: requests.Session, base_url: str, factory: RequestFactory, ctx, recorder: Recorder,
+          scheduled: Optional[float] = None) -> None:
+    label, method, path, kwargs = factory(ctx)
+    started = scheduled if scheduled is not None else time.perf_counter()
+    error = None
+    try:
+        res = session.request(method, base_url + path, timeout=30, **kwargs)
+        if res.status_code >= 400:
+            error = f"{label}: HTTP {res.status_code}"
+    except requests.RequestException as e:
+        error = f"{label}: {type(e).__name__}"
+    recorder.record(time.perf_counter() - started, error)
+
+
+def _pick(scenario: Scenario) -> RequestFactory:
+    weights = [w for w, _ in scenario.requests]
+    return random.choices([f for _, f in scenario.requests], weights=weights)[0]
+
+
+def run_scenario(scenario: Scenario, base_url: str, ctx, duration: float) -> Recorder:
+    recorder = Recorder()
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=scenario.concurrency, pool_maxsize=scenario.concurrency)
+    session.mount("http://", adapter)
+    started = time.perf_counter()
+    deadline = started + duration
+
+    if scenario.rate is None:
+        def user():
+            while time.perf_counter() < deadline:
+                _call(session, base_url, _pick(scenario), ctx, recorder)
+
+        threads = [threading.Thread(target=user, daemon=True) for _ in range(scenario.users)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    else:
+        with ThreadPoolExecutor(max_workers=scenario.concurrency) as pool:
+            next_send = started
+            while next_send < deadline:
+                rate = scenario.rate((next_send - started) / duration)
+                if rate <= 0:
+                    next_send += 0.05
+                    continue
+                delay = next_send - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(_call, session, base_url, _pick(scenario), ctx, recorder, next_send)
+                next_send += 1.0 / rate
+    recorder.elapsed = time.perf_counter() - started
+    return recorder
+
+
+def summarize(recorder: Recorder) -> Dict[str, Any]:
+    count = len(recorder.latencies)
+    errors = sum(recorder.errors.values())
+    ms = [v * 1000 for v in recorder.latencies]
+    return {
+        "requests": count,
+        "errors": errors,
+        "error_rate": round(errors / count, 4) if count else 0.0,
+        "throughput": round(count / recorder.elapsed, 1) if recorder.elapsed else 0.0,
+        "p50_ms": round(percentile(ms, 50), 2),
+        "p95_ms": round(percentile(ms, 95), 2),
+        "p99_ms": round(percentile(ms, 99), 2),
+        "max_ms": round(max(ms), 2) if ms else 0.0,
+    }
+
+
+def median_summary(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Per-metric median over repeated runs; totals are summed."""
+    summary = {}
+    for key in runs[0]:
+        values = sorted(run[key] for run in runs)
+        summary[key] = sum(values) if key in ("requests", "errors") else values[len(values) // 2]
+    summary["runs"] = len(runs)
+    return summary
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any], threshold: float,
+            min_delta_ms: float) -> List[str]:
+    failures = []
+    for name, current in results.items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if previous is None:
+            print(f"⚠️  {name}: no baseline, skipped")
+            continue
+        for metric in ("p95_ms", "p99_ms"):
+            limit = previous[metric] * (1 + threshold)
+            if current[metric] > limit and current[metric] - previous[metric] > min_delta_ms:
+                failures.append(f"{name}: {metric} {current[metric]} > {limit:.2f} (baseline {previous[metric]})")
+        if current["throughput"] < previous["throughput"] * (1 - threshold):
+            failures.append(f"{name}: throughput {current['throughput']}/s < baseline {previous['throughput']}/s "
+                            f"- {threshold:.0%}")
+        if current["error_rate"] > previous["error_rate"] + 0.01:
+            failures.append(f"{name}: error rate {current['error_rate']:.2%} (baseline {previous['error_rate']:.2%})")
+    return failures
+
+
+def seed(users: int, candidates: int, pages: int) -> Dict[str, Any]:
+    """Idempotently seed the configured databases; returns the ids the scenarios draw from."""
+    from sqlalchemy import select
+
+    from app.core.database import SessionLocal as NamedSessions, engines
+    from app.core.security import get_password_hash
+    from app.db import SessionLocal, init_database
+    from app.models.assessment import Assessment
+    from app.models.candidate import Candidate
+    from app.models.content import ContentBase, Page, Section
+    from app.models.user import User
+
+    init_database()
+    ContentBase.metadata.create_all(bind=engines["content"])
+
+    with SessionLocal() as db:
+        emails = [f"load-user-{i}@example.com" for i in range(users)]
+        existing = set(db.scalars(select(User.email).where(User.email.in_(emails))))
+        hashed = get_password_hash(PASSWORD)
+        db.add_all(
+            User(email=email, hashed_password=hashed, first_name="Load", last_name="User", is_verified=True)
+            for email in emails if email not in existing
+        )
+
+        candidate_emails = [f"load-candidate-{i}@example.com" for i in range(candidates)]
+        existing = set(db.scalars(select(Candidate.email).where(Candidate.email.in_(candidate_emails))))
+        rows = [
+            {"first_name": FIRST_NAMES[i % len(FIRST_NAMES)], "last_name": f"Tester{i}", "email": email,
+             "created_at": datetime.utcnow()}
+            for i, email in enumerate(candidate_emails) if email not in existing
+        ]
+        if rows:
+            db.execute(Candidate.__table__.insert(), rows)
+
+        assessment = db.scalars(select(Assessment).where(Assessment.title == "Load harness review")).first()
+        if assessment is None:
+            assessment = Assessment(title="Load harness review", assessment_type="code_review", duration_minutes=60)
+            db.add(assessment)
+        db.commit()
+        candidate_ids = list(db.scalars(select(Candidate.id).where(Candidate.email.in_(candidate_emails))))
+        assessment_id = assessment.id
+
+    with NamedSessions["content"]() as db:
+        slugs = [f"load-page-{i}" for i in range(pages)]
+        existing = set(db.scalars(select(Page.slug).where(Page.slug.in_(slugs))))
+        for slug in slugs:
+            if slug in existing:
+                continue
+            page = Page(slug=slug, title=slug.replace("-", " ").title(), content="<p>" + "Lorem ipsum " * 80 + "</p>",
+                        page_type="marketing", language="en", is_published=True, description="Load harness page")
+            page.sections = [
+                Section(section_key=f"section-{j}", title=f"Section {j}", content="Dolor sit amet " * 40,
+                        content_type="html", order=j, is_active=True)
+                for j in range(6)
+            ]
+            db.add(page)
+        db.commit()
+
+    return {"users": emails, "candidate_ids": candidate_ids, "assessment_id": assessment_id, "slugs": slugs}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(env: Dict[str, str], workers: int, log_path: str) -> Tuple[subprocess.Popen, str]:
+    port = _free_port()
+    with open(log_path, "ab") as log:
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--workers", str(workers),
+             "--log-level", "warning"],
+            cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT,
+        )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"❌ Server exited with status {process.returncode}, see {log_path}")
+        try:
+            if requests.get(f"{base_url}/api/health", timeout=1).ok:
+                return process, base_url
+        except requests.RequestException:
+            time.sleep(0.25)
+    process.terminate()
+    raise SystemExit("❌ Server did not become healthy within 60s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", action="append", help="Run only these scenarios (repeatable)")
+    parser.add_argument("--duration", type=float, default=8.0, help="Measured seconds per run")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured seconds before each scenario")
+    parser.add_argument("--repeat", type=int, default=3, help="Measured runs per scenario; metrics are medians")
+    parser.add_argument("--cooldown", type=float, default=2.0, help="Idle seconds between runs")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier for users and arrival rates")
+    parser.add_argument("--database-url", help="Primary database (default: scratch SQLite)")
+    parser.add_argument("--content-database-url", help="Content database (default: scratch SQLite)")
+    parser.add_argument("--base-url", help="Use a running server instead of starting one")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the scratch server")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--candidates", type=int, default=2000)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative regression")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0, help="Ignore latency regressions smaller than this")
+    parser.add_argument("--baseline", help="Baseline file (default: benchmarks/baselines/<backend>.json)")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--no-compare", action="store_true")
+    parser.add_argument("--output", help="Also write the results as JSON here")
+    args = parser.parse_args()
+
+    random.seed(20240601)
+    workdir = tempfile.mkdtemp(prefix="load-harness-")
+    database_url = args.database_url or f"sqlite:///{workdir}/app.db"
+    env = {
+        **os.environ,
+        "DATABASE_URL": database_url,
+        "CONTENT_DATABASE_URL": args.content_database_url or f"sqlite:///{workdir}/content.db",
+        "APP_DATABASE_URL": os.environ.get("APP_DATABASE_URL", f"sqlite:///{workdir}/legacy_app.db"),
+        "PR_CACHE_DIR": os.environ.get("PR_CACHE_DIR", f"{workdir}/pr_cache"),
+        "DRAFT_JOURNAL_DIR": os.environ.get("DRAFT_JOURNAL_DIR", f"{workdir}/draft_journal"),
+        "SENDGRID_API_KEY": "",
+    }
+    # Settings are read at import time, so the app is only imported once the environment is in place
+    os.environ.update(env)
+    backend = "postgresql" if database_url.startswith("postgresql") else "sqlite"
+    baseline_path = args.baseline or os.path.join(BASELINE_DIR, f"{backend}.json")
+
+    print(f"🌱 Seeding {backend} ({args.users} users, {args.candidates} candidates, {args.pages} pages)...")
+    ctx = seed(args.users, args.candidates, args.pages)
+
+    process = None
+    base_url = args.base_url
+    if base_url is None:
+        process, base_url = start_server(env, args.workers, os.path.join(workdir, "server.log"))
+        print(f"🚀 Started {base_url} (log: {workdir}/server.log)")
+    else:
+        print(f"🚀 Target {base_url}")
+
+    selected = scenarios(args.scale)
+    if args.scenario:
+        unknown = set(args.scenario) - set(selected)
+        if unknown:
+            parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+        selected = {name: selected[name] for name in args.scenario}
+
+    results: Dict[str, Dict[str, Any]] = {}
+    try:
+        for name, scenario in selected.items():
+            if args.warmup > 0:
+                run_scenario(scenario, base_url, ctx, args.warmup)
+            runs = []
+            errors: Dict[str, int] = {}
+            for _ in range(max(1, args.repeat)):
+                time.sleep(args.cooldown)
+                recorder = run_scenario(scenario, base_url, ctx, args.duration)
+                runs.append(summarize(recorder))
+                for error, count in recorder.errors.items():
+                    errors[error] = errors.get(error, 0) + count
+            results[name] = r = median_summary(runs)
+            print(f"📊 {name:<18} {r['throughput']:>8}/s  p50 {r['p50_ms']:>8}ms  p95 {r['p95_ms']:>8}ms  "
+                  f"p99 {r['p99_ms']:>8}ms  errors {r['errors']}/{r['requests']}")
+            for error, count in sorted(errors.items(), key=lambda item: -item[1])[:3]:
+                print(f"     {count} x {error}")
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+
+    report = {
+        "backend": backend,
+        "recorded_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "host": {"cpus": os.cpu_count(), "python": platform.python_version(), "platform": platform.platform()},
+        "settings": {"duration": args.duration, "repeat": args.repeat, "scale": args.scale, "workers": args.workers,
+                     "candidates": args.candidates},
+        "scenarios": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(baseline_path), exist_ok=True)
+        if os.path.exists(baseline_path) and args.scenario:
+            # Keep the scenarios that were not re-run
+            with open(baseline_path) as f:
+                report["scenarios"] = {**json.load(f).get("scenarios", {}), **results}
+        with open(baseline_path, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"✅ Baseline written to {os.path.relpath(baseline_path, BACKEND_DIR)}")
+        return
+
+    if args.no_compare:
+        return
+    if not os.path.exists(baseline_path):
+        print(f"⚠️  No baseline at {os.path.relpath(baseline_path, BACKEND_DIR)}; run with --update-baseline first")
+        return
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    failures = compare(results, baseline, args.threshold, args.min_delta_ms)
+    if failures:
+        print("❌ Regressions against the baseline:")
+        for failure in failures:
+            print(f"   - {failure}")
+        sys.exit(1)
+    print(f"✅ No regressions beyond {args.threshold:.0%} of the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Load test for the code review submission endpoint.
+
+Drives ``POST /api/submissions/`` at a fixed arrival rate against a running
+server and reports achieved throughput and acknowledgement latency.
+
+    python benchmarks/submission_load.py --base-url http://localhost:8001 --rate 500 --duration 30
+"""
+
+import argparse
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def seed(session, base_url, candidates):
+    res = session.post(f"{base_url}/api/assessments/", json={
+        "title": "Load test review",
+        "assessment_type": "code_review",
+        "duration_minutes": 60,
+    })
+    res.raise_for_status()
+    assessment_id = res.json()["id"]
+    candidate_ids = []
+    run = int(time.time())
+    for i in range(candidates):
+        res = session.post(f"{base_url}/api/candidates/", json={
+            "first_name": "Load",
+            "last_name": f"Tester{i}",
+            "email": f"load-{run}-{i}@example.com",
+        })
+        res.raise_for_status()
+        candidate_ids.append(res.json()["id"])
+    return assessment_id, candidate_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8001")
+    parser.add_argument("--rate", type=int, default=500, help="Target submissions per second")
+    parser.add_argument("--duration", type=int, default=30, help="Seconds to sustain the rate")
+    parser.add_argument("--candidates", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=256)
+    args = parser.parse_args()
+
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=args.concurrency, pool_maxsize=args.concurrency)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    assessment_id, candidate_ids = seed(session, args.base_url, args.candidates)
+    latencies = []
+    errors = {}
+    lock = threading.Lock()
+
+    def fire():
+        body = {
+            "assessment_id": assessment_id,
+            "comments": {str(random.randint(1, 400)): "Possible off-by-one in loop bound"},
+            "overall_feedback": "Looks reasonable overall.",
+        }
+        started = time.perf_counter()
+        try:
+            res = session.post(
+                f"{args.base_url}/api/submissions/",
+                params={"candidate_id": random.choice(candidate_ids)},
+                json=body,
+                timeout=30,
+            )
+            status = res.status_code
+        except requests.RequestException as e:
+            status = type(e).__name__
+        elapsed = time.perf_counter() - started
+        with lock:
+            if status == 201:
+                latencies.append(elapsed)
+            else:
+                errors[status] = errors.get(status, 0) + 1
+
+    total = args.rate * args.duration
+    interval = 1.0 / args.rate
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for i in range(total):
+            delay = started + i * interval - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(fire)
+    wall = time.perf_counter() - started
+
+    print(f"target rate:     {args.rate}/s for {args.duration}s ({total} submissions)")
+    print(f"acknowledged:    {len(latencies)}  errors: {errors or 0}")
+    print(f"throughput:      {len(latencies) / wall:.1f}/s")
+    if latencies:
+        ms = [l * 1000 for l in latencies]
+        print(f"latency ms:      mean={statistics.mean(ms):.1f} p50={percentile(ms, 50):.1f} "
+              f"p95={percentile(ms, 95):.1f} p99={percentile(ms, 99):.1f} max={max(ms):.1f}")
+
+
+if __name__ == "__main__":
+    main()
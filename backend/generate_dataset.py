@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+Generate a large synthetic dataset for capacity testing.
+
+Writes candidates, assessments and code review submissions to the application
+database (DATABASE_URL) and multilingual content blocks, pages and sections
+to the content database (CONTENT_DATABASE_URL), using the same engines as the
+app. Rows are generated in fixed-size chunks by a pool of worker processes;
+every chunk has its own RNG seeded from (--seed, table, chunk number), so the
+dataset is identical for a given seed no matter how chunks are scheduled.
+
+On Postgres each worker streams its chunks with COPY over its own connection.
+On SQLite, workers generate and the parent process writes each chunk with a
+single executemany (SQLite has one writer anyway).
+
+Ids continue after the current maximum of each table, so the generator can be
+run again to grow an existing database; counters are rebuilt at the end.
+
+    python generate_dataset.py --candidates 1000000 --assessments 10000 \\
+        --submissions 5000000 --content-blocks 100000 --languages en,de,fr,es,hi
+    python generate_dataset.py --scale 0.01        # the same shape, 1% of the volume
+"""
+
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import func, select, text
+
+from app.core.database import engines as named_engines
+from app.db import engine as app_engine, init_database
+from app.models.content import ContentBase
+
+
+FIRST_NAMES = (
+    "Aarav", "Ada", "Alan", "Amara", "Ana", "Ben", "Chen", "Diego", "Elena", "Emeka", "Farah", "Grace", "Hana",
+    "Ivan", "Jia", "Kofi", "Lars", "Leila", "Linus", "Maya", "Mohammed", "Nadia", "Omar", "Priya", "Rafael",
+    "Sara", "Sofia", "Tariq", "Uma", "Victor", "Wei", "Yuki", "Zara",
+)
+LAST_NAMES = (
+    "Ahmed", "Andersen", "Bauer", "Chen", "Costa", "Dubois", "Fischer", "Garcia", "Gupta", "Hoffmann", "Ivanova",
+    "Johnson", "Kim", "Kowalski", "Lopez", "Martin", "Mensah", "Nakamura", "Nguyen", "Okafor", "Patel", "Rossi",
+    "Santos", "Schmidt", "Silva", "Singh", "Smith", "Tanaka", "Williams", "Yilmaz", "Zhang",
+)
+DOMAINS = ("example.com", "mail.example.org", "corp.example.net", "uni.example.edu", "dev.example.io")
+ASSESSMENT_TYPES = (("code_review", 0.5), ("coding", 0.4), ("quiz", 0.1))
+DIFFICULTIES = ("easy", "medium", "hard")
+TOPICS = (
+    "payment service", "rate limiter", "feature flags", "search indexer", "session store", "image resizer",
+    "billing export", "audit log", "webhook relay", "notification queue", "report builder", "cache layer",
+)
+REVIEW_PHRASES = (
+    "missing null check", "possible off-by-one in the loop bound", "exception is swallowed here",
+    "this query runs once per row", "lock is held across the network call", "retry without backoff",
+    "variable name is misleading", "no test covers this branch", "input is not validated", "resource is never closed",
+    "integer overflow on large inputs", "timeout is hard-coded", "duplicate logic with the helper above",
+)
+CONTENT_CATEGORIES = ("hero", "features", "testimonials", "pricing", "faq", "footer", "blog", "legal")
+WORDS = {
+    "en": "assessment skills review candidate team project quality result feedback practice real world job",
+    "de": "Bewertung Fähigkeiten Prüfung Kandidat Team Projekt Qualität Ergebnis Rückmeldung Übung Praxis Beruf",
+    "fr": "évaluation compétences revue candidat équipe projet qualité résultat retour pratique réel métier",
+    "es": "evaluación habilidades revisión candidato equipo proyecto calidad resultado práctica real trabajo",
+    "hi": "मूल्यांकन कौशल समीक्षा उम्मीदवार टीम परियोजना गुणवत्ता परिणाम प्रतिक्रिया अभ्यास वास्तविक नौकरी",
+    "ja": "評価 スキル レビュー 候補者 チーム プロジェクト 品質 結果 フィードバック 練習 実務 仕事",
+}
+EPOCH = datetime(2024, 1, 1)
+SPAN_SECONDS = 2 * 365 * 24 * 3600
+
+
+# ---------------------------------------------------------------- row builders
+# Each builder returns the rows of one chunk as tuples in ``TABLES[table]`` column order.
+
+TABLES = {
+    "candidates": ("id", "first_name", "last_name", "email", "created_at"),
+    "assessments": (
+        "id", "title", "description", "difficulty", "duration_minutes", "assessment_type", "evaluation_criteria",
+        "created_at",
+    ),
+    "code_review_submissions": (
+        "id", "assessment_id", "candidate_id", "comments", "overall_feedback", "submitted_at", "is_evaluated",
+        "evaluation_score", "evaluation_details", "evaluated_at",
+    ),
+    "content": (
+        "id", "key", "title", "content", "content_type", "category", "language", "is_active", "meta_data",
+        "created_at", "updated_at",
+    ),
+    "pages": (
+        "id", "slug", "title", "description", "content", "page_type", "language", "is_published", "created_at",
+        "updated_at",
+    ),
+    "sections": (
+        "id", "page_id", "section_key", "title", "content", "content_type", "order", "is_active", "created_at",
+        "updated_at",
+    ),
+}
+JSON_COLUMNS = {"evaluation_criteria", "comments", "evaluation_details", "meta_data"}
+
+
+def _timestamp(rng: random.Random, after: datetime = EPOCH) -> datetime:
+    remaining = max(1, int((EPOCH + timedelta(seconds=SPAN_SECONDS) - after).total_seconds()))
+    return after + timedelta(seconds=rng.randrange(remaining), microseconds=rng.randrange(1_000_000))
+
+
+def _created_at(candidate_id: int, first_id: int, count: int) -> datetime:
+    # Candidate ids grow with time, so submissions can be placed after sign-up without a lookup
+    fraction = (candidate_id - first_id) / max(1, count)
+    return EPOCH + timedelta(seconds=int(fraction * SPAN_SECONDS * 0.8))
+
+
+def build_candidates(rng: random.Random, start: int, stop: int, plan: Dict) -> List[tuple]:
+    rows = []
+    for candidate_id in range(start, stop):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        email = f"{first}.{last}.{candidate_id}@{rng.choice(DOMAINS)}".lower()
+        created_at = _created_at(candidate_id, plan["candidates"][0], plan["candidates"][1])
+        rows.append((candidate_id, first, last, email, created_at))
+    return rows
+
+
+def build_assessments(rng: random.Random, start: int, stop: int, plan: Dict) -> List[tuple]:
+    kinds, weights = zip(*ASSESSMENT_TYPES)
+    rows = []
+    for assessment_id in range(start, stop):
+        kind = rng.choices(kinds, weights)[0]
+        topic = rng.choice(TOPICS)
+        criteria = {
+            "expected_issues": [
+                {"line": rng.randint(1, 400), "tolerance": 2, "keywords": rng.choice(REVIEW_PHRASES).split()[-2:],
+                 "weight": rng.choice((1, 2, 3))}
+                for _ in range(rng.randint(3, 8))
+            ],
+        } if kind == "code_review" else None
+        rows.append((
+            assessment_id, f"{topic.title()} {kind.replace('_', ' ')} #{assessment_id}",
+            f"Review the {topic} and report defects.", rng.choice(DIFFICULTIES), rng.choice((30, 45, 60, 90)),
+            kind, criteria, _timestamp(rng),
+        ))
+    return rows
+
+
+def build_submissions(rng: random.Random, start: int, stop: int, plan: Dict) -> List[tuple]:
+    first_candidate, candidates = plan["candidates"]
+    first_assessment, assessments = plan["assessments"]
+    rows = []
+    for submission_id in range(start, stop):
+        # A few popular assessments receive most of the traffic
+        assessment_id = first_assessment + min(assessments - 1, int(rng.paretovariate(1.2)) - 1)
+        candidate_id = first_candidate + rng.randrange(candidates)
+        submitted_at = _timestamp(rng, _created_at(candidate_id, first_candidate, candidates))
+        comments = {str(rng.randint(1, 400)): rng.choice(REVIEW_PHRASES) for _ in range(rng.randint(1, 6))}
+        evaluated = rng.random() < 0.85
+        score = round(rng.betavariate(5, 2) * 100, 2) if evaluated else None
+        rows.append((
+            submission_id, assessment_id, candidate_id, comments,
+            " ".join(rng.sample(REVIEW_PHRASES, 3)).capitalize() + ".", submitted_at, evaluated, score,
+            {"matched": rng.randint(0, 8), "total": 8} if evaluated else None,
+            submitted_at + timedelta(seconds=rng.randint(1, 600)) if evaluated else None,
+        ))
+    return rows
+
+
+def _prose(rng: random.Random, language: str, words: int) -> str:
+    vocabulary = WORDS[language].split()
+    return " ".join(rng.choice(vocabulary) for _ in range(words)).capitalize() + "."
+
+
+def build_content(rng: random.Random, start: int, stop: int, plan: Dict) -> List[tuple]:
+    languages = plan["languages"]
+    rows = []
+    for content_id in range(start, stop):
+        language = languages[content_id % len(languages)]
+        category = rng.choice(CONTENT_CATEGORIES)
+        created_at = _timestamp(rng)
+        rows.append((
+            content_id, f"gen.{category}.{content_id}.{language}", _prose(rng, language, 6),
+            _prose(rng, language, rng.randint(40, 160)), rng.choice(("text", "html", "markdown")), category,
+            language, True, {"generated": True}, created_at, created_at,
+        ))
+    return rows
+
+
+def build_pages(rng: random.Random, start: int, stop: int, plan: Dict) -> List[tuple]:
+    languages = plan["languages"]
+    rows = []
+    for page_id in range(start, stop):
+        language = languages[page_id % len(languages)]
+        created_at = _timestamp(rng)
+        rows.append((
+            page_id, f"gen-page-{page_id}-{language}", _prose(rng, language, 5), _prose(rng, language, 20),
+            _prose(rng, language, 120), rng.choice(("marketing", "blog", "docs")), language, True, created_at,
+            created_at,
+        ))
+    return rows
+
+
+def build_sections(rng: random.Random, start: int, stop: int, plan: Dict) -> List[tuple]:
+    first_page, _ = plan["pages"]
+    per_page = plan["sections_per_page"]
+    first_section = plan["sections"][0]
+    languages = plan["languages"]
+    rows = []
+    for section_id in range(start, stop):
+        offset = section_id - first_section
+        page_id = first_page + offset // per_page
+        language = languages[page_id % len(languages)]
+        created_at = _timestamp(rng)
+        rows.append((
+            section_id, page_id, f"section-{offset % per_page}", _prose(rng, language, 4),
+            _prose(rng, language, rng.randint(30, 90)), "html", offset % per_page, True, created_at, created_at,
+        ))
+    return rows
+
+
+BUILDERS: Dict[str, Callable] = {
+    "candidates": build_candidates,
+    "assessments": build_assessments,
+    "code_review_submissions": build_submissions,
+    "content": build_content,
+    "pages": build_pages,
+    "sections": build_sections,
+}
+CONTENT_TABLES = {"content", "pages", "sections"}
+
+
+# ---------------------------------------------------------------- writers
+
+def _engine_for(table: str):
+    return named_engines["content"] if table in CONTENT_TABLES else app_engine
+
+
+def _copy_value(value) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ") + "+00"
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, ensure_ascii=False)
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def _sqlite_value(value):
+    if isinstance(value, datetime):
+        # Match the text format SQLAlchemy uses for DateTime columns on SQLite
+        return value.strftime("%Y-%m-%d %H:%M:%S.%f")
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def write_rows(table: str, rows: List[tuple]) -> None:
+    engine = _engine_for(table)
+    columns = TABLES[table]
+    quoted = ", ".join(f'"{c}"' for c in columns)
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        if engine.dialect.name == "postgresql":
+            buffer = io.StringIO()
+            for row in rows:
+                buffer.write("\t".join(_copy_value(v) for v in row))
+                buffer.write("\n")
+            buffer.seek(0)
+            cursor.copy_expert(f'COPY "{table}" ({quoted}) FROM STDIN', buffer)
+        else:
+            placeholders = ", ".join("?" * len(columns))
+            cursor.executemany(
+                f'INSERT INTO "{table}" ({quoted}) VALUES ({placeholders})',
+                [tuple(_sqlite_value(v) for v in row) for row in rows],
+            )
+        cursor.close()
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def _rng(seed: int, table: str, chunk: int) -> random.Random:
+    return random.Random(f"{seed}:{table}:{chunk}")
+
+
+def _worker_init() -> None:
+    # Connections must not be shared with the parent after fork
+    app_engine.dispose(close=False)
+    for engine in named_engines.values():
+        engine.dispose(close=False)
+
+
+def _generate(seed: int, table: str, chunk: int, start: int, stop: int, plan: Dict) -> List[tuple]:
+    return BUILDERS[table](_rng(seed, table, chunk), start, stop, plan)
+
+
+def _generate_and_copy(seed: int, table: str, chunk: int, start: int, stop: int, plan: Dict) -> int:
+    rows = _generate(seed, table, chunk, start, stop, plan)
+    write_rows(table, rows)
+    return len(rows)
+
+
+def _chunks(first_id: int, count: int, chunk_size: int) -> Iterator[Tuple[int, int, int]]:
+    for number, start in enumerate(range(first_id, first_id + count, chunk_size)):
+        yield number, start, min(start + chunk_size, first_id + count)
+
+
+def load_table(pool: ProcessPoolExecutor, table: str, plan: Dict, seed: int, chunk_size: int) -> None:
+    first_id, count = plan[table]
+    if count <= 0:
+        return
+    started = time.perf_counter()
+    chunks = list(_chunks(first_id, count, chunk_size))
+    parallel_writes = _engine_for(table).dialect.name == "postgresql"
+    job = _generate_and_copy if parallel_writes else _generate
+    futures = [pool.submit(job, seed, table, number, start, stop, plan) for number, start, stop in chunks]
+    written = 0
+    for future in futures:
+        result = future.result()
+        if parallel_writes:
+            written += result
+        else:
+            write_rows(table, result)
+            written += len(result)
+        print(f"   {table}: {written:,}/{count:,}", end="\r", flush=True)
+    elapsed = time.perf_counter() - started
+    print(f"\r✅ {table}: {written:,} rows in {elapsed:.1f}s ({written / elapsed:,.0f} rows/s)")
+
+
+def _next_id(table: str) -> int:
+    with _engine_for(table).connect() as conn:
+        return (conn.execute(select(func.max(text("id"))).select_from(text(f'"{table}"'))).scalar() or 0) + 1
+
+
+def _reset_sequences(tables: Sequence[str]) -> None:
+    for table in tables:
+        engine = _engine_for(table)
+        if engine.dialect.name != "postgresql":
+            continue
+        with engine.begin() as conn:
+            conn.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), (SELECT max(id) FROM \"{table}\"))"
+            ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, default=1_000_000)
+    parser.add_argument("--assessments", type=int, default=10_000)
+    parser.add_argument("--submissions", type=int, default=5_000_000)
+    parser.add_argument("--content-blocks", type=int, default=100_000)
+    parser.add_argument("--pages", type=int, default=2_000)
+    parser.add_argument("--sections-per-page", type=int, default=8)
+    parser.add_argument("--languages", default="en,de,fr,es,hi,ja", help=f"Subset of {','.join(WORDS)}")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every volume by this factor")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--skip-stats", action="store_true", help="Do not rebuild the precomputed counters")
+    args = parser.parse_args()
+
+    languages = [lang.strip() for lang in args.languages.split(",") if lang.strip()]
+    unknown = set(languages) - set(WORDS)
+    if unknown or not languages:
+        parser.error(f"unsupported language(s): {', '.join(sorted(unknown)) or 'none given'}")
+    volumes = {
+        "candidates": args.candidates,
+        "assessments": args.assessments,
+        "code_review_submissions": args.submissions,
+        "content": args.content_blocks,
+        "pages": args.pages,
+        "sections": args.pages * args.sections_per_page,
+    }
+    volumes = {table: int(count * args.scale) for table, count in volumes.items()}
+    if volumes["code_review_submissions"] and not (volumes["candidates"] and volumes["assessments"]):
+        parser.error("submissions need at least one candidate and one assessment")
+
+    init_database()
+    ContentBase.metadata.create_all(bind=named_engines["content"])
+    plan: Dict = {table: (_next_id(table), count) for table, count in volumes.items()}
+    plan["languages"] = languages
+    plan["sections_per_page"] = args.sections_per_page
+    print(f"🧪 Generating with seed {args.seed} on {app_engine.dialect.name} "
+          f"(content: {named_engines['content'].dialect.name}), {args.workers} workers")
+
+    started = time.perf_counter()
+    context = multiprocessing.get_context("fork") if sys.platform != "win32" else None
+    with ProcessPoolExecutor(max_workers=max(1, args.workers), mp_context=context, initializer=_worker_init) as pool:
+        # Parents before children: submissions reference candidates/assessments, sections reference pages
+        for table in ("candidates", "assessments", "code_review_submissions", "content", "pages", "sections"):
+            load_table(pool, table, plan, args.seed, args.chunk_size)
+    _reset_sequences(list(TABLES))
+
+    if not args.skip_stats and volumes["code_review_submissions"]:
+        from app.services import stats
+        print("🔁 Rebuilding assessment and candidate counters...")
+        stats.reconcile()
+    print(f"🎉 Dataset ready in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
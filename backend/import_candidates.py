@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Bulk import candidates from a CSV (first_name,last_name,email) or NDJSON file.
+
+    python import_candidates.py candidates.csv
+    python import_candidates.py --format ndjson --errors errors.json campaign.jsonl
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.db import init_database
+from app.services.candidate_import import CandidateImporter, detect_format
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="File to import ('-' for stdin)")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="Defaults to the file extension")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--errors", help="Write the per-row error report to this JSON file")
+    args = parser.parse_args()
+
+    init_database()
+    importer = CandidateImporter(chunk_size=args.chunk_size)
+    fmt = detect_format(None if args.path == "-" else args.path, args.format)
+    started = time.perf_counter()
+    if args.path == "-":
+        report = importer.run(sys.stdin.buffer, fmt)
+    else:
+        with open(args.path, "rb") as f:
+            report = importer.run(f, fmt)
+    elapsed = time.perf_counter() - started
+
+    print(f"✅ Imported {report.created} of {report.total} rows in {elapsed:.1f}s "
+          f"({report.duplicates} duplicates, {report.invalid} invalid)")
+    if args.errors:
+        with open(args.errors, "w") as f:
+            json.dump(report.errors, f, indent=2)
+        print(f"📝 Error report written to {args.errors}")
+    elif report.errors:
+        for error in report.errors[:20]:
+            print(f"  row {error['row']}: {error['error']} ({error['email'] or '-'})")
+        if len(report.errors) > 20:
+            print(f"  ... and {len(report.errors) - 20} more (use --errors to save them all)")
+
+
+if __name__ == "__main__":
+    main()
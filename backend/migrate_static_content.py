@@ -14,6 +14,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.core.database import get_content_db
 from app.models.content import Content, Page, Section
+from app.services.response_cache import response_cache
 
 def migrate_home_content():
     """Migrate content from Home.tsx to the content database"""
@@ -569,6 +570,8 @@ def main():
         
         # Commit all changes
         content_db.commit()
+        # Running servers would otherwise keep serving the old pages until the cache TTL expires
+        response_cache.invalidate("content", "pages")
         
         print("✅ Static content migration completed successfully!")
         print(f"📊 Created:")
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Rebuild MinHash signatures and near-duplicate flags for existing submissions.
+
+    python reindex_similarity.py                    # every assessment
+    python reindex_similarity.py --assessment-id 12
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.db import init_database
+from app.services.similarity import similarity_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--assessment-id", type=int, help="Only re-index this assessment")
+    parser.add_argument("--page-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    init_database()
+    started = time.perf_counter()
+    result = similarity_index.reindex(args.assessment_id, page_size=args.page_size)
+    elapsed = time.perf_counter() - started
+    print(f"✅ Indexed {result['indexed']} submissions in {elapsed:.1f}s, "
+          f"{result['flagged']} near-duplicate pairs flagged")
+
+
+if __name__ == "__main__":
+    main()
@@ -22,6 +22,17 @@ fi
 # Run migrations
 alembic upgrade head || true
 
+# Production: ./run.sh --prod (multi-worker, see serve.py for tuning).
+# serve.py also supervises the background job workers (run_jobs.py)
+if [ "${1:-}" = "--prod" ]; then
+  exec python serve.py --host 0.0.0.0 --port 8001
+fi
+
+# Development: one job worker process next to the reloading server
+python run_jobs.py --processes 1 &
+JOBS_PID=$!
+trap 'kill $JOBS_PID 2>/dev/null || true' EXIT
+
 uvicorn app.main:app --reload --host 0.0.0.0 --port 8001
 
 
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Background job runner: a supervisor forking a pool of job worker processes.
+
+Each worker process runs a ``JobWorker`` (see ``app/services/jobs.py``) with
+``--threads`` handler threads, claiming jobs from the ``jobs`` table in the
+primary database. Per-type concurrency limits are enforced through the
+database, so they hold across every process and host running this script.
+
+The parent creates the schema and imports the handlers once, then forks the
+workers. A crashed worker is replaced, with a growing delay if crashes
+repeat. SIGTERM or SIGINT stops claiming and gives running jobs
+``--graceful-timeout`` seconds to finish. Jobs still running after that are
+retried once their lease expires.
+
+``--types`` gives a pool only some job types, e.g. a separate pool for
+emails so that long evaluations cannot hold them up:
+
+    python run_jobs.py                                  # one process per CPU, every type
+    python run_jobs.py --processes 2 --threads 8 --types email.verification
+"""
+
+import argparse
+import os
+import random
+import signal
+import sys
+import time
+import traceback
+from typing import Dict
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from serve import available_cpus
+
+
+class JobSupervisor:
+    def __init__(self, args, engine):
+        self.args = args
+        self.engine = engine
+        self.workers: Dict[int, float] = {}  # pid -> start time
+        self.stopping = False
+        self.crashes = 0
+
+    def _run_worker(self) -> None:
+        from app.services.jobs import JobWorker
+
+        stop = []
+        signal.signal(signal.SIGTERM, lambda *_: stop.append(True))
+        signal.signal(signal.SIGINT, lambda *_: stop.append(True))
+        # Forked children would otherwise share the parent's random state (retry jitter)
+        random.seed()
+        self.engine.dispose(close=False)
+
+        worker = JobWorker(threads=self.args.threads, types=self.args.types)
+        worker.start()
+        print(f"⚙️  Job worker {os.getpid()} started with {self.args.threads} threads")
+        while not stop:
+            time.sleep(0.5)
+        if not worker.stop(self.args.graceful_timeout):
+            print(f"⚠️  Job worker {os.getpid()} stopped with jobs still running; they will be retried")
+        print(f"👋 Job worker {os.getpid()} stopped: {worker.stats}")
+
+    def spawn(self) -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                self._run_worker()
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            finally:
+                os._exit(code)
+        self.workers[pid] = time.monotonic()
+
+    def _reap(self) -> None:
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self.workers.clear()
+                return
+            if pid == 0:
+                return
+            started = self.workers.pop(pid, None)
+            if started is None or self.stopping:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            print(f"💥 Job worker {pid} exited with {code}, restarting")
+            # Only count quick deaths towards the crash backoff
+            self.crashes = self.crashes + 1 if time.monotonic() - started < 30 else 0
+
+    def _on_stop(self, signum, frame) -> None:
+        self.stopping = True
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        while not self.stopping:
+            self._reap()
+            missing = self.args.processes - len(self.workers)
+            if missing > 0 and not self.stopping:
+                if self.crashes >= 3:
+                    # Crash loop (bad config, database down): back off instead of forking continuously
+                    time.sleep(min(30, 2 ** (self.crashes - 3)))
+                for _ in range(missing):
+                    self.spawn()
+            time.sleep(0.5)
+        self.shutdown()
+
+    def shutdown(self) -> None:
+        print(f"🛑 Stopping {len(self.workers)} job workers")
+        for pid in self.workers:
+            os.kill(pid, signal.SIGTERM)
+        deadline = time.monotonic() + self.args.graceful_timeout + 5
+        while self.workers and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.2)
+        for pid in list(self.workers):
+            print(f"🔪 Job worker {pid} did not stop in time, killing it")
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        while self.workers:
+            self._reap()
+            time.sleep(0.1)
+
+
+def main():
+    from app.core.config import settings
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=settings.job_processes, help="0 = one per CPU")
+    parser.add_argument("--threads", type=int, default=settings.job_threads, help="Handler threads per process")
+    parser.add_argument("--types", nargs="*", help="Only run these job types (default: all)")
+    parser.add_argument("--graceful-timeout", type=float, default=settings.worker_graceful_timeout_seconds)
+    args = parser.parse_args()
+
+    from app.db import engine, init_database
+    from app.services.jobs import load_handlers
+
+    init_database()
+    handlers = load_handlers()
+    unknown = sorted(set(args.types or ()) - set(handlers))
+    if unknown:
+        parser.error(f"unknown job types: {', '.join(unknown)} (known: {', '.join(sorted(handlers))})")
+    if args.processes <= 0:
+        args.processes = available_cpus()
+    # Workers must not inherit the parent's pooled connections
+    engine.dispose()
+
+    served = ", ".join(args.types or sorted(handlers))
+    print(f"🚀 Starting {args.processes} job workers x {args.threads} threads for: {served}")
+    JobSupervisor(args, engine).run()
+
+
+if __name__ == "__main__":
+    main()
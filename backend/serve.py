@@ -0,0 +1,459 @@
+#!/usr/bin/env python3
+"""
+Production entry point: a pre-forking supervisor running several uvicorn workers.
+
+The parent binds the listening socket, imports the application once (which
+also creates the schema, so workers never race on it) and forks the workers.
+They share the imported code copy-on-write and all accept on the same socket.
+
+Each worker warms up before it accepts connections: it opens a connection to
+every database and loads the ranking caches of the busiest assessments.
+Until then the kernel queues connections for the workers that are already
+serving.
+
+The worker count defaults to the CPUs available to the process (affinity and
+cgroup quota), lowered if the workers' connection pools would not fit in the
+Postgres ``max_connections`` minus ``DB_RESERVED_CONNECTIONS``.
+
+A worker whose private memory (the pages it does not share with the parent)
+exceeds ``--max-memory-mb`` is replaced without dropping capacity. A new
+worker is forked first, and the old one gets SIGTERM once the new one has
+warmed up, so it finishes in-flight requests and runs its shutdown hooks.
+Crashed workers are restarted, and SIGHUP replaces all workers one by one.
+
+The metrics of all workers are merged through METRICS_DIR. It is emptied at
+startup, or a temporary directory is used when it is not set.
+
+Background jobs (scoring new submissions, emails, campaigns, reports) are run
+by ``run_jobs.py``, which the supervisor starts next to the web workers and
+restarts if it exits. ``--no-jobs`` leaves that to a separate deployment;
+without one, queued jobs are never processed.
+
+    python serve.py                       # auto-sized, port 8001
+    python serve.py --workers 4 --max-memory-mb 768 --port 8080
+    python serve.py --no-jobs             # job workers run elsewhere (run_jobs.py)
+"""
+
+import argparse
+import glob
+import math
+import os
+import random
+import shutil
+import signal
+import sys
+import tempfile
+import time
+import traceback
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import uvicorn
+from sqlalchemy import select, text
+from sqlalchemy.pool import NullPool, QueuePool
+
+
+def prepare_metrics_dir() -> Optional[str]:
+    """Empty METRICS_DIR, or create a temporary one; returns the directory to delete on exit."""
+    directory = os.getenv("METRICS_DIR") or os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for path in glob.glob(os.path.join(directory, "*.db")):
+            os.unlink(path)
+        return None
+    directory = tempfile.mkdtemp(prefix="laksham-metrics-")
+    os.environ["METRICS_DIR"] = directory
+    return directory
+
+
+def available_cpus() -> int:
+    try:
+        count = len(os.sched_getaffinity(0))
+    except AttributeError:
+        count = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as fh:
+            quota, period = fh.read().split()
+        if quota != "max":
+            count = min(count, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return max(1, count)
+
+
+def pool_capacity(engine) -> Optional[int]:
+    """Most connections one process can open through ``engine``; None when unbounded."""
+    pool = engine.pool
+    if isinstance(pool, QueuePool):
+        overflow = pool._max_overflow
+        return None if overflow < 0 else pool.size() + overflow
+    if isinstance(pool, NullPool):
+        return None
+    return 1
+
+
+def connection_limit(engine, settings) -> Optional[int]:
+    """Connections the workers may use on ``engine``'s server; None when there is no limit."""
+    if settings.db_max_connections:
+        return settings.db_max_connections - settings.db_reserved_connections
+    if engine.dialect.name != "postgresql":
+        return None
+    with engine.connect() as conn:
+        available = conn.execute(text(
+            "SELECT current_setting('max_connections')::int - current_setting('superuser_reserved_connections')::int"
+        )).scalar()
+    return available - settings.db_reserved_connections
+
+
+def size_workers(engines: List, settings) -> Tuple[int, str]:
+    cpus = available_cpus()
+    workers, reason = cpus, f"{cpus} available CPUs"
+    servers: Dict[str, list] = {}
+    for engine in engines:
+        if engine.dialect.name == "sqlite":
+            continue
+        capacity = pool_capacity(engine)
+        if capacity is None:
+            continue
+        url = engine.url
+        server = servers.setdefault(f"{url.get_backend_name()}://{url.host}:{url.port or ''}", [engine, 0])
+        server[1] += capacity
+    for name, (engine, per_worker) in servers.items():
+        try:
+            limit = connection_limit(engine, settings)
+        except Exception as exc:
+            print(f"⚠️  Could not read the connection limit of {name}: {exc}")
+            continue
+        if limit is not None and limit // per_worker < workers:
+            workers = max(1, limit // per_worker)
+            reason = f"{limit} connections on {name} / {per_worker} per worker"
+            if limit < per_worker:
+                print(f"⚠️  {name} allows {limit} connections but one worker may open {per_worker}")
+    return workers, reason
+
+
+def private_memory_mb(pid: int) -> Optional[float]:
+    """Memory only this process uses (excludes pages still shared with the parent)."""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as fh:
+            kib = sum(int(line.split()[1]) for line in fh if line.startswith(("Private_Clean:", "Private_Dirty:")))
+        return kib / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        with open(f"/proc/{pid}/statm") as fh:
+            resident = int(fh.read().split()[1])
+        return resident * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def warm_caches(engines: List, assessments: int) -> None:
+    from app.db import SessionLocal
+    from app.models.stats import AssessmentStats
+    from app.services.ranking import ranking_engine
+
+    for engine in engines:
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+        except Exception as exc:
+            print(f"⚠️  Worker {os.getpid()} could not reach {engine.url.render_as_string()}: {exc}")
+    if assessments <= 0:
+        return
+    db = SessionLocal()
+    try:
+        busiest = db.scalars(
+            select(AssessmentStats.assessment_id)
+            .where(AssessmentStats.submitted > 0)
+            .order_by(AssessmentStats.submitted.desc())
+            .limit(assessments)
+        ).all()
+    finally:
+        db.close()
+    for assessment_id in busiest:
+        ranking_engine.get(assessment_id)
+
+
+@dataclass
+class Worker:
+    pid: int
+    ready_fd: int
+    started: float
+    ready: bool = False
+    replaces: Optional[int] = None
+    retiring_since: Optional[float] = None
+
+
+class Supervisor:
+    def __init__(self, app, engines: List, sock, args, settings):
+        self.app = app
+        self.engines = engines
+        self.sock = sock
+        self.args = args
+        self.settings = settings
+        self.workers: Dict[int, Worker] = {}
+        self.stopping = False
+        self.reload = False
+        self.crashes = 0
+        self.jobs_pid: Optional[int] = None
+        self.jobs_started = 0.0
+
+    # ---------------------------------------------------------------- worker side
+
+    def _run_worker(self, ready_fd: int) -> None:
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+            signal.signal(signum, signal.SIG_DFL)
+        # Forked children would otherwise share the parent's random state
+        random.seed()
+        for engine in self.engines:
+            engine.dispose(close=False)
+
+        started = time.perf_counter()
+        try:
+            warm_caches(self.engines, self.args.warmup_assessments)
+        except Exception as exc:
+            print(f"⚠️  Worker {os.getpid()} warm-up failed: {exc}")
+        print(f"🔥 Worker {os.getpid()} warmed up in {time.perf_counter() - started:.1f}s")
+        os.write(ready_fd, b"1")
+        os.close(ready_fd)
+
+        max_requests = self.args.max_requests
+        if max_requests:
+            # Jitter so workers started together do not all recycle at once
+            max_requests += random.randint(0, max(1, max_requests // 10))
+        config = uvicorn.Config(
+            self.app,
+            log_level=self.args.log_level,
+            access_log=self.args.access_log,
+            proxy_headers=True,
+            forwarded_allow_ips=self.args.forwarded_allow_ips,
+            limit_max_requests=max_requests or None,
+            timeout_graceful_shutdown=math.ceil(self.args.graceful_timeout),
+        )
+        uvicorn.Server(config).run(sockets=[self.sock])
+
+    # ---------------------------------------------------------------- supervisor side
+
+    def spawn(self, replaces: Optional[int] = None) -> None:
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            for other in self.workers.values():
+                os.close(other.ready_fd)
+            code = 0
+            try:
+                self._run_worker(write_fd)
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            finally:
+                os._exit(code)
+        os.close(write_fd)
+        os.set_blocking(read_fd, False)
+        self.workers[pid] = Worker(pid, read_fd, time.monotonic(), replaces=replaces)
+
+    def spawn_jobs(self) -> None:
+        """Start run_jobs.py, a fresh interpreter with its own worker pool."""
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "run_jobs.py")
+        argv = [sys.executable, script, "--graceful-timeout", str(self.args.graceful_timeout)]
+        if self.args.job_processes:
+            argv += ["--processes", str(self.args.job_processes)]
+        pid = os.fork()
+        if pid == 0:
+            try:
+                os.execv(sys.executable, argv)
+            finally:
+                os._exit(127)
+        self.jobs_pid = pid
+        self.jobs_started = time.monotonic()
+
+    def retire(self, worker: Worker) -> None:
+        if worker.retiring_since is None:
+            worker.retiring_since = time.monotonic()
+            self._signal(worker.pid, signal.SIGTERM)
+
+    @staticmethod
+    def _signal(pid: int, signum: int) -> None:
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def serving(self) -> List[Worker]:
+        return [w for w in self.workers.values() if w.retiring_since is None]
+
+    def _reap(self) -> None:
+        while self.workers or self.jobs_pid:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            if pid == self.jobs_pid:
+                self.jobs_pid = None
+                if not self.stopping:
+                    print(f"💥 Job runner {pid} exited with code {os.waitstatus_to_exitcode(status)}, restarting")
+                continue
+            worker = self.workers.pop(pid, None)
+            if worker is None:
+                continue
+            os.close(worker.ready_fd)
+            code = os.waitstatus_to_exitcode(status)
+            if worker.retiring_since is None and not self.stopping:
+                print(f"💥 Worker {pid} exited with code {code}" if code else f"🔁 Worker {pid} exited (max requests)")
+                if code and time.monotonic() - worker.started < 10:
+                    self.crashes += 1
+                else:
+                    self.crashes = 0
+
+    def _check_ready(self) -> None:
+        for worker in list(self.workers.values()):
+            if worker.ready:
+                continue
+            try:
+                worker.ready = bool(os.read(worker.ready_fd, 1))
+            except BlockingIOError:
+                continue
+            if not worker.ready:
+                continue
+            if worker.replaces in self.workers:
+                self.retire(self.workers[worker.replaces])
+            if self.args.max_memory_mb:
+                baseline = private_memory_mb(worker.pid)
+                if baseline is not None and baseline >= self.args.max_memory_mb:
+                    # Every replacement would be over the limit as well
+                    print(f"⚠️  A fresh worker already uses {baseline:.0f} MB, above --max-memory-mb "
+                          f"{self.args.max_memory_mb}; memory recycling is disabled")
+                    self.args.max_memory_mb = 0
+
+    def _check_memory(self) -> None:
+        limit = self.args.max_memory_mb
+        replacing = {w.replaces for w in self.workers.values()}
+        for worker in self.serving():
+            if not worker.ready or worker.pid in replacing:
+                continue
+            used = private_memory_mb(worker.pid)
+            if used is not None and used > limit:
+                print(f"♻️  Worker {worker.pid} uses {used:.0f} MB (limit {limit} MB), replacing it")
+                self.spawn(replaces=worker.pid)
+
+    def _kill_stragglers(self) -> None:
+        deadline = self.args.graceful_timeout + 5
+        for worker in self.workers.values():
+            if worker.retiring_since is not None and time.monotonic() - worker.retiring_since > deadline:
+                print(f"🔪 Worker {worker.pid} did not stop within {deadline:.0f}s, killing it")
+                self._signal(worker.pid, signal.SIGKILL)
+
+    def _on_stop(self, signum, frame) -> None:
+        self.stopping = True
+
+    def _on_reload(self, signum, frame) -> None:
+        self.reload = True
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        signal.signal(signal.SIGHUP, self._on_reload)
+        last_memory_check = 0.0
+        while not self.stopping:
+            self._reap()
+            self._check_ready()
+            if self.reload:
+                self.reload = False
+                print("🔄 Replacing all workers")
+                for worker in self.serving():
+                    self.spawn(replaces=worker.pid)
+            replacing = {w.replaces for w in self.workers.values()}
+            missing = self.args.workers - len([w for w in self.serving() if w.pid not in replacing])
+            if missing > 0:
+                if self.crashes >= 3:
+                    # Crash loop (bad config, database down): back off instead of forking continuously
+                    time.sleep(min(30, 2 ** (self.crashes - 3)))
+                for _ in range(missing):
+                    self.spawn()
+            # Job runner crashes are usually bad configuration: retry slowly
+            if self.args.jobs and self.jobs_pid is None and time.monotonic() - self.jobs_started >= 10:
+                self.spawn_jobs()
+            if self.args.max_memory_mb and time.monotonic() - last_memory_check >= self.args.memory_check_interval:
+                last_memory_check = time.monotonic()
+                self._check_memory()
+            self._kill_stragglers()
+            time.sleep(0.5)
+        self.shutdown()
+
+    def shutdown(self) -> None:
+        print(f"🛑 Stopping {len(self.workers)} workers")
+        for worker in self.workers.values():
+            self.retire(worker)
+        if self.jobs_pid:
+            self._signal(self.jobs_pid, signal.SIGTERM)
+        # run_jobs.py gives its own workers graceful_timeout + 5 before killing them
+        deadline = time.monotonic() + self.args.graceful_timeout + 10
+        while (self.workers or self.jobs_pid) and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.2)
+        for pid in [*self.workers, *([self.jobs_pid] if self.jobs_pid else [])]:
+            self._signal(pid, signal.SIGKILL)
+        while self.workers or self.jobs_pid:
+            self._reap()
+            time.sleep(0.1)
+
+
+def main():
+    # Must happen before the app (and its settings) are imported
+    metrics_tmp = prepare_metrics_dir()
+
+    from app.core.config import settings
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8001")))
+    parser.add_argument("--workers", type=int, default=settings.web_concurrency, help="0 = auto")
+    parser.add_argument("--max-memory-mb", type=int, default=settings.worker_max_memory_mb, help="0 = never recycle")
+    parser.add_argument("--memory-check-interval", type=float, default=10.0)
+    parser.add_argument("--max-requests", type=int, default=settings.worker_max_requests, help="0 = unlimited")
+    parser.add_argument("--graceful-timeout", type=float, default=settings.worker_graceful_timeout_seconds)
+    parser.add_argument("--warmup-assessments", type=int, default=settings.warmup_assessments)
+    parser.add_argument("--forwarded-allow-ips", default=os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1"))
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--no-access-log", dest="access_log", action="store_false")
+    parser.add_argument("--job-processes", type=int, default=settings.job_processes, help="0 = one per CPU")
+    parser.add_argument("--no-jobs", dest="jobs", action="store_false",
+                        help="Do not start run_jobs.py (it must then run elsewhere)")
+    args = parser.parse_args()
+
+    try:
+        started = time.perf_counter()
+        # Preload: imports every module and creates the schema once, before forking
+        from app.core.database import engines as named_engines
+        from app.db import engine as primary_engine
+        from app.main import app
+
+        engines = list({id(e): e for e in [primary_engine, *named_engines.values()]}.values())
+        if args.workers <= 0:
+            args.workers, reason = size_workers(engines, settings)
+        else:
+            reason = "configured"
+        # Workers must not inherit the parent's pooled connections
+        for engine in engines:
+            engine.dispose()
+        sock = uvicorn.Config(app, host=args.host, port=args.port).bind_socket()
+        print(f"🚀 Preloaded the app in {time.perf_counter() - started:.1f}s; "
+              f"starting {args.workers} workers ({reason}) on http://{args.host}:{args.port}")
+        if not args.jobs:
+            print("⚠️  --no-jobs: new submissions are not scored and emails, campaigns and reports "
+                  "stay queued until run_jobs.py runs")
+        Supervisor(app, engines, sock, args, settings).run()
+    finally:
+        if metrics_tmp:
+            shutil.rmtree(metrics_tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
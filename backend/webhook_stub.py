@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Local webhook receiver for developing and testing webhook delivery.
+
+Verifies each request's signature, records the events and can simulate an
+unreliable consumer so retries and backoff can be exercised.
+
+    python webhook_stub.py --port 9000 --secret <endpoint secret>   # API needs WEBHOOK_ALLOW_PRIVATE_TARGETS=1
+    python webhook_stub.py --fail-rate 0.3 --delay 0.5
+
+    GET  /events   -> received events as JSON (?clear=1 to reset)
+    GET  /stats    -> request/event counters
+    POST /<any>    -> webhook target
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.webhooks import SIGNATURE_HEADER, verify_signature
+
+
+class WebhookStub:
+    def __init__(self, secret=None, fail_rate=0.0, delay=0.0, quiet=False):
+        self.secret = secret
+        self.fail_rate = fail_rate
+        self.delay = delay
+        self.quiet = quiet
+        self.lock = threading.Lock()
+        self.events = []
+        self.seen_ids = set()
+        self.stats = {"requests": 0, "accepted": 0, "rejected_signature": 0, "simulated_failures": 0,
+                      "events": 0, "duplicates": 0}
+
+    def handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is visible
+
+            def log_message(self, fmt, *args):
+                pass
+
+            def _reply(self, code, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                with stub.lock:
+                    if url.path == "/events":
+                        events = list(stub.events)
+                        if parse_qs(url.query).get("clear"):
+                            stub.events.clear()
+                        return self._reply(200, events)
+                    if url.path == "/stats":
+                        return self._reply(200, stub.stats)
+                self._reply(404, {"detail": "Not found"})
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with stub.lock:
+                    stub.stats["requests"] += 1
+                if stub.secret and not verify_signature(stub.secret, self.headers.get(SIGNATURE_HEADER), body):
+                    with stub.lock:
+                        stub.stats["rejected_signature"] += 1
+                    return self._reply(401, {"detail": "Bad signature"})
+                if stub.delay:
+                    time.sleep(stub.delay)
+                if random.random() < stub.fail_rate:
+                    with stub.lock:
+                        stub.stats["simulated_failures"] += 1
+                    return self._reply(503, {"detail": "Simulated failure"})
+                events = json.loads(body).get("events", [])
+                with stub.lock:
+                    stub.stats["accepted"] += 1
+                    for event in events:
+                        if event["id"] in stub.seen_ids:
+                            stub.stats["duplicates"] += 1
+                            continue
+                        stub.seen_ids.add(event["id"])
+                        stub.events.append(event)
+                        stub.stats["events"] += 1
+                if not stub.quiet:
+                    types = ", ".join(sorted({e["type"] for e in events}))
+                    print(f"📬 {len(events)} events ({types})")
+                self._reply(200, {"received": len(events)})
+
+        return Handler
+
+    def serve(self, host="127.0.0.1", port=9000):
+        server = ThreadingHTTPServer((host, port), self.handler())
+        print(f"🚀 Webhook stub listening on http://{host}:{port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--secret", help="Endpoint secret; signatures are checked when given")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds to wait before answering")
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args()
+    WebhookStub(args.secret, args.fail_rate, args.delay, args.quiet).serve(args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()